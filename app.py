@@ -1,19 +1,57 @@
-from flask import Flask, request, jsonify, send_file, render_template
+from flask import Blueprint, Flask, current_app, g, request, jsonify, send_file, render_template, Response, stream_with_context
 from flask_cors import CORS
-from apscheduler.schedulers.background import BackgroundScheduler
 from datetime import datetime
-from logic.risk_classifier import classify_risk
-from logic.pdf_generator import generate_pdf
+from logic.bmi import calculate_bmi, calculate_bmi_batch
+from logic.risk_classifier import classify_risk, classify_risk_batch
 from logic.hospital_finder import get_hospital_map_url
+from logic.reminders import RECURRENCES
+from logic import chat_router, knowledge_base, metrics, profiler, report_jobs, vitals
+from logic.report_cache import ReportCache
+import base64
+import functools
+import hmac
+import io
+import json
 import os
+import queue
+import re
 import threading
+import time
+import zipfile
 
-app = Flask(__name__)
-CORS(app)
+# Every route is registered on this blueprint, and create_app() registers
+# the blueprint. The PDF engine, numpy, the symptom table and the reminder
+# scheduler are loaded on first use, so creating an app stays cheap.
+bp = Blueprint("health_check", __name__)
+
+# -------------------- ADMIN ACCESS --------------------
+def admin_required(view):
+    """
+    Restricts a view to requests bearing the ADMIN_TOKEN config value
+    (Authorization: Bearer <token>). Without a token configured the
+    admin routes don't exist.
+    """
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        token = current_app.config.get("ADMIN_TOKEN")
+        if not token:
+            return jsonify({"error": "Not found."}), 404
+        supplied = request.headers.get("Authorization", "").removeprefix("Bearer ").strip()
+        if not hmac.compare_digest(supplied.encode(), token.encode()):
+            return jsonify({"error": "A valid admin token is required."}), 403
+        return view(*args, **kwargs)
+    return wrapper
+
+# -------------------- ERRORS --------------------
+@bp.app_errorhandler(400)
+@bp.app_errorhandler(415)
+def json_error(error):
+    """Answers bad request bodies (e.g. JSON that doesn't parse) in JSON, like the API's other errors."""
+    return jsonify({"error": error.description}), error.code
 
 # -------------------- REMINDER SYSTEM --------------------
-reminders = []
-reminder_lock = threading.Lock()
+# Reminders set without a user ID belong to this shared user
+DEFAULT_REMINDER_USER = "anonymous"
 
 def validate_time_format(time_str):
     try:
@@ -23,23 +61,7 @@ def validate_time_format(time_str):
         return False
 
 # -------------------- BMI CALCULATOR --------------------
-def calculate_bmi(height_cm, weight_kg):
-    try:
-        height_m = height_cm / 100
-        bmi = weight_kg / (height_m ** 2)
-        if bmi < 18.5:
-            category = "Underweight"
-        elif 18.5 <= bmi < 24.9:
-            category = "Normal weight"
-        elif 25 <= bmi < 29.9:
-            category = "Overweight"
-        else:
-            category = "Obese"
-        return round(bmi, 2), category
-    except Exception as e:
-        return None, f"Error: {e}"
-
-@app.route('/bmi', methods=['POST'])
+@bp.route('/bmi', methods=['POST'])
 def bmi():
     data = request.json
     height = data.get('height')
@@ -47,126 +69,776 @@ def bmi():
     if height is None or weight is None:
         return jsonify({"error": "Height and weight are required."}), 400
     bmi_value, category = calculate_bmi(height, weight)
+    record_assessment(data, bmi=bmi_value)
     return jsonify({"bmi": bmi_value, "category": category})
 
+def read_bmi_csv(text):
+    """
+    Reads heights and weights from CSV text with a header row naming a
+    "height" and a "weight" column (in any order, among other columns).
+    A blank value is read as NaN, like a null in JSON. Raises ValueError
+    if either column is missing or a value isn't a number.
+    """
+    import numpy as np
+
+    header, _, body = text.partition("\n")
+    columns = [c.strip().strip('"').lower() for c in header.split(",")]
+    if "height" not in columns or "weight" not in columns:
+        raise ValueError("CSV header must name a height and a weight column.")
+    if not body.strip():
+        return np.empty(0), np.empty(0)
+    usecols = (columns.index("height"), columns.index("weight"))
+    try:
+        heights, weights = np.loadtxt(io.StringIO(body), delimiter=",", ndmin=2, usecols=usecols).T
+    except ValueError:
+        # Slower, per-value parse, only for files with blank values
+        heights, weights = np.loadtxt(io.StringIO(body), delimiter=",", ndmin=2, usecols=usecols,
+                                      converters=lambda value: float(value) if value.strip() else np.nan).T
+    return heights, weights
+
+@bp.route('/bmi/batch', methods=['POST'])
+def bmi_batch():
+    """
+    BMI for many people in one vectorized call. Takes JSON
+    {"heights": [...], "weights": [...]} and answers
+    {"bmi": [...], "categories": [...]}, or takes CSV (a text/csv body or
+    an uploaded "file") with height and weight columns and answers CSV
+    with one "bmi,category" row per input row. Records with a missing or
+    non-positive height or weight get a null BMI and category "Invalid".
+    """
+    try:
+        if request.is_json:
+            data = request.json or {}
+            heights, weights = data.get("heights"), data.get("weights")
+            if not isinstance(heights, list) or not isinstance(weights, list):
+                return jsonify({"error": "heights and weights must be lists."}), 400
+            # null entries become NaN and are reported as invalid
+            heights = [float("nan") if h is None else h for h in heights]
+            weights = [float("nan") if w is None else w for w in weights]
+            values, categories = calculate_bmi_batch(heights, weights)
+            return jsonify({"bmi": [None if v != v else v for v in values.tolist()],
+                            "categories": categories.tolist()})
+
+        upload = request.files.get("file")
+        raw = upload.read() if upload is not None else request.get_data()
+        values, categories = calculate_bmi_batch(*read_bmi_csv(raw.decode("utf-8-sig")))
+    except (TypeError, ValueError, UnicodeDecodeError) as e:
+        return jsonify({"error": str(e)}), 400
+    rows = "".join(f"{'' if v != v else v},{c}\n" for v, c in zip(values.tolist(), categories.tolist()))
+    return Response("bmi,category\n" + rows, mimetype="text/csv")
+
 # -------------------- SYMPTOM DIAGNOSIS --------------------
-@app.route('/diagnose', methods=['POST'])
+@bp.route('/diagnose', methods=['POST'])
 def diagnose():
     data = request.json
     symptoms = data.get('symptoms', [])
-    symptom_map = {
-        "Fever": ("Flu", "Paracetamol"),
-        "Cough": ("Flu", "Cough Syrup"),
-        "Headache": ("Migraine", "Ibuprofen"),
-        "Sore Throat": ("Throat Infection", "Lozenges"),
-        "Fatigue": ("Anemia", "Iron Supplements"),
-        "Nausea": ("Food Poisoning", "Ondansetron"),
-        "Vomiting": ("Food Poisoning", "Domperidone"),
-        "Diarrhea": ("Infection", "ORS"),
-        "Chest Pain": ("Cardiac Issue", "Consult Doctor"),
-        "Shortness of Breath": ("Asthma", "Inhaler"),
-        "Skin Rash": ("Allergy", "Antihistamine"),
-        "Back Pain": ("Muscle Strain", "Pain Reliever"),
-        "Dizziness": ("Vertigo", "Meclizine"),
-        "Loss of Appetite": ("Gastric Issue", "Antacids"),
-        "Joint Pain": ("Arthritis", "NSAIDs"),
-        "Abdominal Pain": ("Ulcer", "Omeprazole"),
-        "Constipation": ("Digestive Issue", "Laxative"),
-        "Runny Nose": ("Cold", "Decongestant"),
-        "Sneezing": ("Allergy", "Antihistamine"),
-        "Itchy Eyes": ("Conjunctivitis", "Eye Drops"),
-        "Swollen Glands": ("Infection", "Antibiotics"),
-        "Muscle Aches": ("Viral Fever", "Paracetamol"),
-        "Ear Pain": ("Ear Infection", "Antibiotics"),
-        "Blurred Vision": ("Vision Issue", "Eye Exam"),
-        "Palpitations": ("Heart Issue", "ECG Check"),
-        "Fainting": ("Low BP", "Consult Doctor")
-    }
-
-    diagnoses = []
-    for symptom in symptoms:
-        diagnosis = symptom_map.get(symptom)
-        if diagnosis:
-            diagnoses.append({"symptom": symptom, "condition": diagnosis[0], "medicine": diagnosis[1]})
-        else:
-            diagnoses.append({"symptom": symptom, "condition": "Unknown", "medicine": "Consult Doctor"})
-
+    if not isinstance(symptoms, list):
+        return jsonify({"error": "Symptoms must be a list."}), 400
+    diagnoses = knowledge_base.diagnose(symptoms)
+    record_assessment(data, symptoms=symptoms)
     return jsonify({"results": diagnoses})
 
+@bp.route('/knowledge-base/reload', methods=['POST'])
+@admin_required
+def reload_knowledge_base():
+    try:
+        entries = knowledge_base.reload()
+        # The chat router's symptom phrases come from the table
+        chat_router.reset()
+        return jsonify({"status": "Knowledge base reloaded", "entries": entries})
+    except Exception as e:
+        return jsonify({"error": f"Failed to reload knowledge base: {e}"}), 500
+
 # -------------------- MAIN ROUTES --------------------
-@app.route("/", methods=["GET"])
+@bp.route("/", methods=["GET"])
 def home():
     return render_template('index.html')
 
-@app.route("/test-pdf", methods=["GET"])
+@bp.route("/test-pdf", methods=["GET"])
 def test_pdf():
     with open('test_pdf_manual.html', 'r') as f:
         return f.read()
 
-@app.route("/api", methods=["GET"])
+@bp.route("/api", methods=["GET"])
 def api_home():
     return "Welcome to the Health Check App Backend API!"
 
-@app.route("/classify-risk", methods=["POST"])
+@bp.route("/classify-risk", methods=["POST"])
 def classify_risk_route():
     data = request.json
     symptoms = data.get("symptoms", [])
     if not isinstance(symptoms, list):
         return jsonify({"error": "Symptoms must be a list."}), 400
     try:
-        risk = classify_risk(symptoms)
+        risk = classify_risk([knowledge_base.canonical_name(s) for s in symptoms])
+        record_assessment(data, risk=risk, symptoms=symptoms)
         return jsonify({"risk": risk})
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
-@app.route("/generate-report", methods=["POST"])
+# Patients classified per vectorized call when streaming NDJSON
+RISK_BATCH_CHUNK_SIZE = 10000
+
+def parse_ndjson_line(line):
+    """Returns (record, error) for one NDJSON line, or None if it is blank."""
+    line = line.strip()
+    if not line:
+        return None
+    try:
+        return json.loads(line), None
+    except ValueError as e:
+        return None, f"Invalid JSON: {e}"
+
+# Bytes read from the request body at a time when parsing NDJSON
+NDJSON_READ_SIZE = 64 * 1024
+
+def iter_ndjson(stream):
+    """
+    Reads newline-delimited JSON from a stream one line at a time.
+    Yields (line_number, record, error) tuples; blank lines are skipped.
+    """
+    # Read in blocks and split here: iterating a WSGI input stream reads
+    # it a byte at a time
+    line_number = 0
+    buffer = b""
+    while True:
+        block = stream.read(NDJSON_READ_SIZE)
+        if not block:
+            break
+        *lines, buffer = (buffer + block).split(b"\n")
+        for line in lines:
+            line_number += 1
+            parsed = parse_ndjson_line(line)
+            if parsed is not None:
+                yield (line_number, *parsed)
+    parsed = parse_ndjson_line(buffer)
+    if parsed is not None:
+        yield (line_number + 1, *parsed)
+
+def parse_patient_record(line_number, record, error):
+    """
+    Turns one NDJSON line (a symptom list or {"id": ..., "symptoms": [...]})
+    into (record_id, symptoms, error). Records without an id are
+    identified by their line number.
+    """
+    if isinstance(record, dict):
+        record_id = record.get("id", line_number)
+        symptoms = record.get("symptoms", [])
+    else:
+        record_id, symptoms = line_number, record
+    if error is None and not (isinstance(symptoms, list) and all(isinstance(s, str) for s in symptoms)):
+        error = "Symptoms must be a list of strings."
+    return record_id, symptoms, error
+
+def parse_risk_record(line_number, record, error):
+    """Like parse_patient_record, with the symptoms in canonical form."""
+    record_id, symptoms, error = parse_patient_record(line_number, record, error)
+    if error is None:
+        symptoms = [knowledge_base.canonical_name(s) for s in symptoms]
+    return record_id, symptoms, error
+
+def format_risk_results(pending, risks):
+    """
+    Formats the NDJSON result lines for (record_id, symptoms, error) records,
+    given the risks classified for the records without an error.
+    """
+    risks = iter(risks)
+    return "".join(json.dumps({"id": record_id, "error": error} if error is not None
+                              else {"id": record_id, "risk": next(risks)}) + "\n"
+                   for record_id, _, error in pending)
+
+@bp.route("/classify-risk/batch", methods=["POST"])
+def classify_risk_batch_route():
+    # Plain JSON: {"symptom_lists": [[...], [...]]}
+    if request.is_json:
+        symptom_lists = (request.json or {}).get("symptom_lists")
+        if not isinstance(symptom_lists, list) or not all(isinstance(s, list) for s in symptom_lists):
+            return jsonify({"error": "symptom_lists must be a list of symptom lists."}), 400
+        try:
+            canonical = [[knowledge_base.canonical_name(s) for s in symptoms] for symptoms in symptom_lists]
+            return jsonify({"risks": classify_risk_batch(canonical)})
+        except Exception as e:
+            return jsonify({"error": str(e)}), 500
+
+    # NDJSON: one patient per line, either a symptom list or
+    # {"id": ..., "symptoms": [...]}. Results are streamed back per line.
+    def generate():
+        pending = []
+
+        def flush():
+            out = format_risk_results(
+                pending, classify_risk_batch([symptoms for _, symptoms, error in pending if error is None]))
+            pending.clear()
+            return out
+
+        for line_number, record, error in iter_ndjson(request.stream):
+            pending.append(parse_risk_record(line_number, record, error))
+            if len(pending) >= RISK_BATCH_CHUNK_SIZE:
+                yield flush()
+        if pending:
+            yield flush()
+
+    return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
+
+# Result lines written per chunk when streaming diagnoses
+DIAGNOSE_STREAM_CHUNK_SIZE = 1000
+
+def format_diagnosis(line_number, record, error):
+    """Returns the NDJSON result line for one patient record."""
+    record_id, symptoms, error = parse_patient_record(line_number, record, error)
+    if error is not None:
+        return json.dumps({"id": record_id, "error": error}) + "\n"
+    return json.dumps({"id": record_id, "results": knowledge_base.diagnose(symptoms)}) + "\n"
+
+@bp.route("/diagnose/stream", methods=["POST"])
+def diagnose_stream():
+    """
+    Bulk /diagnose over NDJSON: one patient per line, either a symptom list
+    or {"id": ..., "symptoms": [...]}, answered with one
+    {"id": ..., "results": [...]} (or {"id": ..., "error": ...}) line per
+    patient. Records are read and answered as they arrive, so memory use
+    doesn't grow with the number of patients.
+    """
+    def generate():
+        lines = []
+        for parsed in iter_ndjson(request.stream):
+            lines.append(format_diagnosis(*parsed))
+            if len(lines) >= DIAGNOSE_STREAM_CHUNK_SIZE:
+                yield "".join(lines)
+                lines.clear()
+        if lines:
+            yield "".join(lines)
+
+    return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
+
+def create_report_cache(config):
+    """
+    Builds the report cache for an app's config: REPORT_CACHE_BYTES of
+    rendered reports in memory, plus files in REPORT_CACHE_DIR (if set)
+    kept for REPORT_CACHE_TTL seconds.
+    """
+    return ReportCache(max_bytes=int(config["REPORT_CACHE_BYTES"]), disk_dir=config["REPORT_CACHE_DIR"] or None,
+                       disk_ttl_seconds=float(config["REPORT_CACHE_TTL"]))
+
+def get_report_cache(app=None):
+    """Returns the app's (default: current app's) report cache."""
+    app = app or current_app._get_current_object()
+    return app.extensions["report_cache"]
+
+def render_report(kwargs, cache_key=None, data=None, record=True, app=None):
+    """
+    Returns the PDF bytes for generate_pdf kwargs, from the report cache
+    when possible. A report rendered for a payload (data) naming a patient
+    shows their trends, and with record the payload's assessment is then
+    recorded in their history; a cached report records nothing.
+    """
+    from logic.pdf_generator import generate_pdf
+
+    report_cache = get_report_cache(app)
+    cache_key = cache_key or report_cache.key(kwargs)
+    pdf_bytes = report_cache.get(cache_key)
+    if pdf_bytes is None:
+        record_history = None
+        if data is not None and record:
+            record_history = report_history(data, kwargs, app)
+        elif data is not None:
+            add_trends(data, kwargs, app)
+        pdf_bytes = generate_pdf(as_bytes=True, **kwargs)
+        report_cache.put(cache_key, pdf_bytes)
+        if record_history is not None:
+            record_history()
+    return pdf_bytes
+
+@bp.route("/generate-report", methods=["POST"])
 def generate_report_route():
+    data = request.json
+    if not data:
+        return jsonify({"error": "No data provided"}), 400
     try:
-        data = request.json
-        if not data:
-            return jsonify({"error": "No data provided"}), 400
-            
-        name = data.get("name", "N/A")
-        age = data.get("age", "N/A")
-        risk_level = data.get("risk_level", "Low")
-        symptoms = data.get("symptoms", [])
-        diagnoses = data.get("diagnoses", [])
-        bmi = data.get("bmi")
-        mental_wellness = data.get("mental_wellness")
-        vital_signs = data.get("vital_signs")
-        
-        # Ensure symptoms and diagnoses are lists
-        if not isinstance(symptoms, list):
-            symptoms = []
-        if not isinstance(diagnoses, list):
-            diagnoses = []
-        
-        print(f"Generating PDF for {name} with {len(symptoms)} symptoms and {len(diagnoses)} diagnoses")
-        
-        file_path = generate_pdf(
-            name=name,
-            age=age,
-            risk_level=risk_level,
-            symptoms=symptoms,
-            diagnoses=diagnoses,
-            bmi=bmi,
-            mental_wellness=mental_wellness,
-            vital_signs=vital_signs
-        )
-        
-        if not os.path.exists(file_path):
-            return jsonify({"error": "PDF file was not created"}), 500
-            
-        return send_file(file_path, as_attachment=True, download_name="comprehensive_health_report.pdf")
+        from logic.pdf_generator import report_kwargs
+        kwargs = report_kwargs(data)
+        cache_key = report_cache_key(data, kwargs)
+        if cache_key in request.if_none_match:
+            response = current_app.response_class(status=304)
+            response.set_etag(cache_key)
+            return response
+
+        pdf_bytes = render_report(kwargs, cache_key, data)
+        return send_file(io.BytesIO(pdf_bytes), mimetype="application/pdf", etag=cache_key,
+                         as_attachment=True, download_name="comprehensive_health_report.pdf")
     except ImportError as e:
         return jsonify({"error": "PDF library not available. Please install fpdf2: pip install fpdf2"}), 500
     except Exception as e:
-        print(f"PDF generation error: {str(e)}")
+        current_app.logger.exception("PDF generation failed")
         return jsonify({"error": f"Failed to generate PDF: {str(e)}"}), 500
 
-@app.route("/find-hospitals", methods=["POST"])
+@bp.route("/report-cache/stats", methods=["GET"])
+def report_cache_stats_route():
+    return jsonify(get_report_cache().stats())
+
+@bp.route("/reports", methods=["POST"])
+def submit_report_route():
+    data = request.json
+    if not data:
+        return jsonify({"error": "No data provided"}), 400
+    from logic.pdf_generator import report_kwargs
+    kwargs = report_kwargs(data)
+    record_history = report_history(data, kwargs)
+    try:
+        job_id = report_jobs.submit(kwargs)
+    except report_jobs.QueueFullError as e:
+        response = jsonify({"error": str(e)})
+        response.headers["Retry-After"] = "5"
+        return response, 429
+    except report_jobs.WorkersUnavailableError as e:
+        current_app.logger.exception("Report job not queued")
+        response = jsonify({"error": str(e)})
+        response.headers["Retry-After"] = "5"
+        return response, 503
+    if record_history is not None:
+        record_history()
+    return jsonify({"job_id": job_id, "status": "queued", "status_url": f"/reports/{job_id}"}), 202
+
+@bp.route("/reports/<job_id>", methods=["GET"])
+def report_status_route(job_id):
+    job = report_jobs.status(job_id)
+    if job is None:
+        return jsonify({"error": "Unknown or expired report job."}), 404
+    if job["status"] == "failed":
+        return jsonify({"job_id": job_id, "status": "failed", "error": f"Failed to generate PDF: {job['error']}"}), 500
+    if job["status"] != "done":
+        return jsonify({"job_id": job_id, "status": job["status"]})
+    return send_file(io.BytesIO(job["pdf"]), mimetype="application/pdf",
+                     as_attachment=True, download_name="comprehensive_health_report.pdf")
+
+class ZipChunks:
+    """
+    Write-only target for zipfile.ZipFile that hands over what has been
+    written so far. It can't seek or tell, so ZipFile writes each entry's
+    sizes after its data and never goes back.
+    """
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def take(self):
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+def report_filename(line_number, record):
+    """Names a bulk report after its line and the patient's ID or name, e.g. "0007_Jane_Doe.pdf"."""
+    label = patient_id(record) or str(record.get("name") or "report")
+    label = re.sub(r"[^A-Za-z0-9._-]+", "_", label).strip("._")[:60] or "report"
+    return f"{line_number:04d}_{label}.pdf"
+
+def bulk_report_items(records, app=None):
+    """
+    Turns NDJSON (line_number, record, error) triples into items for
+    report_jobs.render_stream, keyed by (line_number, filename,
+    record_history) with record_history as from report_history.
+    """
+    from logic.pdf_generator import report_kwargs
+
+    for line_number, record, error in records:
+        if error is None and not isinstance(record, dict):
+            error = "Each line must be a report payload (a JSON object)."
+        if error is not None:
+            yield (line_number, None, None), None, error
+            continue
+        try:
+            kwargs = report_kwargs(record)
+            record_history = report_history(record, kwargs, app)
+        except Exception as e:
+            yield (line_number, None, None), None, str(e)
+            continue
+        yield (line_number, report_filename(line_number, record), record_history), kwargs, None
+
+@bp.route("/generate-report/bulk", methods=["POST"])
+def bulk_report_route():
+    """
+    Renders a PDF report per NDJSON line (each a /generate-report payload)
+    in the report worker pool and streams them back as a ZIP archive, each
+    PDF added as soon as it is rendered. A line that can't be read or
+    rendered doesn't stop the batch: the archive ends with manifest.ndjson,
+    a {"line", "file"} or {"line", "error"} line per input line.
+    """
+    app = current_app._get_current_object()
+
+    def generate():
+        chunks = ZipChunks()
+        manifest = []
+        # PDFs are compressed already, so entries are stored as they are
+        with zipfile.ZipFile(chunks, "w", compression=zipfile.ZIP_STORED) as archive:
+            items = bulk_report_items(iter_ndjson(request.stream), app)
+            for (line_number, filename, record_history), pdf_bytes, error in report_jobs.render_stream(items):
+                if error is not None:
+                    manifest.append({"line": line_number, "error": error})
+                    continue
+                archive.writestr(filename, pdf_bytes)
+                if record_history is not None:
+                    record_history()
+                manifest.append({"line": line_number, "file": filename})
+                yield chunks.take()
+            manifest.sort(key=lambda entry: entry["line"])
+            archive.writestr("manifest.ndjson", "".join(json.dumps(entry) + "\n" for entry in manifest))
+        yield chunks.take()
+
+    return Response(stream_with_context(generate()), mimetype="application/zip",
+                    headers={"Content-Disposition": "attachment; filename=health_reports.zip"})
+
+# -------------------- ONE-SHOT ASSESSMENT --------------------
+ASSESS_REPORT_OPTIONS = (None, "none", "pdf", "job")
+
+def assess(data, app=None):
+    """
+    Assesses a whole health form in one pass over its symptoms, and
+    records it in the history of the form's "patient", if it names one.
+    Args:
+        data: The form: name, age, height, weight, symptoms,
+            mental_wellness, vital_signs and patient (all optional)
+        app: The app whose patient history to use (default: current app)
+    Returns:
+        (assessment, kwargs): the {"bmi", "diagnoses", "risk"} response
+        body, and the generate_pdf keyword arguments for its report
+    Raises:
+        ValueError: if the symptoms, height or weight are malformed
+    """
+    symptoms = data.get("symptoms", [])
+    if not isinstance(symptoms, list) or not all(isinstance(s, str) for s in symptoms):
+        raise ValueError("Symptoms must be a list of strings.")
+
+    bmi = None
+    if data.get("height") not in (None, "") and data.get("weight") not in (None, ""):
+        try:
+            bmi_value, category = calculate_bmi(float(data["height"]), float(data["weight"]))
+        except (TypeError, ValueError):
+            raise ValueError("Height and weight must be numbers.")
+        if bmi_value is not None:
+            bmi = {"value": bmi_value, "category": category}
+
+    diagnoses, canonical = knowledge_base.analyze(symptoms)
+    risk = classify_risk(canonical)
+
+    from logic.pdf_generator import report_kwargs
+    record_assessment(data, app, bmi=bmi, risk=risk, symptoms=symptoms, vital_signs=data.get("vital_signs"))
+    kwargs = report_kwargs({**data, "risk_level": risk, "diagnoses": diagnoses, "bmi": bmi})
+    return {"bmi": bmi, "diagnoses": diagnoses, "risk": risk}, kwargs
+
+@bp.route("/assess", methods=["POST"])
+def assess_route():
+    """
+    Everything /bmi, /diagnose and /classify-risk return, for the whole
+    form in one request. With "report": "pdf" the response also carries
+    the PDF (base64); with "report": "job" it carries a background report
+    job, as POST /reports would.
+    """
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({"error": "No data provided"}), 400
+    report = data.get("report")
+    if report not in ASSESS_REPORT_OPTIONS:
+        return jsonify({"error": "report must be one of: none, pdf, job."}), 400
+    try:
+        assessment, kwargs = assess(data)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    if report == "pdf":
+        try:
+            cache_key = report_cache_key(data, kwargs)
+            # assess() has recorded the assessment already
+            pdf_bytes = render_report(kwargs, cache_key, data, record=False)
+        except ImportError:
+            return jsonify({"error": "PDF library not available. Please install fpdf2: pip install fpdf2"}), 500
+        except Exception as e:
+            current_app.logger.exception("PDF generation failed")
+            return jsonify({"error": f"Failed to generate PDF: {str(e)}"}), 500
+        assessment["report"] = {"filename": "comprehensive_health_report.pdf", "etag": cache_key,
+                                "pdf": base64.b64encode(pdf_bytes).decode("ascii")}
+    elif report == "job":
+        add_trends(data, kwargs)
+        try:
+            job_id = report_jobs.submit(kwargs)
+            assessment["report"] = {"job_id": job_id, "status": "queued", "status_url": f"/reports/{job_id}"}
+        except (report_jobs.QueueFullError, report_jobs.WorkersUnavailableError) as e:
+            # The assessment is still good; only the report has to be retried
+            assessment["report"] = {"error": str(e), "retry_after": 5}
+    return jsonify(assessment)
+
+# -------------------- VITAL SIGNS --------------------
+_vitals_monitor_lock = threading.Lock()
+
+def get_vitals_monitor(app=None):
+    """Returns the app's (default: current app's) vitals monitor, creating it on first use."""
+    app = app or current_app._get_current_object()
+    monitor = app.extensions.get("vitals_monitor")
+    if monitor is None:
+        with _vitals_monitor_lock:
+            monitor = app.extensions.get("vitals_monitor")
+            if monitor is None:
+                monitor = app.extensions["vitals_monitor"] = vitals.VitalsMonitor()
+    return monitor
+
+def ingest_vitals(monitor, line_number, record, error):
+    """
+    Adds one NDJSON vitals reading to the monitor. Returns its result
+    ({"line", "patient", "alerts"} or {"line", "error"}) if it raised
+    alerts or couldn't be read, otherwise None.
+    """
+    if error is None:
+        patient = record.get("patient") if isinstance(record, dict) else None
+        if isinstance(patient, bool) or not isinstance(patient, (str, int)):
+            error = 'Each reading must be an object with a "patient" ID (a string or number).'
+    if error is None:
+        try:
+            # Keyed as text, as GET /vitals/<patient> looks them up
+            alerts = monitor.add(str(patient), vitals.parse_reading(record))
+        except ValueError as e:
+            error = str(e)
+    if error is not None:
+        return {"line": line_number, "error": error}
+    if alerts:
+        return {"line": line_number, "patient": patient, "alerts": alerts}
+    return None
+
+@bp.route("/vitals/stream", methods=["POST"])
+def vitals_stream():
+    """
+    Ingests vital-sign readings over NDJSON, one per line:
+    {"patient": ..., "blood_pressure": "120/80", "sugar_level": 95,
+    "heart_rate": 72}, any vital optional. Each patient's rolling
+    statistics are updated as readings arrive; a line is sent back for
+    every reading that raised an alert (out of the normal range, or far
+    from the patient's rolling mean) or couldn't be read, as soon as it
+    is read, and a final {"summary": ...} line closes the stream.
+    """
+    monitor = get_vitals_monitor()
+
+    def generate():
+        readings = alerts = errors = 0
+        for parsed in iter_ndjson(request.stream):
+            readings += 1
+            result = ingest_vitals(monitor, *parsed)
+            if result is None:
+                continue
+            if "error" in result:
+                errors += 1
+            else:
+                alerts += len(result["alerts"])
+            yield json.dumps(result) + "\n"
+        yield json.dumps({"summary": {"readings": readings, "alerts": alerts, "errors": errors,
+                                      "patients": len(monitor)}}) + "\n"
+
+    return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
+
+@bp.route("/vitals/<patient>", methods=["GET"])
+def vitals_stats_route(patient):
+    stats = get_vitals_monitor().stats(patient)
+    if stats is None:
+        return jsonify({"error": "No readings for this patient."}), 404
+    return jsonify({"patient": patient, **stats})
+
+# -------------------- PATIENT HISTORY --------------------
+_patient_history_lock = threading.Lock()
+
+# Named downsampling buckets for GET /history/<patient>, in seconds
+HISTORY_BUCKETS = {"hour": 3600, "day": 86400, "week": 7 * 86400}
+
+def get_patient_history(app=None):
+    """
+    Returns the app's (default: current app's) patient history, opening
+    HISTORY_DB (default <instance folder>/history.db) on first use, or
+    None if history is off.
+    """
+    app = app or current_app._get_current_object()
+    if "patient_history" not in app.extensions:
+        with _patient_history_lock:
+            if "patient_history" not in app.extensions:
+                history = None
+                if app.config["HISTORY_DB"] != "":
+                    from logic.patient_history import PatientHistory
+                    path = app.config["HISTORY_DB"] or os.path.join(app.instance_path, "history.db")
+                    os.makedirs(os.path.dirname(path), exist_ok=True)
+                    history = PatientHistory(path)
+                app.extensions["patient_history"] = history
+    return app.extensions["patient_history"]
+
+def patient_id(data):
+    """Returns a payload's "patient" ID as text, or None if it has none."""
+    patient = data.get("patient") if isinstance(data, dict) else None
+    if isinstance(patient, bool) or not isinstance(patient, (str, int)) or patient == "":
+        return None
+    return str(patient)
+
+def record_assessment(data, app=None, **parts):
+    """
+    Appends an assessment (assessment_values keyword arguments) to the
+    history of the payload's "patient". Returns the patient ID, or None if
+    the payload names no patient or history is off.
+    """
+    patient = patient_id(data)
+    if patient is None:
+        return None
+    history = get_patient_history(app)
+    if history is None:
+        return None
+    from logic.patient_history import assessment_values
+    history.append(patient, assessment_values(**parts))
+    return patient
+
+def add_trends(data, kwargs, app=None, current=None):
+    """
+    Adds the trends of the payload's patient to its generate_pdf kwargs,
+    so the report shows them without the client fetching them first.
+    current: FIELDS values of an assessment not recorded yet, counted as
+    the latest. Returns the patient ID, or None if the payload names no
+    patient or history is off.
+    """
+    patient = patient_id(data)
+    history = get_patient_history(app) if patient is not None else None
+    if history is None:
+        return None
+    kwargs["history"] = history.trends(patient, current=current)
+    return patient
+
+def report_history(data, kwargs, app=None):
+    """
+    Adds the trends of a report payload's patient to its generate_pdf
+    kwargs, counting the payload's own assessment (only the values it
+    states: a risk_level left out isn't recorded as "Low"). Returns a
+    function that records that assessment, to be called once the report
+    has been rendered or queued, or None if there is nothing to record.
+    """
+    from logic.patient_history import assessment_values
+
+    values = assessment_values(bmi=data.get("bmi"), risk=data.get("risk_level"),
+                               symptoms=data.get("symptoms"), vital_signs=data.get("vital_signs"))
+    patient = add_trends(data, kwargs, app, current=values)
+    if patient is None:
+        return None
+    return functools.partial(get_patient_history(app).append, patient, values)
+
+def report_cache_key(data, kwargs, app=None):
+    """
+    The report cache key (and ETag) for a payload's generate_pdf kwargs.
+    A patient's report also shows their trends, which change with every
+    assessment; the key names the patient rather than including the
+    trends, so a repeated request finds the cached report, trends as of
+    its first rendering (as with its Report Date).
+    """
+    patient = patient_id(data)
+    return get_report_cache(app).key(kwargs if patient is None else {**kwargs, "patient": patient})
+
+def history_range(args, now):
+    """
+    Reads the time range and bucket of a history query: since/until (Unix
+    times) or days (default 90) back from now, and bucket ("hour", "day",
+    "week" or seconds). Raises ValueError if they aren't finite numbers.
+    """
+    from logic.patient_history import TREND_DAYS
+
+    try:
+        until = int(float(args["until"])) if args.get("until") else int(now)
+        since = (int(float(args["since"])) if args.get("since")
+                 else until - int(float(args.get("days", TREND_DAYS)) * 86400))
+        bucket = args.get("bucket")
+        if bucket:
+            bucket = HISTORY_BUCKETS.get(bucket) or int(bucket)
+            if bucket <= 0:
+                raise ValueError
+    except (ValueError, OverflowError):
+        raise ValueError("since, until and days must be finite numbers, and bucket one of hour, day, week "
+                         "or a number of seconds.")
+    # SQLite integers are 64-bit
+    since, until = (min(max(t, -2 ** 63), 2 ** 63 - 1) for t in (since, until))
+    return since, until, bucket or None
+
+@bp.route("/history/<patient>", methods=["GET"])
+def history_route(patient):
+    """
+    A patient's recorded assessments over a time range, as columns:
+    {"time": [...], "bmi": [...], "risk": [...], ...}, oldest first, null
+    where a value wasn't recorded. With a bucket, one entry per bucket
+    (with a "records" count): mean values and the highest risk level.
+    """
+    from logic.patient_history import FIELDS, RISK_LEVELS, downsample
+
+    history = get_patient_history()
+    if history is None:
+        return jsonify({"error": "Patient history is disabled (HISTORY_DB is empty)."}), 400
+    try:
+        since, until, bucket = history_range(request.args, time.time())
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    rows = history.query(patient, since, until)
+    names = ("time", *FIELDS)
+    if bucket:
+        rows = downsample(rows, bucket)
+        names = ("time", "records", *FIELDS)
+    columns = dict(zip(names, map(list, zip(*rows)))) if rows else {name: [] for name in names}
+    columns["risk"] = [None if r is None else RISK_LEVELS[r] for r in columns["risk"]]
+    return jsonify({"patient": patient, "since": since, "until": until, "bucket": bucket, **columns})
+
+# -------------------- HOSPITAL FINDER --------------------
+_hospital_index_lock = threading.Lock()
+
+def get_hospital_index(app=None):
+    """
+    Returns the app's (default: current app's) offline hospital index,
+    loading HOSPITAL_DATA on first use, or None if offline search is off.
+    """
+    app = app or current_app._get_current_object()
+    if "hospital_index" not in app.extensions:
+        with _hospital_index_lock:
+            if "hospital_index" not in app.extensions:
+                hospital_index = None
+                if app.config["HOSPITAL_DATA"] != "":
+                    from logic.hospital_index import load_hospitals
+                    hospital_index = load_hospitals(app.config["HOSPITAL_DATA"])
+                app.extensions["hospital_index"] = hospital_index
+    return app.extensions["hospital_index"]
+
+def nearest_hospitals(data, hospital_index):
+    """
+    Finds the k (default 5) hospitals nearest to data's lat/lon.
+    Returns: {"hospitals": [...], "map_url": ...}, nearest first
+    Raises ValueError for a missing or out-of-range point or k.
+    """
+    from logic.hospital_index import DEFAULT_K, MAX_K
+
+    try:
+        lat, lon = float(data["lat"]), float(data["lon"])
+    except (KeyError, TypeError, ValueError):
+        raise ValueError("lat and lon must be numbers.")
+    if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+        raise ValueError("lat must be between -90 and 90 and lon between -180 and 180.")
+    # Not coerced: 2.9 or "3" is rejected rather than read as 2 or 3
+    k = data.get("k", DEFAULT_K)
+    if isinstance(k, bool) or not isinstance(k, int) or not 1 <= k <= MAX_K:
+        raise ValueError(f"k must be a whole number between 1 and {MAX_K}.")
+    return {"hospitals": hospital_index.nearest(lat, lon, k), "map_url": get_hospital_map_url(f"{lat},{lon}")}
+
+@bp.route("/find-hospitals", methods=["POST"])
 def find_hospitals_route():
     data = request.json
+    # With a lat/lon the hospitals are looked up here; otherwise only a
+    # map search URL for the location is returned
+    if "lat" in data or "lon" in data:
+        try:
+            hospital_index = get_hospital_index()
+            if hospital_index is None:
+                return jsonify({"error": "Offline hospital search is disabled (HOSPITAL_DATA is empty)."}), 400
+            return jsonify(nearest_hospitals(data, hospital_index))
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
     location = data.get("location", "India")
     try:
         url = get_hospital_map_url(location)
@@ -174,32 +846,35 @@ def find_hospitals_route():
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
-@app.route("/chat", methods=["POST"])
+def chat_reply(message, location="India"):
+    """Returns the chat assistant's reply to a message."""
+    intent, phrases = chat_router.route(message)
+    if intent == chat_router.SYMPTOM_INTENT:
+        # Only the symptom phrases found are classified, not every word
+        risk = classify_risk([knowledge_base.canonical_name(phrase) for phrase in phrases])
+        return f"Based on your symptoms, your risk is: {risk.upper()}."
+    elif intent == "report":
+        return "Your report is ready. You can download it from the main page."
+    elif intent == "hospital":
+        url = get_hospital_map_url(location)
+        return f"You can find nearby hospitals here: {url}"
+    elif intent == "water":
+        return "Please drink a glass of water. Hydration is important!"
+    elif intent == "medicine":
+        return "Make sure to take your prescribed medicine on time."
+    else:
+        return "I'm your health assistant. Describe your symptoms or ask for a report/hospital/reminder."
+
+@bp.route("/chat", methods=["POST"])
 def chatbot_route():
-    user_message = request.json.get("message", "").lower()
+    user_message = request.json.get("message", "")
     location = request.json.get("location", "India")
-    response = ""
     try:
-        if any(symptom in user_message for symptom in ["fever", "cough", "headache", "pain"]):
-            symptoms = user_message.split()
-            risk = classify_risk(symptoms)
-            response = f"Based on your symptoms, your risk is: {risk.upper()}."
-        elif "report" in user_message:
-            response = "Your report is ready. You can download it from the main page."
-        elif "hospital" in user_message or "nearby" in user_message:
-            url = get_hospital_map_url(location)
-            response = f"You can find nearby hospitals here: {url}"
-        elif "water" in user_message:
-            response = "Please drink a glass of water. Hydration is important!"
-        elif "medicine" in user_message:
-            response = "Make sure to take your prescribed medicine on time."
-        else:
-            response = "I'm your health assistant. Describe your symptoms or ask for a report/hospital/reminder."
-        return jsonify({"response": response})
+        return jsonify({"response": chat_reply(user_message, location)})
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
-@app.route("/set_reminder", methods=["POST"])
+@bp.route("/set_reminder", methods=["POST"])
 def set_reminder():
     data = request.json
     medicines = data.get("medicines", [])
@@ -207,51 +882,348 @@ def set_reminder():
     if not isinstance(medicines, list) or not medicines:
         return jsonify({"error": "Provide a list of medicines with name and time."}), 400
 
-    added = []
-    with reminder_lock:
-        for med in medicines:
-            name = med.get("name")
-            time_str = med.get("time")
-            if not name or not time_str:
-                continue
-            if not validate_time_format(time_str):
-                continue
-            reminders.append({
-                "message": f"It's time to take your medicine: {name}",
-                "time": time_str,
-                "notified": False
-            })
-            added.append(f"{name} at {time_str}")
+    user = data.get("user") or DEFAULT_REMINDER_USER
+    valid = []
+    for med in medicines:
+        name = med.get("name")
+        time_str = med.get("time")
+        recurrence = med.get("recurrence", data.get("recurrence", "daily"))
+        if not name or not time_str:
+            continue
+        if not validate_time_format(time_str):
+            continue
+        if recurrence not in RECURRENCES:
+            continue
+        valid.append((name, time_str, recurrence))
+
+    # One transaction for the whole list
+    added = [f"{r.name} at {r.time}" for r in get_reminder_store().add_many(user, valid)] if valid else []
 
     if not added:
         return jsonify({"error": "No valid reminders added."}), 400
 
     return jsonify({"status": f"Reminders set for: {', '.join(added)}"})
 
-@app.route("/get_reminders", methods=["GET"])
+@bp.route("/get_reminders", methods=["GET"])
 def get_reminders():
-    now = datetime.now().strftime("%H:%M")
-    due = []
-    with reminder_lock:
-        for r in reminders:
-            if r["time"] == now and not r["notified"]:
-                due.append(r["message"])
-                r["notified"] = True
-    return jsonify({"reminders": due})
+    user = request.args.get("user") or DEFAULT_REMINDER_USER
+    return jsonify({"reminders": get_reminder_store().collect_due(user)})
+
+# Seconds between keep-alive comments on an idle event stream, and the
+# longest a long-poll request is held open
+REMINDER_HEARTBEAT_SECONDS = 15
+REMINDER_LONG_POLL_SECONDS = 25
+# An event stream is closed after this long and the browser reconnects
+# (after the "retry" delay), so no connection holds a worker indefinitely
+REMINDER_STREAM_MAX_SECONDS = 300
+
+def sse_event(message):
+    return f"event: reminder\ndata: {json.dumps({'message': message})}\n\n"
+
+@bp.route("/reminders/stream", methods=["GET"])
+def reminder_stream():
+    """
+    Pushes a user's reminders as they fire.
+
+    Clients sending "Accept: text/event-stream" get a Server-Sent Events
+    stream of "reminder" events, closed after REMINDER_STREAM_MAX_SECONDS
+    for EventSource to reconnect; reminders fired in between are sent on
+    the new stream. Any other client gets a long-poll: the
+    request is held until a reminder fires (or ?timeout= seconds, at most
+    REMINDER_LONG_POLL_SECONDS, pass) and answered like /get_reminders.
+    """
+    user = request.args.get("user") or DEFAULT_REMINDER_USER
+    reminder_store = get_reminder_store()
+
+    if "text/event-stream" in request.headers.get("Accept", ""):
+        def generate():
+            subscription, backlog = reminder_store.subscribe(user)
+            deadline = time.monotonic() + REMINDER_STREAM_MAX_SECONDS
+            try:
+                yield f"retry: {REMINDER_HEARTBEAT_SECONDS * 1000}\n\n"
+                for message in backlog:
+                    yield sse_event(message)
+                while (remaining := deadline - time.monotonic()) > 0:
+                    try:
+                        message = subscription.get(timeout=min(REMINDER_HEARTBEAT_SECONDS, remaining))
+                    except queue.Empty:
+                        # Also how a closed connection is noticed
+                        yield ": keep-alive\n\n"
+                        continue
+                    yield sse_event(message)
+            finally:
+                reminder_store.unsubscribe(user, subscription)
+
+        return Response(stream_with_context(generate()), mimetype="text/event-stream",
+                        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+    try:
+        timeout = min(float(request.args.get("timeout", REMINDER_LONG_POLL_SECONDS)), REMINDER_LONG_POLL_SECONDS)
+    except ValueError:
+        return jsonify({"error": "timeout must be a number of seconds."}), 400
+
+    subscription, reminders = reminder_store.subscribe(user)
+    try:
+        if not reminders and timeout > 0:
+            try:
+                reminders.append(subscription.get(timeout=timeout))
+            except queue.Empty:
+                pass
+    finally:
+        reminder_store.unsubscribe(user, subscription)
+    # Nothing is pushed after unsubscribing; take whatever else arrived
+    while True:
+        try:
+            reminders.append(subscription.get_nowait())
+        except queue.Empty:
+            break
+    return jsonify({"reminders": reminders})
 
 # -------------------- SCHEDULER --------------------
-def send_reminder():
-    now = datetime.now().strftime("%H:%M")
-    with reminder_lock:
-        for r in reminders:
-            if r["time"] == now and not r["notified"]:
-                print(f"\U0001F514 Reminder: {r['message']} (Time: {now})")
-                r["notified"] = True
-
-scheduler = BackgroundScheduler()
-scheduler.add_job(func=send_reminder, trigger="interval", seconds=60)
-scheduler.start()
+def send_reminder(reminder, fire_at):
+    print(f"\U0001F514 Reminder for {reminder.user}: {reminder.message} (Time: {reminder.time})")
+
+def reminder_db_path(config, instance_path):
+    return config.get("REMINDER_DB") or os.path.join(instance_path, "reminders.db")
+
+def create_reminder_store(config, instance_path):
+    """
+    Builds the reminder backend for an app's config. Reminders survive
+    restarts in REMINDER_DB (default <instance folder>/reminders.db). With
+    REMINDER_SCHEDULER="service" a separate `python run.py --scheduler`
+    process fires them and this worker only shares its database;
+    otherwise this process fires them itself, which is only right with a
+    single worker.
+    """
+    from logic.reminder_db import ReminderDatabase
+
+    path = reminder_db_path(config, instance_path)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    if config["REMINDER_SCHEDULER"] == "service":
+        from logic.reminder_service import ReminderClient
+        return ReminderClient(ReminderDatabase(path))
+    from logic.reminders import ReminderStore
+    return ReminderStore(on_fire=send_reminder, db=ReminderDatabase(path))
+
+_reminder_store_lock = threading.Lock()
+
+def get_reminder_store(app=None):
+    """Returns the app's (default: current app's) reminder store, starting it on first use."""
+    app = app or current_app._get_current_object()
+    store = app.extensions.get("reminder_store")
+    if store is None:
+        with _reminder_store_lock:
+            store = app.extensions.get("reminder_store")
+            if store is None:
+                store = create_reminder_store(app.config, app.instance_path)
+                store.start()
+                app.extensions["reminder_store"] = store
+    return store
+
+def start_reminders(app, reloader=False):
+    """
+    Starts the app's reminder scheduler now, so reminders set before a
+    restart fire without waiting for a reminder route. For the development
+    server: with its debug reloader, Flask also runs the app in a
+    file-watching process that never serves requests, and that process
+    must not fire reminders.
+    """
+    if not reloader or os.environ.get("WERKZEUG_RUN_MAIN") == "true":
+        get_reminder_store(app)
+
+# -------------------- METRICS --------------------
+@bp.before_app_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+    metrics.request_started()
+
+@bp.after_app_request
+def record_request_metrics(response):
+    """
+    Records the request's latency, status and size. Streamed responses
+    are timed to when the response is returned, and their size only when
+    they declare a Content-Length.
+    """
+    started = g.get("request_started")
+    if started is not None:
+        route = request.url_rule.rule if request.url_rule else "unmatched"
+        metrics.record_request(route, request.method, response.status_code, time.perf_counter() - started,
+                               response.content_length)
+    return response
+
+@bp.teardown_app_request
+def finish_request(error=None):
+    # Runs once a streamed response has been sent in full
+    if g.pop("request_started", None) is not None:
+        metrics.request_finished()
+
+@bp.route("/metrics", methods=["GET"])
+def metrics_route():
+    return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
+
+# -------------------- PROFILING (ADMIN) --------------------
+def profile_number(data, name, default, cast, low, high):
+    """Reads a numeric profiling option, raising ValueError if it is out of range."""
+    value = cast(data.get(name, default))
+    if not low <= value <= high:
+        raise ValueError(f"{name} must be between {low} and {high}.")
+    return value
+
+def collapsed_stacks_response(sampler):
+    response = Response(sampler.collapsed(), mimetype="text/plain")
+    response.headers["Content-Disposition"] = f"attachment; filename=profile-{int(time.time())}.folded"
+    response.headers["X-Profile-Samples"] = str(sampler.samples)
+    return response
+
+_profile_lock = threading.Lock()
+
+@bp.route("/admin/profile", methods=["POST"])
+@admin_required
+def profile_route():
+    """
+    Samples every thread of this worker for `seconds` and returns the
+    stacks in collapsed (flamegraph) form.
+    """
+    data = request.get_json(silent=True) or {}
+    try:
+        seconds = profile_number(data, "seconds", 10, float, 0.1, profiler.MAX_PROFILE_SECONDS)
+        interval_ms = profile_number(data, "interval_ms", 10, float, 1, 1000)
+    except (TypeError, ValueError) as e:
+        return jsonify({"error": str(e)}), 400
+    if not _profile_lock.acquire(blocking=False):
+        return jsonify({"error": "A profile is already running in this worker."}), 409
+    try:
+        sampler = profiler.profile(seconds, interval_ms / 1000, ignored=[threading.get_ident()])
+    finally:
+        _profile_lock.release()
+    return collapsed_stacks_response(sampler)
+
+@bp.route("/admin/profile/route", methods=["POST"])
+@admin_required
+def start_route_profile_route():
+    """Starts sampling every Nth request to a route, for up to `requests` requests."""
+    data = request.get_json(silent=True) or {}
+    route = data.get("route")
+    if route not in {rule.rule for rule in current_app.url_map.iter_rules()}:
+        return jsonify({"error": "route must be one of the app's routes, e.g. /generate-report."}), 400
+    try:
+        every = profile_number(data, "every", 1, int, 1, 1_000_000)
+        max_requests = profile_number(data, "requests", 100, int, 1, 100_000)
+        interval_ms = profile_number(data, "interval_ms", 10, float, 1, 1000)
+    except (TypeError, ValueError) as e:
+        return jsonify({"error": str(e)}), 400
+
+    route_profile = profiler.RouteProfile(route, every, max_requests, interval_ms / 1000)
+    if current_app.extensions.setdefault("route_profile", route_profile) is not route_profile:
+        return jsonify({"error": "A route profile is already running; DELETE it first."}), 409
+    route_profile.sampler.start()
+    return jsonify(route_profile.status()), 202
+
+@bp.route("/admin/profile/route", methods=["GET", "DELETE"])
+@admin_required
+def route_profile_route():
+    """
+    GET returns the collapsed stacks sampled so far; DELETE stops the
+    route profile and returns them.
+    """
+    if request.method == "DELETE":
+        route_profile = current_app.extensions.pop("route_profile", None)
+    else:
+        route_profile = current_app.extensions.get("route_profile")
+    if route_profile is None:
+        return jsonify({"error": "No route profile is running."}), 404
+    if request.method == "DELETE":
+        route_profile.sampler.stop()
+    response = collapsed_stacks_response(route_profile.sampler)
+    response.headers["X-Profiled-Requests"] = str(route_profile.profiled)
+    return response
+
+@bp.before_app_request
+def enter_route_profile():
+    # Only a dict lookup unless a route profile is running
+    route_profile = current_app.extensions.get("route_profile")
+    if route_profile is not None and request.url_rule is not None and route_profile.enter(request.url_rule.rule):
+        g.route_profile = route_profile
+
+@bp.teardown_app_request
+def exit_route_profile(error=None):
+    route_profile = g.pop("route_profile", None)
+    if route_profile is not None:
+        route_profile.exit()
+
+# -------------------- APP FACTORY --------------------
+DEFAULT_CONFIG = {
+    # Reminder database; defaults to <instance folder>/reminders.db
+    "REMINDER_DB": os.environ.get("REMINDER_DB"),
+    # "local" (this process fires reminders) or "service" (run.py --scheduler does)
+    "REMINDER_SCHEDULER": os.environ.get("REMINDER_SCHEDULER", "local"),
+    # In "local" mode, start the scheduler in create_app when REMINDER_DB
+    # already holds reminders, so they fire after a restart without
+    # waiting for a reminder request
+    "REMINDER_AUTOSTART": os.environ.get("REMINDER_AUTOSTART", "1") != "0",
+    # Bearer token for the /admin routes; they are disabled without one
+    "ADMIN_TOKEN": os.environ.get("ADMIN_TOKEN"),
+    # Hospital dataset (.csv, .geojson or .npz) for /find-hospitals by
+    # lat/lon; defaults to a small bundled sample, and "" turns it off
+    "HOSPITAL_DATA": os.environ.get("HOSPITAL_DATA"),
+    # Patient history database; defaults to <instance folder>/history.db,
+    # and "" turns history off
+    "HISTORY_DB": os.environ.get("HISTORY_DB"),
+    # Memory budget of the rendered-report cache, in bytes
+    "REPORT_CACHE_BYTES": int(os.environ.get("REPORT_CACHE_BYTES", 32 * 1024 * 1024)),
+    # Directory for a second, on-disk report cache tier (off by default),
+    # and how long its reports are kept, in seconds
+    "REPORT_CACHE_DIR": os.environ.get("REPORT_CACHE_DIR"),
+    "REPORT_CACHE_TTL": int(os.environ.get("REPORT_CACHE_TTL", 3600)),
+    # Subsystems to load in create_app rather than on first use: any of
+    # "pdf", "numpy", "knowledge_base", "reminders", "hospitals" and "history"
+    "PRELOAD": (),
+}
+
+def preload(app, subsystems):
+    """Loads the named subsystems now instead of on first use."""
+    for name in subsystems:
+        if name == "pdf":
+            import logic.pdf_generator
+        elif name == "numpy":
+            import numpy
+        elif name == "knowledge_base":
+            knowledge_base.load()
+        elif name == "reminders":
+            get_reminder_store(app)
+        elif name == "hospitals":
+            get_hospital_index(app)
+        elif name == "history":
+            get_patient_history(app)
+        else:
+            raise ValueError(f"Unknown subsystem to preload: {name}")
+
+def create_app(config=None):
+    """
+    Creates the Flask app.
+    Args:
+        config: Mapping of config values overriding DEFAULT_CONFIG
+    Returns:
+        The app, with the subsystems in its PRELOAD config loaded and,
+        with REMINDER_AUTOSTART, its saved reminders scheduled
+    """
+    app = Flask(__name__)
+    app.config.update(DEFAULT_CONFIG)
+    app.config.update(config or {})
+    CORS(app)
+    app.register_blueprint(bp)
+    app.extensions["report_cache"] = create_report_cache(app.config)
+    preload(app, app.config["PRELOAD"])
+    if (app.config["REMINDER_AUTOSTART"] and app.config["REMINDER_SCHEDULER"] == "local"
+            and os.path.exists(reminder_db_path(app.config, app.instance_path))):
+        get_reminder_store(app)
+    return app
+
+# `python app.py` starts the scheduler below instead, in the debug
+# reloader's serving process only
+app = create_app({"REMINDER_AUTOSTART": False} if __name__ == "__main__" else None)
 
 # -------------------- RUN APP --------------------
 if __name__ == "__main__":
+    start_reminders(app, reloader=True)
     app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
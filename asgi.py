@@ -0,0 +1,448 @@
+#!/usr/bin/env python3
+"""
+ASGI variant of the Health Check App
+
+Serves the same routes and JSON contracts as app.py. The routes that hold
+a connection open or do heavy work run as coroutines here: chat, hospital
+search, the one-shot assessment, report generation and downloads, batch
+risk classification, bulk diagnosis and the reminder stream. CPU-bound
+work (generate_pdf, classify_risk_batch) runs in a process pool, so it
+never blocks the event loop. Every other route is passed to the Flask app
+through a WSGI bridge.
+
+Usage:
+    python asgi.py
+    uvicorn asgi:app --host 0.0.0.0 --port 5000
+"""
+
+import asyncio
+import base64
+import functools
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import asynccontextmanager
+
+from a2wsgi import WSGIMiddleware
+from starlette.applications import Starlette
+from starlette.exceptions import HTTPException
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.requests import ClientDisconnect
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from starlette.routing import Mount, Route, request_response
+
+from app import (ASSESS_REPORT_OPTIONS, DEFAULT_REMINDER_USER, DIAGNOSE_STREAM_CHUNK_SIZE, REMINDER_HEARTBEAT_SECONDS,
+                 REMINDER_LONG_POLL_SECONDS, REMINDER_STREAM_MAX_SECONDS, RISK_BATCH_CHUNK_SIZE, add_trends, assess,
+                 chat_reply, format_diagnosis, format_risk_results, get_hospital_index, get_reminder_store,
+                 get_report_cache, nearest_hospitals, parse_ndjson_line, parse_risk_record, report_cache_key,
+                 report_history, sse_event)
+from app import app as flask_app
+from logic import knowledge_base, metrics, report_jobs
+from logic.hospital_finder import get_hospital_map_url
+from logic.risk_classifier import classify_risk_batch
+
+# Worker processes for CPU-bound work
+CPU_WORKERS = int(os.environ.get("ASGI_CPU_WORKERS", os.cpu_count() or 1))
+
+REPORT_HEADERS = {"Content-Disposition": "attachment; filename=comprehensive_health_report.pdf"}
+
+
+class AsyncSubscription:
+    """A reminder subscription that hands messages to an asyncio queue."""
+
+    def __init__(self, loop):
+        self._loop = loop
+        self.queue = asyncio.Queue()
+
+    def put(self, message):
+        # Called from the scheduler (or delivery polling) thread
+        self._loop.call_soon_threadsafe(self.queue.put_nowait, message)
+
+
+class DuplexStreamingResponse(StreamingResponse):
+    """
+    A streaming response whose body is produced while the request body is
+    still being read. StreamingResponse would consume the request body
+    while waiting for a disconnect; here a disconnect instead surfaces as
+    ClientDisconnect from request.stream().
+    """
+
+    async def __call__(self, scope, receive, send):
+        await self.stream_response(send)
+
+
+class RouteMetrics:
+    """
+    Wraps a route's ASGI app to record its requests, as app.py's request
+    hooks do for the routes served by Flask. Latency is measured to the
+    start of the response.
+    """
+
+    def __init__(self, route, app):
+        self.route = route
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        started = time.perf_counter()
+        recorded = False
+
+        async def send_and_record(message):
+            nonlocal recorded
+            if message["type"] == "http.response.start":
+                recorded = True
+                size = dict(message.get("headers", ())).get(b"content-length")
+                metrics.record_request(self.route, scope["method"], message["status"], time.perf_counter() - started,
+                                       int(size) if size else None)
+            await send(message)
+
+        metrics.request_started()
+        try:
+            await self.app(scope, receive, send_and_record)
+        except Exception:
+            if not recorded:
+                metrics.record_request(self.route, scope["method"], 500, time.perf_counter() - started, error=True)
+            raise
+        finally:
+            metrics.request_finished()
+
+
+def timed_route(path, endpoint, methods):
+    return Route(path, RouteMetrics(path, request_response(endpoint)), methods=methods)
+
+
+async def run_cpu_bound(request, func, *args, **kwargs):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(request.app.state.cpu_executor, functools.partial(func, *args, **kwargs))
+
+
+def is_json(request):
+    """Same test as Flask's request.is_json: an application/json or application/*+json body."""
+    mimetype = request.headers.get("content-type", "").split(";", 1)[0].strip().lower()
+    return mimetype == "application/json" or (mimetype.startswith("application/") and mimetype.endswith("+json"))
+
+
+async def read_json(request, silent=False):
+    """
+    Returns the request's JSON body as Flask's request.get_json() does:
+    raises HTTPException 415 if its Content-Type isn't JSON and 400 if it
+    doesn't parse, or with silent returns None for either.
+    """
+    if not is_json(request):
+        if silent:
+            return None
+        raise HTTPException(415, "Did not attempt to load JSON data because the request Content-Type was not "
+                                 "'application/json'.")
+    try:
+        return await request.json()
+    except ValueError as e:
+        if silent:
+            return None
+        raise HTTPException(400, f"Failed to decode JSON object: {e}")
+
+
+async def json_error(request, exc):
+    """Answers HTTP errors in JSON, as app.json_error does for Flask."""
+    return JSONResponse({"error": exc.detail}, status_code=exc.status_code, headers=exc.headers)
+
+
+async def aiter_ndjson(request):
+    """
+    Async counterpart of app.iter_ndjson for a request body. Yields
+    (line_number, record, error); raises ClientDisconnect if the client
+    goes away mid-body.
+    """
+    line_number = 0
+    buffer = b""
+    async for chunk in request.stream():
+        *lines, buffer = (buffer + chunk).split(b"\n")
+        for line in lines:
+            line_number += 1
+            parsed = parse_ndjson_line(line)
+            if parsed is not None:
+                yield (line_number, *parsed)
+    parsed = parse_ndjson_line(buffer)
+    if parsed is not None:
+        yield (line_number + 1, *parsed)
+
+
+def etag_matches(if_none_match, etag):
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in tags or any(tag.removeprefix("W/").strip('"') == etag for tag in tags)
+
+
+async def chat(request):
+    data = await read_json(request) or {}
+    try:
+        return JSONResponse({"response": chat_reply(data.get("message", ""), data.get("location", "India"))})
+    except Exception as e:
+        return JSONResponse({"error": str(e)}, status_code=500)
+
+
+async def find_hospitals(request):
+    data = await read_json(request) or {}
+    if "lat" in data or "lon" in data:
+        # Loaded at startup, so this only looks it up
+        hospital_index = get_hospital_index(flask_app)
+        if hospital_index is None:
+            return JSONResponse({"error": "Offline hospital search is disabled (HOSPITAL_DATA is empty)."},
+                                status_code=400)
+        try:
+            return JSONResponse(nearest_hospitals(data, hospital_index))
+        except ValueError as e:
+            return JSONResponse({"error": str(e)}, status_code=400)
+    try:
+        return JSONResponse({"map_url": get_hospital_map_url(data.get("location", "India"))})
+    except Exception as e:
+        return JSONResponse({"error": str(e)}, status_code=500)
+
+
+async def generate_report(request):
+    data = await read_json(request)
+    if not data:
+        return JSONResponse({"error": "No data provided"}, status_code=400)
+    try:
+        from logic.pdf_generator import generate_pdf, report_kwargs
+        kwargs = report_kwargs(data)
+        report_cache = get_report_cache(flask_app)
+        cache_key = report_cache_key(data, kwargs, flask_app)
+        etag = {"ETag": f'"{cache_key}"'}
+        if etag_matches(request.headers.get("if-none-match", ""), cache_key):
+            return Response(status_code=304, headers=etag)
+
+        pdf_bytes = report_cache.get(cache_key)
+        if pdf_bytes is None:
+            record_history = report_history(data, kwargs, flask_app)
+            pdf_bytes = await run_cpu_bound(request, generate_pdf, as_bytes=True, **kwargs)
+            report_cache.put(cache_key, pdf_bytes)
+            if record_history is not None:
+                record_history()
+        return Response(pdf_bytes, media_type="application/pdf", headers={**REPORT_HEADERS, **etag})
+    except ImportError:
+        return JSONResponse({"error": "PDF library not available. Please install fpdf2: pip install fpdf2"},
+                            status_code=500)
+    except Exception as e:
+        flask_app.logger.exception("PDF generation failed")
+        return JSONResponse({"error": f"Failed to generate PDF: {str(e)}"}, status_code=500)
+
+
+async def assess_route(request):
+    """Same contract as app.assess_route; the PDF is rendered in the process pool."""
+    data = await read_json(request, silent=True)
+    if not isinstance(data, dict):
+        return JSONResponse({"error": "No data provided"}, status_code=400)
+    report = data.get("report")
+    if report not in ASSESS_REPORT_OPTIONS:
+        return JSONResponse({"error": "report must be one of: none, pdf, job."}, status_code=400)
+    try:
+        assessment, kwargs = assess(data, flask_app)
+    except ValueError as e:
+        return JSONResponse({"error": str(e)}, status_code=400)
+
+    if report == "pdf":
+        try:
+            from logic.pdf_generator import generate_pdf
+            report_cache = get_report_cache(flask_app)
+            cache_key = report_cache_key(data, kwargs, flask_app)
+            pdf_bytes = report_cache.get(cache_key)
+            if pdf_bytes is None:
+                add_trends(data, kwargs, flask_app)
+                pdf_bytes = await run_cpu_bound(request, generate_pdf, as_bytes=True, **kwargs)
+                report_cache.put(cache_key, pdf_bytes)
+        except ImportError:
+            return JSONResponse({"error": "PDF library not available. Please install fpdf2: pip install fpdf2"},
+                                status_code=500)
+        except Exception as e:
+            flask_app.logger.exception("PDF generation failed")
+            return JSONResponse({"error": f"Failed to generate PDF: {str(e)}"}, status_code=500)
+        assessment["report"] = {"filename": "comprehensive_health_report.pdf", "etag": cache_key,
+                                "pdf": base64.b64encode(pdf_bytes).decode("ascii")}
+    elif report == "job":
+        add_trends(data, kwargs, flask_app)
+        try:
+            job_id = report_jobs.submit(kwargs)
+            assessment["report"] = {"job_id": job_id, "status": "queued", "status_url": f"/reports/{job_id}"}
+        except (report_jobs.QueueFullError, report_jobs.WorkersUnavailableError) as e:
+            assessment["report"] = {"error": str(e), "retry_after": 5}
+    return JSONResponse(assessment)
+
+
+async def submit_report(request):
+    data = await read_json(request)
+    if not data:
+        return JSONResponse({"error": "No data provided"}, status_code=400)
+    from logic.pdf_generator import report_kwargs
+    kwargs = report_kwargs(data)
+    record_history = report_history(data, kwargs, flask_app)
+    try:
+        job_id = report_jobs.submit(kwargs)
+    except report_jobs.QueueFullError as e:
+        return JSONResponse({"error": str(e)}, status_code=429, headers={"Retry-After": "5"})
+    except report_jobs.WorkersUnavailableError as e:
+        flask_app.logger.exception("Report job not queued")
+        return JSONResponse({"error": str(e)}, status_code=503, headers={"Retry-After": "5"})
+    if record_history is not None:
+        record_history()
+    return JSONResponse({"job_id": job_id, "status": "queued", "status_url": f"/reports/{job_id}"},
+                        status_code=202)
+
+
+async def report_status(request):
+    job_id = request.path_params["job_id"]
+    job = report_jobs.status(job_id)
+    if job is None:
+        return JSONResponse({"error": "Unknown or expired report job."}, status_code=404)
+    if job["status"] == "failed":
+        return JSONResponse({"job_id": job_id, "status": "failed",
+                             "error": f"Failed to generate PDF: {job['error']}"}, status_code=500)
+    if job["status"] != "done":
+        return JSONResponse({"job_id": job_id, "status": job["status"]})
+    return Response(job["pdf"], media_type="application/pdf", headers=REPORT_HEADERS)
+
+
+async def classify_risk_batch_route(request):
+    # Plain JSON: {"symptom_lists": [[...], [...]]}
+    if is_json(request):
+        symptom_lists = ((await read_json(request)) or {}).get("symptom_lists")
+        if not isinstance(symptom_lists, list) or not all(isinstance(s, list) for s in symptom_lists):
+            return JSONResponse({"error": "symptom_lists must be a list of symptom lists."}, status_code=400)
+        try:
+            canonical = [[knowledge_base.canonical_name(s) for s in symptoms] for symptoms in symptom_lists]
+            return JSONResponse({"risks": await run_cpu_bound(request, classify_risk_batch, canonical)})
+        except Exception as e:
+            return JSONResponse({"error": str(e)}, status_code=500)
+
+    # NDJSON, as in app.py: results are streamed back per chunk of lines
+    async def generate():
+        pending = []
+
+        async def flush():
+            risks = await run_cpu_bound(
+                request, classify_risk_batch, [symptoms for _, symptoms, error in pending if error is None])
+            out = format_risk_results(pending, risks)
+            pending.clear()
+            return out
+
+        try:
+            async for parsed in aiter_ndjson(request):
+                pending.append(parse_risk_record(*parsed))
+                if len(pending) >= RISK_BATCH_CHUNK_SIZE:
+                    yield await flush()
+        except ClientDisconnect:
+            return
+        if pending:
+            yield await flush()
+
+    return DuplexStreamingResponse(generate(), media_type="application/x-ndjson")
+
+
+async def diagnose_stream(request):
+    """Same contract as app.diagnose_stream."""
+    async def generate():
+        lines = []
+        try:
+            async for parsed in aiter_ndjson(request):
+                lines.append(format_diagnosis(*parsed))
+                if len(lines) >= DIAGNOSE_STREAM_CHUNK_SIZE:
+                    yield "".join(lines)
+                    lines.clear()
+        except ClientDisconnect:
+            return
+        if lines:
+            yield "".join(lines)
+
+    return DuplexStreamingResponse(generate(), media_type="application/x-ndjson")
+
+
+async def reminder_stream(request):
+    """Same contract as app.reminder_stream, without a thread per connection."""
+    user = request.query_params.get("user") or DEFAULT_REMINDER_USER
+    reminder_store = get_reminder_store(flask_app)
+    subscription = AsyncSubscription(asyncio.get_running_loop())
+
+    if "text/event-stream" in request.headers.get("accept", ""):
+        async def events():
+            _, backlog = reminder_store.subscribe(user, subscription=subscription)
+            deadline = time.monotonic() + REMINDER_STREAM_MAX_SECONDS
+            try:
+                yield f"retry: {REMINDER_HEARTBEAT_SECONDS * 1000}\n\n"
+                for message in backlog:
+                    yield sse_event(message)
+                while (remaining := deadline - time.monotonic()) > 0:
+                    try:
+                        message = await asyncio.wait_for(subscription.queue.get(),
+                                                         min(REMINDER_HEARTBEAT_SECONDS, remaining))
+                    except asyncio.TimeoutError:
+                        yield ": keep-alive\n\n"
+                        continue
+                    yield sse_event(message)
+            finally:
+                reminder_store.unsubscribe(user, subscription)
+
+        return StreamingResponse(events(), media_type="text/event-stream",
+                                 headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+    try:
+        timeout = min(float(request.query_params.get("timeout", REMINDER_LONG_POLL_SECONDS)),
+                      REMINDER_LONG_POLL_SECONDS)
+    except ValueError:
+        return JSONResponse({"error": "timeout must be a number of seconds."}, status_code=400)
+
+    _, reminders = reminder_store.subscribe(user, subscription=subscription)
+    try:
+        if not reminders and timeout > 0:
+            try:
+                reminders.append(await asyncio.wait_for(subscription.queue.get(), timeout))
+            except asyncio.TimeoutError:
+                pass
+    finally:
+        reminder_store.unsubscribe(user, subscription)
+    # Let puts made before unsubscribing reach the queue, then take them
+    await asyncio.sleep(0)
+    while not subscription.queue.empty():
+        reminders.append(subscription.queue.get_nowait())
+    return JSONResponse({"reminders": reminders})
+
+
+@asynccontextmanager
+async def lifespan(app):
+    app.state.cpu_executor = ProcessPoolExecutor(max_workers=CPU_WORKERS)
+    get_reminder_store(flask_app)
+    get_hospital_index(flask_app)
+    try:
+        yield
+    finally:
+        app.state.cpu_executor.shutdown(cancel_futures=True)
+        report_jobs.shutdown()
+
+
+def create_app():
+    """
+    Builds the ASGI app; routes not defined here (including /metrics) are
+    served by the Flask app.
+    """
+    routes = [
+        timed_route("/chat", chat, methods=["POST"]),
+        timed_route("/find-hospitals", find_hospitals, methods=["POST"]),
+        timed_route("/generate-report", generate_report, methods=["POST"]),
+        timed_route("/assess", assess_route, methods=["POST"]),
+        timed_route("/reports", submit_report, methods=["POST"]),
+        timed_route("/reports/{job_id}", report_status, methods=["GET"]),
+        timed_route("/classify-risk/batch", classify_risk_batch_route, methods=["POST"]),
+        timed_route("/diagnose/stream", diagnose_stream, methods=["POST"]),
+        timed_route("/reminders/stream", reminder_stream, methods=["GET"]),
+        Mount("/", app=WSGIMiddleware(flask_app)),
+    ]
+    middleware = [Middleware(CORSMiddleware, allow_origins=["*"], allow_methods=["*"], allow_headers=["*"])]
+    return Starlette(routes=routes, middleware=middleware, exception_handlers={HTTPException: json_error},
+                     lifespan=lifespan)
+
+
+app = create_app()
+
+if __name__ == "__main__":
+    import uvicorn
+
+    print("🏥 Starting Health Check App (ASGI)...")
+    print("📱 Open http://localhost:5000 in your browser")
+    uvicorn.run(app, host="0.0.0.0", port=5000)
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for logic.bmi
+
+Checks that calculate_bmi_batch agrees with calculate_bmi record for record
+(including the category boundaries and invalid records), then times both
+on N random height/weight pairs (default 1,000,000), and parsing N rows of
+CSV the way POST /bmi/batch does.
+
+Usage:
+    python3 benchmarks/bench_bmi.py [N]
+"""
+
+import argparse
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from app import read_bmi_csv
+from logic.bmi import calculate_bmi, calculate_bmi_batch
+
+# Heights and weights that land exactly on, or just either side of, a
+# category boundary, plus invalid records
+EDGE_CASES = [(100, 18.5), (100, 18.49), (100, 24.9), (100, 24.95), (100, 24.99), (100, 25),
+              (100, 29.9), (100, 29.95), (100, 30), (170, 72.25), (170, 0), (0, 70), (-170, 70)]
+
+
+def check_equivalence(heights, weights):
+    values, categories = calculate_bmi_batch(heights, weights)
+    for i, (height, weight) in enumerate(zip(heights.tolist(), weights.tolist())):
+        value, category = calculate_bmi(height, weight)
+        if value is None:
+            assert np.isnan(values[i]) and categories[i] == "Invalid", (height, weight)
+        else:
+            assert (value, category) == (values[i], categories[i]), \
+                f"{height}, {weight}: {value} {category} != {values[i]} {categories[i]}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scalar vs. vectorized BMI")
+    parser.add_argument("records", nargs="?", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    heights = rng.uniform(120, 210, args.records).round(1)
+    weights = rng.uniform(30, 180, args.records).round(1)
+
+    edge_heights, edge_weights = (np.array(column, dtype=float) for column in zip(*EDGE_CASES))
+    check_equivalence(edge_heights, edge_weights)
+    check_equivalence(heights, weights)
+    print(f"✅ calculate_bmi_batch agrees with calculate_bmi on {args.records + len(EDGE_CASES):,} records")
+
+    pairs = list(zip(heights.tolist(), weights.tolist()))
+    scalar = min(timeit.repeat(lambda: [calculate_bmi(h, w) for h, w in pairs], number=1, repeat=3))
+    batch = min(timeit.repeat(lambda: calculate_bmi_batch(heights, weights), number=1, repeat=3))
+    print()
+    print(f"{args.records:,} records: scalar loop {scalar * 1000:.1f} ms, "
+          f"calculate_bmi_batch {batch * 1000:.1f} ms ({scalar / batch:.1f}x)")
+
+    csv_text = "name,height,weight\n" + "".join(f"p{i},{h},{w}\n" for i, (h, w) in enumerate(pairs))
+    parse = min(timeit.repeat(lambda: read_bmi_csv(csv_text), number=1, repeat=3))
+    print(f"{args.records:,} CSV rows ({len(csv_text) / 2 ** 20:.1f} MiB): parsed in {parse * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Benchmark for POST /generate-report/bulk
+
+Renders N patient reports (default 1,000, one in 50 malformed) as a clinic's
+end-of-day batch: one sequential /generate-report call per patient, then a
+single bulk request whose ZIP is streamed back. Reports total time, the
+time to the first byte of the archive, and the web process's peak memory
+(Python allocations) next to the size of the archive, then checks the
+archive holds every good patient's PDF and a manifest entry per line.
+
+Runs in-process through the Flask test client; the bulk request renders in
+the report worker pool, so its speedup grows with the cores available.
+
+Usage:
+    python3 benchmarks/bench_bulk_reports.py [N] [--workers W]
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+import zipfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app, get_report_cache
+from logic import report_jobs
+
+MALFORMED_EVERY = 50
+
+
+def payloads(count):
+    for i in range(count):
+        if i % MALFORMED_EVERY == MALFORMED_EVERY - 1:
+            yield {"name": f"Patient {i}", "vital_signs": "not an object"}
+            continue
+        yield {"name": f"Patient {i}", "age": str(20 + i % 60), "risk_level": ("Low", "Medium", "High")[i % 3],
+               "symptoms": ["Fever", "Cough", "Headache"][:1 + i % 3],
+               "bmi": {"value": 20 + i % 10, "category": "Normal"},
+               "vital_signs": {"blood_pressure": "120/80", "sugar_level": "95", "heart_rate": "72"}}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk report generation as a streamed ZIP")
+    parser.add_argument("patients", nargs="?", type=int, default=1000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    report_jobs.configure(max_workers=args.workers)
+    app = create_app({"HISTORY_DB": ""})
+    client = app.test_client()
+    patients = list(payloads(args.patients))
+    body = "".join(json.dumps(p) + "\n" for p in patients)
+    # Start the worker pool outside the timings
+    client.post("/generate-report/bulk", data=json.dumps(patients[0]) + "\n").get_data()
+    get_report_cache(app).clear()
+
+    started = time.perf_counter()
+    failed = 0
+    for patient in patients:
+        failed += client.post("/generate-report", json=patient).status_code != 200
+    sequential = time.perf_counter() - started
+
+    tracemalloc.start()
+    started = time.perf_counter()
+    response = client.post("/generate-report/bulk", data=body, headers={"Content-Type": "application/x-ndjson"},
+                           buffered=False)
+    # Saved to disk to check it below, so only the server side's memory is counted
+    archive = tempfile.TemporaryFile()
+    first_byte = None
+    for chunk in response.response:
+        if chunk and first_byte is None:
+            first_byte = time.perf_counter() - started
+        archive.write(chunk)
+    bulk = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(f"{args.patients} reports ({failed} malformed), {args.workers} workers:")
+    print(f"  sequential /generate-report   {sequential:>7.2f} s")
+    print(f"  /generate-report/bulk         {bulk:>7.2f} s (first byte after {first_byte * 1000:.0f} ms)")
+    print(f"  archive {archive.tell() / 2 ** 20:.1f} MiB, web process peak {peak / 2 ** 20:.1f} MiB while streaming it")
+
+    with zipfile.ZipFile(archive) as zf:
+        assert zf.testzip() is None
+        manifest = [json.loads(line) for line in zf.read("manifest.ndjson").splitlines()]
+        pdfs = [name for name in zf.namelist() if name.endswith(".pdf")]
+    assert [entry["line"] for entry in manifest] == list(range(1, args.patients + 1))
+    assert len(pdfs) == args.patients - failed == sum("file" in entry for entry in manifest)
+    print(f"✅ Archive holds {len(pdfs)} PDFs and {failed} manifest errors")
+    report_jobs.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Benchmark for logic.chat_router
+
+Measures messages/sec through the /chat reply logic: the original chain of
+substring checks (which classified every word of a symptom message) against
+the compiled intent router. Then routes the same messages through 10 to
+1,000 extra synthetic intents, with a chain of substring checks and with
+the router, to show the router's cost doesn't grow with the number of
+intents.
+
+Usage:
+    python3 benchmarks/bench_chat_router.py [N]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import chat_reply
+from logic import chat_router, knowledge_base
+from logic.risk_classifier import classify_risk
+
+INTENT_COUNTS = [10, 100, 1000]
+
+MESSAGES = [
+    "I have had a fever and a bad cough since yesterday, what should I do?",
+    "Sudden chest pain and shortness of breath when climbing stairs",
+    "Can you generate my health report please",
+    "Where is the nearest hospital? I need one nearby",
+    "How much water should I drink every day",
+    "I keep forgetting to take my medicine in the evening",
+    "Hello there, who are you?",
+    "My back pain got worse after lifting boxes, and now a headache too",
+    "Feeling sick and throwing up since lunch, also some dizziness",
+    "Thanks, that was helpful!",
+]
+
+
+def legacy_chat_reply(message, location="India"):
+    """The original implementation, kept here as the comparison baseline."""
+    user_message = message.lower()
+    if any(symptom in user_message for symptom in ["fever", "cough", "headache", "pain"]):
+        symptoms = user_message.split()
+        risk = classify_risk(symptoms)
+        return f"Based on your symptoms, your risk is: {risk.upper()}."
+    elif "report" in user_message:
+        return "Your report is ready. You can download it from the main page."
+    elif "hospital" in user_message or "nearby" in user_message:
+        return f"You can find nearby hospitals here: {location}"
+    elif "water" in user_message:
+        return "Please drink a glass of water. Hydration is important!"
+    elif "medicine" in user_message:
+        return "Make sure to take your prescribed medicine on time."
+    else:
+        return "I'm your health assistant. Describe your symptoms or ask for a report/hospital/reminder."
+
+
+def synthetic_intents(count, seed=5):
+    """count intents of 1-3 word keyword phrases, none of which occur in MESSAGES."""
+    rng = random.Random(seed)
+    words = [f"w{i}" for i in range(5000)]
+    return [chat_router.Intent(f"intent-{i}", [" ".join(rng.sample(words, rng.randint(1, 3))) for _ in range(10)],
+                               rng.randint(1, 5))
+            for i in range(count)]
+
+
+def keyword_chain(intents):
+    """Routes like the original chain of substring checks, one intent after another."""
+    keywords = [(intent.name, intent.keywords) for intent in intents]
+
+    def route(message):
+        message = message.lower()
+        for name, phrases in keywords:
+            if any(phrase in message for phrase in phrases):
+                return name
+        return None
+
+    return route
+
+
+def messages_per_second(func, messages, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for message in messages:
+            func(message)
+        best = min(best, time.perf_counter() - started)
+    return len(messages) / best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Messages/sec through the chat router")
+    parser.add_argument("messages", nargs="?", type=int, default=200_000)
+    args = parser.parse_args()
+
+    messages = [MESSAGES[i % len(MESSAGES)] for i in range(args.messages)]
+    # Load the symptom table and build the router outside the timings
+    knowledge_base.load()
+    chat_router.get_router()
+
+    print(f"{args.messages:,} messages:")
+    print(f"  original keyword chain  {messages_per_second(legacy_chat_reply, messages):>12,.0f} messages/s")
+    print(f"  compiled intent router  {messages_per_second(chat_reply, messages):>12,.0f} messages/s")
+    print()
+    print(f"{'intents':>10} {'keyword phrases':>16} {'chain (msg/s)':>14} {'router (msg/s)':>15}")
+    for count in INTENT_COUNTS:
+        router = chat_router.build_router(chat_router.CHAT_INTENTS + tuple(synthetic_intents(count)))
+        phrases = sum(len(intent.keywords) for intent in router.intents)
+        chain = messages_per_second(keyword_chain(router.intents), messages[:args.messages // 10], repeat=1)
+        print(f"{len(router.intents):>10} {phrases:>16,} {chain:>14,.0f} "
+              f"{messages_per_second(router.route, messages):>15,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Benchmark for POST /diagnose/stream
+
+Streams N patient records (default 1,000,000) as chunked NDJSON over one
+connection to the app running in its own server process, reading results
+while records are still being sent. Reports records/sec and the server's
+resident memory at the start, at its peak and at the end - flat memory
+means records are answered as they arrive instead of piling up.
+
+Usage:
+    python3 benchmarks/bench_diagnose_stream.py [N] [--server flask|asgi]
+"""
+
+import argparse
+import http.client
+import json
+import os
+import socket
+import tempfile
+import threading
+import time
+
+from load_test_asgi import SERVERS, free_port, start_server
+
+SYMPTOMS = ["Fever", "Cough", "Headache", "Sore Throat", "Fatigue", "Nausea", "Dizziness", "Back Pain"]
+
+# Records sent per chunk of the request body
+SEND_BATCH = 1000
+
+
+def rss_kib(pid):
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1])
+    return 0
+
+
+def send_records(sock, port, count):
+    sock.sendall((f"POST /diagnose/stream HTTP/1.1\r\nHost: 127.0.0.1:{port}\r\n"
+                  "Content-Type: application/x-ndjson\r\nTransfer-Encoding: chunked\r\n\r\n").encode())
+    for start in range(0, count, SEND_BATCH):
+        chunk = "".join(json.dumps({"id": i, "symptoms": [SYMPTOMS[i % 8], SYMPTOMS[(i * 3) % 8]]}) + "\n"
+                        for i in range(start, min(start + SEND_BATCH, count))).encode()
+        sock.sendall(f"{len(chunk):x}\r\n".encode() + chunk + b"\r\n")
+    sock.sendall(b"0\r\n\r\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Records/sec and server memory for /diagnose/stream")
+    parser.add_argument("records", nargs="?", type=int, default=1_000_000)
+    parser.add_argument("--server", choices=sorted(SERVERS), default="flask")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ, REMINDER_DB=os.path.join(tmp, "reminders.db"))
+        port = free_port()
+        process = start_server(args.server, port, env)
+        try:
+            memory = [rss_kib(process.pid)]
+            done = threading.Event()
+
+            def watch_memory():
+                while not done.wait(0.1):
+                    memory.append(rss_kib(process.pid))
+
+            watcher = threading.Thread(target=watch_memory, daemon=True)
+            watcher.start()
+
+            sock = socket.create_connection(("127.0.0.1", port))
+            started = time.perf_counter()
+            sender = threading.Thread(target=send_records, args=(sock, port, args.records), daemon=True)
+            sender.start()
+            response = http.client.HTTPResponse(sock, method="POST")
+            response.begin()
+            results = errors = 0
+            for line in response:
+                results += 1
+                if b'"error"' in line:
+                    errors += 1
+            elapsed = time.perf_counter() - started
+            sender.join()
+            sock.close()
+            done.set()
+            watcher.join()
+            memory.append(rss_kib(process.pid))
+        finally:
+            process.terminate()
+            process.wait()
+
+    print(f"{args.server}: {results:,} results ({errors:,} errors) for {args.records:,} records "
+          f"in {elapsed:.1f}s = {results / elapsed:,.0f} records/s")
+    print(f"server RSS: start {memory[0] / 1024:.1f} MiB, peak {max(memory) / 1024:.1f} MiB, "
+          f"end {memory[-1] / 1024:.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+Throughput and tail-latency suite for the API endpoints
+
+Drives /bmi, /diagnose, /classify-risk, /generate-report, /assess, /chat,
+/set_reminder and /get_reminders for a fixed time each, in two ways:
+
+  * in-process, through Flask's test client from N threads - the cost of
+    the app itself, with no network or server in the way;
+  * over real sockets, with N keep-alive connections against the app
+    running in its own server process (Werkzeug, or uvicorn with --server
+    asgi).
+
+Reports req/s and p50/p95/p99 latency per endpoint and writes them to a
+JSON file. With a baseline (a results file saved earlier with
+--save-baseline), every endpoint is compared against it and the run exits
+with status 1 if throughput drops or p99 latency grows by more than the
+tolerance. Baselines are only meaningful on the machine that recorded them.
+
+Usage:
+    python3 benchmarks/bench_endpoints.py [--mode inprocess|socket|both] [--concurrency N]
+        [--duration SECONDS] [--server flask|asgi] [--endpoint PATH ...]
+        [--output FILE] [--baseline FILE] [--save-baseline] [--tolerance FRACTION]
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import platform
+import resource
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+from load_test_asgi import SERVERS, free_port, percentile, run_load, start_server
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+DEFAULT_OUTPUT = os.path.join(RESULTS_DIR, "latest.json")
+DEFAULT_BASELINE = os.path.join(RESULTS_DIR, "baseline.json")
+
+sys.path.insert(0, ROOT)
+
+REPORT = {"name": "Benchmark", "age": "40", "gender": "Female", "height": "165", "weight": "60",
+          "symptoms": ["Fever", "Cough"], "mental_wellness": {"stress": "3", "sleep": "7", "mood": "Good"},
+          "vital_signs": {"blood_pressure": "120", "sugar_level": "90", "heart_rate": "72"}}
+
+# (name, method, path, payload for the i-th request). Payloads that vary
+# with i keep each request from being a repeat of the one before it.
+ENDPOINTS = [
+    ("/bmi", "POST", "/bmi", lambda i: {"height": 150 + i % 50, "weight": 50 + i % 40}),
+    ("/diagnose", "POST", "/diagnose", lambda i: {"symptoms": ["Fever", "Cough", "Headache"]}),
+    ("/classify-risk", "POST", "/classify-risk", lambda i: {"symptoms": ["Fever", "Cough"]}),
+    # A new patient every request, so every report is rendered
+    ("/generate-report", "POST", "/generate-report", lambda i: {**REPORT, "name": f"Patient {i}"}),
+    ("/generate-report (cached)", "POST", "/generate-report", lambda i: REPORT),
+    ("/assess", "POST", "/assess", lambda i: {**REPORT, "name": f"Patient {i}"}),
+    ("/chat", "POST", "/chat", lambda i: {"message": "I have a fever and a cough"}),
+    ("/set_reminder", "POST", "/set_reminder",
+     lambda i: {"user": f"bench-{i % 1000}", "medicines": [{"name": "Aspirin", "time": f"{i % 24:02d}:00"}]}),
+    ("/get_reminders", "GET", lambda i: f"/get_reminders?user=bench-{i % 1000}", None),
+]
+
+
+def endpoint_path(path, i):
+    return path(i) if callable(path) else path
+
+
+def summarize(requests, failures, elapsed, latencies):
+    latencies = sorted(latencies)
+    return {
+        "requests": requests,
+        "errors": failures,
+        "rps": round(requests / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+    }
+
+
+def run_inprocess(app, method, path, payload, concurrency, duration):
+    counter = itertools.count()
+    latencies, failures = [], [0]
+    lock = threading.Lock()
+    start = threading.Barrier(concurrency + 1)
+    deadline = [0.0]
+
+    def client():
+        test_client = app.test_client()
+        done, failed = [], 0
+        start.wait()
+        while time.perf_counter() < deadline[0]:
+            i = next(counter)
+            sent = time.perf_counter()
+            response = test_client.open(endpoint_path(path, i), method=method,
+                                        json=payload(i) if payload else None)
+            if response.status_code == 200:
+                done.append(time.perf_counter() - sent)
+            else:
+                failed += 1
+        with lock:
+            latencies.extend(done)
+            failures[0] += failed
+
+    threads = [threading.Thread(target=client, daemon=True) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    deadline[0] = time.perf_counter() + duration
+    started = time.perf_counter()
+    start.wait()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    return summarize(len(latencies), failures[0], elapsed, latencies)
+
+
+def build_request(port, method, path, payload):
+    body = json.dumps(payload).encode() if payload is not None else b""
+    head = f"{method} {path} HTTP/1.1\r\nHost: 127.0.0.1:{port}\r\n"
+    if payload is not None:
+        head += f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n"
+    return (head + "\r\n").encode() + body
+
+
+def run_socket(port, method, path, payload, concurrency, duration):
+    def make_request(i):
+        return build_request(port, method, endpoint_path(path, i), payload(i) if payload else None)
+
+    rps, latencies, failures = asyncio.run(run_load(port, make_request, concurrency, duration))
+    return summarize(len(latencies), failures, len(latencies) / rps if rps else duration, latencies)
+
+
+def run_suite(mode, endpoints, args, env):
+    results = {}
+    if mode == "inprocess":
+        from app import create_app
+
+        app = create_app({"REMINDER_DB": env["REMINDER_DB"]})
+        for name, method, path, payload in endpoints:
+            # Warm up caches, lazy imports and the reminder store
+            run_inprocess(app, method, path, payload, 1, 0.2)
+            results[name] = run_inprocess(app, method, path, payload, args.concurrency, args.duration)
+            print_row(mode, name, results[name])
+        return results
+
+    port = free_port()
+    process = start_server(args.server, port, env)
+    try:
+        for name, method, path, payload in endpoints:
+            run_socket(port, method, path, payload, 1, 0.2)
+            results[name] = run_socket(port, method, path, payload, args.concurrency, args.duration)
+            print_row(mode, name, results[name])
+    finally:
+        process.terminate()
+        process.wait()
+    return results
+
+
+def print_row(mode, name, result):
+    print(f"{mode:>9} {name:>26} {result['rps']:>9.0f} {result['p50_ms']:>8.1f} {result['p95_ms']:>8.1f} "
+          f"{result['p99_ms']:>8.1f} {result['errors']:>7}")
+
+
+def compare(results, baseline, tolerance):
+    """Prints the change against the baseline; returns the regressed (mode, endpoint) pairs."""
+    regressions = []
+    print(f"\nAgainst baseline from {baseline['meta']['timestamp']} (tolerance {tolerance:.0%}):")
+    print(f"{'mode':>9} {'endpoint':>26} {'req/s':>9} {'p99':>9}")
+    for mode, endpoints in results.items():
+        for name, result in endpoints.items():
+            before = baseline["results"].get(mode, {}).get(name)
+            if not before or not before["rps"]:
+                continue
+            rps_change = result["rps"] / before["rps"] - 1
+            p99_change = result["p99_ms"] / before["p99_ms"] - 1 if before["p99_ms"] else 0.0
+            regressed = rps_change < -tolerance or p99_change > tolerance
+            if regressed:
+                regressions.append((mode, name))
+            print(f"{mode:>9} {name:>26} {rps_change:>+9.1%} {p99_change:>+9.1%}"
+                  f"{'  REGRESSION' if regressed else ''}")
+    return regressions
+
+
+def write_json(path, data):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+        f.write("\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Req/s and p50/p95/p99 latency for every API endpoint")
+    parser.add_argument("--mode", choices=["inprocess", "socket", "both"], default="both")
+    parser.add_argument("--concurrency", type=int, default=16,
+                        help="client threads (in-process) or connections (socket), default 16")
+    parser.add_argument("--duration", type=float, default=5.0, help="seconds per endpoint (default 5)")
+    parser.add_argument("--server", choices=sorted(SERVERS), default="flask",
+                        help="server for socket mode (default flask)")
+    parser.add_argument("--endpoint", action="append", help="only run this endpoint (repeatable)")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="results file (default benchmarks/results/latest.json)")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE,
+                        help="baseline to compare against (default benchmarks/results/baseline.json)")
+    parser.add_argument("--save-baseline", action="store_true", help="also save the results as the baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="allowed drop in req/s or rise in p99 before failing (default 0.2)")
+    args = parser.parse_args()
+
+    endpoints = [e for e in ENDPOINTS if not args.endpoint or e[0] in args.endpoint]
+    if not endpoints:
+        parser.error(f"no such endpoint; choose from {', '.join(e[0] for e in ENDPOINTS)}")
+    modes = ["inprocess", "socket"] if args.mode == "both" else [args.mode]
+
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (min(hard, max(soft, args.concurrency * 2 + 256)), hard))
+
+    print(f"concurrency {args.concurrency}, {args.duration:.0f}s per endpoint")
+    print(f"{'mode':>9} {'endpoint':>26} {'req/s':>9} {'p50 (ms)':>8} {'p95 (ms)':>8} {'p99 (ms)':>8} {'errors':>7}")
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ, REMINDER_DB=os.path.join(tmp, "reminders.db"))
+        for mode in modes:
+            results[mode] = run_suite(mode, endpoints, args, env)
+
+    run = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "concurrency": args.concurrency,
+            "duration": args.duration,
+            "server": args.server,
+        },
+        "results": results,
+    }
+    write_json(args.output, run)
+    print(f"\nResults written to {os.path.relpath(args.output)}")
+
+    regressions = []
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+    if args.save_baseline:
+        write_json(args.baseline, run)
+        print(f"Baseline saved to {os.path.relpath(args.baseline)}")
+
+    if regressions:
+        print(f"FAIL: {len(regressions)} endpoint(s) regressed past the baseline")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
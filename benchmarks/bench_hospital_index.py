@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Benchmark for logic.hospital_index
+
+Builds the offline hospital index from 100,000 and 1,000,000 synthetic
+facilities (clustered around cities, as real ones are), checks its answers
+against a scan of every facility, and reports build and .npz load time,
+the index's memory and k-nearest query latency (p50/p99) next to the scan.
+
+Usage:
+    python3 benchmarks/bench_hospital_index.py [--sizes N [N ...]] [--queries N] [-k K]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from logic.hospital_index import HospitalIndex, haversine_km, load_hospitals
+
+# Roughly India: most facilities sit around a few hundred "cities", the
+# rest are spread over the whole area
+LAT_RANGE = (8.0, 35.0)
+LON_RANGE = (68.0, 97.0)
+CITIES = 300
+
+
+def synthetic_hospitals(count, rng):
+    cities = np.column_stack([rng.uniform(*LAT_RANGE, CITIES), rng.uniform(*LON_RANGE, CITIES)])
+    clustered = count * 4 // 5
+    around = cities[rng.integers(0, CITIES, clustered)] + rng.normal(0, 0.15, (clustered, 2))
+    spread = np.column_stack([rng.uniform(*LAT_RANGE, count - clustered), rng.uniform(*LON_RANGE, count - clustered)])
+    points = np.vstack([around, spread])
+    names = [f"Hospital {i}" for i in range(count)]
+    addresses = [f"{i} Main Road" for i in range(count)]
+    return names, points[:, 0], points[:, 1], addresses
+
+
+def scan_nearest(index, lat, lon, k):
+    distances = haversine_km(lat, lon, index.lats, index.lons)
+    nearest = np.argpartition(distances, k - 1)[:k]
+    return np.sort(distances[nearest])
+
+
+def percentile_ms(samples, q):
+    return float(np.percentile(samples, q)) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline nearest-hospital index")
+    parser.add_argument("--sizes", nargs="+", type=int, default=[100_000, 1_000_000])
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("-k", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    print(f"{'hospitals':>10} {'build (s)':>10} {'npz load (s)':>13} {'index MiB':>10} "
+          f"{'p50 (ms)':>9} {'p99 (ms)':>9} {'scan p50 (ms)':>14}")
+    for size in args.sizes:
+        data = synthetic_hospitals(size, rng)
+        started = time.perf_counter()
+        index = HospitalIndex(*data)
+        build = time.perf_counter() - started
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "hospitals.npz")
+            index.save(path)
+            started = time.perf_counter()
+            loaded = load_hospitals(path)
+            load = time.perf_counter() - started
+            assert loaded.nearest(20.0, 80.0, args.k) == index.nearest(20.0, 80.0, args.k)
+
+        points = np.column_stack([rng.uniform(*LAT_RANGE, args.queries), rng.uniform(*LON_RANGE, args.queries)])
+        latencies = []
+        for lat, lon in points.tolist():
+            started = time.perf_counter()
+            index.nearest(lat, lon, args.k)
+            latencies.append(time.perf_counter() - started)
+
+        scans = []
+        for lat, lon in points[:100].tolist():
+            started = time.perf_counter()
+            expected = scan_nearest(index, lat, lon, args.k)
+            scans.append(time.perf_counter() - started)
+            found = [distance for _, distance in index.nearest_positions(lat, lon, args.k)]
+            assert np.allclose(found, expected), f"({lat}, {lon}): {found} != {expected}"
+
+        print(f"{size:>10,} {build:>10.2f} {load:>13.2f} {index.nbytes / 2 ** 20:>10.1f} "
+              f"{percentile_ms(latencies, 50):>9.3f} {percentile_ms(latencies, 99):>9.3f} "
+              f"{percentile_ms(scans, 50):>14.2f}")
+    print("✅ Index answers match a scan of every hospital")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Benchmark for logic.patient_history
+
+Records R assessments (default 100) for each of P patients (default
+10,000) spread over the last year, in the columnar history store and in
+the same SQLite schema left as one row per record. Reports append
+throughput, bytes per record (packed segments and whole database file,
+next to a Python list of dicts), and the latency of "last 90 days" range
+queries, raw and downsampled to weeks. Checks both stores answer alike.
+
+Usage:
+    python3 benchmarks/bench_patient_history.py [--patients P] [--records R] [--queries N]
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from logic.patient_history import FIELDS, RISK_LEVELS, PatientHistory, assessment_values, downsample
+
+YEAR_SECONDS = 365 * 86400
+
+
+def synthetic_rounds(patients, records, now, seed=42):
+    """
+    Yields one round of (patient, at, values) assessments per visit, every
+    patient once per round, with BMI and blood pressure drifting slowly.
+    """
+    rng = random.Random(seed)
+    state = [[rng.uniform(19, 32), rng.uniform(110, 140)] for _ in range(patients)]
+    step = YEAR_SECONDS // records
+    for visit in range(records):
+        entries = []
+        for patient, (bmi, systolic) in enumerate(state):
+            bmi = state[patient][0] = bmi + rng.gauss(0, 0.1)
+            systolic = state[patient][1] = systolic + rng.gauss(0, 2)
+            vital_signs = {"blood_pressure": f"{systolic:.0f}/{systolic * 0.65:.0f}",
+                           "heart_rate": rng.randint(60, 95)} if visit % 2 else None
+            values = assessment_values(bmi=round(bmi, 2), risk=rng.choice(RISK_LEVELS),
+                                       symptoms=[None] * rng.randint(0, 4), vital_signs=vital_signs)
+            entries.append((f"patient-{patient}", now - YEAR_SECONDS + visit * step + rng.randint(0, 3600), values))
+        yield entries
+
+
+def list_of_dicts_bytes(rounds):
+    """Bytes per record of the same records kept as {"time": ..., field: ...} dicts in lists per patient."""
+    tracemalloc.start()
+    store = {}
+    count = 0
+    for entries in rounds:
+        for patient, at, values in entries:
+            store.setdefault(patient, []).append({"time": at, **dict(zip(FIELDS, values))})
+            count += 1
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return size / count
+
+
+def query_latencies(history, patients, now, queries, bucket=None, seed=7):
+    rng = random.Random(seed)
+    latencies = []
+    for _ in range(queries):
+        patient = f"patient-{rng.randrange(patients)}"
+        started = time.perf_counter()
+        rows = history.query(patient, since=now - 90 * 86400, until=now)
+        if bucket:
+            downsample(rows, bucket)
+        latencies.append(time.perf_counter() - started)
+    latencies.sort()
+    return latencies[len(latencies) // 2] * 1000, latencies[int(len(latencies) * 0.99)] * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Patient history store size and range queries")
+    parser.add_argument("--patients", type=int, default=10_000)
+    parser.add_argument("--records", type=int, default=100)
+    parser.add_argument("--queries", type=int, default=2000)
+    args = parser.parse_args()
+
+    now = int(time.time())
+    total = args.patients * args.records
+    with tempfile.TemporaryDirectory() as tmp:
+        columnar = PatientHistory(os.path.join(tmp, "columnar.db"))
+        # Tails are never packed: one row per record
+        rows = PatientHistory(os.path.join(tmp, "rows.db"), segment_records=2 ** 62)
+
+        timings = {}
+        for name, history in (("columnar", columnar), ("rows", rows)):
+            started = time.perf_counter()
+            for entries in synthetic_rounds(args.patients, args.records, now):
+                history.extend(entries)
+            timings[name] = time.perf_counter() - started
+
+        stats = columnar.stats()
+        row_stats = rows.stats()
+        dict_bytes = list_of_dicts_bytes(synthetic_rounds(min(args.patients, 1000), args.records, now))
+
+        print(f"{total:,} assessments ({args.patients:,} patients x {args.records}):")
+        print(f"  {'store':<28} {'appends/s':>10} {'bytes/record':>13}")
+        print(f"  {'columnar segments (data)':<28} {'':>10} {stats['segment_bytes_per_record']:>13.1f}")
+        print(f"  {'columnar (database file)':<28} {total / timings['columnar']:>10,.0f} "
+              f"{stats['file_bytes_per_record']:>13.1f}")
+        print(f"  {'row per record (file)':<28} {total / timings['rows']:>10,.0f} "
+              f"{row_stats['file_bytes_per_record']:>13.1f}")
+        print(f"  {'Python list of dicts':<28} {'':>10} {dict_bytes:>13.1f}")
+        print()
+        print(f"  {'last 90 days of a patient':<28} {'p50 (ms)':>10} {'p99 (ms)':>9}")
+        for label, history, bucket in (("columnar", columnar, None), ("columnar, weekly buckets", columnar, 7 * 86400),
+                                       ("row per record", rows, None)):
+            p50, p99 = query_latencies(history, args.patients, now, args.queries, bucket)
+            print(f"  {label:<28} {p50:>10.3f} {p99:>9.3f}")
+
+        for patient in ("patient-0", f"patient-{args.patients - 1}"):
+            assert columnar.query(patient) == rows.query(patient), patient
+        print("✅ Columnar store answers match the row-per-record store")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Benchmark for logic.pdf_generator.generate_pdf
+
+Measures per-report latency and peak memory allocated with the static report
+blocks laid out on every call (precompiled=False) and with the precompiled
+template blocks (precompiled=True), for a small report and for a large one
+with hundreds of symptoms.
+
+Usage:
+    python3 benchmarks/bench_pdf_generator.py
+"""
+
+import os
+import sys
+import timeit
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from logic.pdf_generator import generate_pdf
+
+SMALL_REPORT = {
+    "name": "John Doe",
+    "age": "30",
+    "risk_level": "Medium",
+    "symptoms": ["Fever", "Cough", "Headache"],
+    "diagnoses": [
+        {"symptom": "Fever", "condition": "Flu", "medicine": "Paracetamol"},
+        {"symptom": "Cough", "condition": "Flu", "medicine": "Cough Syrup"},
+        {"symptom": "Headache", "condition": "Migraine", "medicine": "Ibuprofen"},
+    ],
+    "bmi": {"value": "24.2", "category": "Normal"},
+    "mental_wellness": {"mood": "Okay", "sleep": 7},
+    "vital_signs": {"blood_pressure": "120", "sugar_level": "90", "heart_rate": "75", "vision": "No"},
+}
+
+LARGE_REPORT = dict(
+    SMALL_REPORT,
+    risk_level="High",
+    symptoms=[f"Symptom {i}" for i in range(300)],
+    diagnoses=[{"symptom": f"Symptom {i}", "condition": f"Condition {i % 40}", "medicine": f"Medicine {i % 60}"}
+               for i in range(300)],
+)
+
+
+def measure(report, precompiled):
+    generate_pdf(as_bytes=True, precompiled=precompiled, **report)  # warm up
+    number = 50 if report is SMALL_REPORT else 5
+    seconds = min(timeit.repeat(lambda: generate_pdf(as_bytes=True, precompiled=precompiled, **report),
+                                number=number, repeat=7)) / number
+
+    tracemalloc.start()
+    generate_pdf(as_bytes=True, precompiled=precompiled, **report)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return seconds, peak
+
+
+def main():
+    print(f"{'report':>8} {'mode':>12} {'latency (ms)':>13} {'peak (KiB)':>11}")
+    for label, report in (("small", SMALL_REPORT), ("large", LARGE_REPORT)):
+        for precompiled in (False, True):
+            seconds, peak = measure(report, precompiled)
+            mode = "precompiled" if precompiled else "laid out"
+            print(f"{label:>8} {mode:>12} {seconds * 1000:>13.2f} {peak / 1024:>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Benchmark for reminder delivery: client polling vs. server push
+
+Compares the server CPU spent per minute on N clients that each poll
+GET /get_reminders once a minute with N clients holding a push subscription
+open (as GET /reminders/stream does), each parked on its subscription queue
+and woken only by the keep-alive heartbeat. Also reports how long one fired
+reminder takes to reach a subscriber.
+
+Usage:
+    python3 benchmarks/bench_reminder_delivery.py [N]   (default 10,000)
+"""
+
+import os
+import queue
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import REMINDER_HEARTBEAT_SECONDS, create_app, get_reminder_store
+
+
+def polling_cpu_per_minute(app, clients):
+    test_client = app.test_client()
+    started = time.process_time()
+    for i in range(clients):
+        test_client.get(f"/get_reminders?user=poll-bench-{i}")
+    return time.process_time() - started
+
+
+def push_cpu_per_minute(reminder_store, clients):
+    stop = threading.Event()
+    ready = threading.Barrier(clients + 1)
+
+    def idle_client(user):
+        subscription, _ = reminder_store.subscribe(user)
+        ready.wait()
+        try:
+            while not stop.is_set():
+                try:
+                    subscription.get(timeout=REMINDER_HEARTBEAT_SECONDS)
+                except queue.Empty:
+                    pass
+        finally:
+            reminder_store.unsubscribe(user, subscription)
+
+    threading.stack_size(256 * 1024)
+    threads = [threading.Thread(target=idle_client, args=(f"push-bench-{i}",), daemon=True)
+               for i in range(clients)]
+    for thread in threads:
+        thread.start()
+    ready.wait()
+
+    # One full heartbeat period, so every client wakes once
+    started = time.process_time()
+    time.sleep(REMINDER_HEARTBEAT_SECONDS)
+    cpu = (time.process_time() - started) * 60 / REMINDER_HEARTBEAT_SECONDS
+
+    # Fan-out latency for a reminder fired to one of the subscribers
+    subscription, _ = reminder_store.subscribe("push-bench-latency")
+    reminder = reminder_store.add("push-bench-latency", "Aspirin", time.strftime("%H:%M"), "once")
+    started = time.perf_counter()
+    reminder_store.scheduler.fire_due(reminder.next_fire)
+    subscription.get(timeout=5)
+    latency = time.perf_counter() - started
+    reminder_store.unsubscribe("push-bench-latency", subscription)
+
+    stop.set()
+    return cpu, latency
+
+
+def main():
+    clients = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    with tempfile.TemporaryDirectory() as tmp:
+        app = create_app({"REMINDER_DB": os.path.join(tmp, "reminders.db"), "REMINDER_SCHEDULER": "local"})
+        poll_cpu = polling_cpu_per_minute(app, clients)
+        print(f"{clients:,} clients polling /get_reminders once a minute: {poll_cpu:.2f} s CPU per minute")
+        push_cpu, latency = push_cpu_per_minute(get_reminder_store(app), clients)
+        print(f"{clients:,} idle push subscriptions: {push_cpu:.2f} s CPU per minute "
+              f"(fan-out to a subscriber {latency * 1000:.2f} ms)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for logic.risk_classifier.classify_risk
+
+Compares the precompiled matcher against the original nested substring scan
+on 1, 10, 100 and 10,000 symptoms, and classify_risk_batch against a
+per-patient loop over 100,000 stored symptom lists.
+
+Usage:
+    python3 benchmarks/bench_risk_classifier.py
+"""
+
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from logic.risk_classifier import classify_risk, classify_risk_batch
+
+
+def legacy_classify_risk(symptoms):
+    """The original implementation, kept here as the comparison baseline."""
+    if not symptoms:
+        return "Low"
+    symptoms = [symptom.lower() for symptom in symptoms]
+    high_risk_symptoms = [
+        'chest pain', 'shortness of breath', 'fainting', 'palpitations',
+        'blurred vision', 'severe headache', 'high fever'
+    ]
+    medium_risk_symptoms = [
+        'fever', 'persistent cough', 'severe fatigue', 'vomiting',
+        'diarrhea', 'severe pain'
+    ]
+    for symptom in symptoms:
+        if any(high_risk in symptom for high_risk in high_risk_symptoms):
+            return "High"
+    medium_risk_count = 0
+    for symptom in symptoms:
+        if any(medium_risk in symptom for medium_risk in medium_risk_symptoms):
+            medium_risk_count += 1
+    if medium_risk_count >= 2 or len(symptoms) >= 4:
+        return "High"
+    elif medium_risk_count >= 1 or len(symptoms) >= 2:
+        return "Medium"
+    else:
+        return "Low"
+
+
+# Words a free-text /chat message is split into; none of them is high risk,
+# which is the worst case for both implementations (no early exit).
+FILLER_WORDS = [
+    "i", "have", "had", "a", "mild", "cough", "and", "some", "headache",
+    "since", "yesterday", "my", "back", "hurts", "feeling", "tired", "today",
+]
+
+SIZES = [1, 10, 100, 10000]
+
+BATCH_PATIENTS = 100000
+
+SYMPTOM_NAMES = [
+    "Fever", "Cough", "Headache", "Sore Throat", "Fatigue", "Nausea", "Vomiting",
+    "Diarrhea", "Chest Pain", "Skin Rash", "Back Pain", "Dizziness", "Runny Nose",
+]
+
+
+def make_symptoms(size, seed=42):
+    rng = random.Random(seed + size)
+    return [rng.choice(FILLER_WORDS) for _ in range(size)]
+
+
+def check_equivalence():
+    cases = [
+        [], ["Fever"], ["Chest Pain"], ["fever", "vomiting"], ["cough"],
+        ["a", "b"], ["a", "b", "c", "d"], ["HIGH FEVER"], ["Severe Pain", "x"],
+        ["I have chest pain today"], ["no", "fever", "here"],
+    ]
+    rng = random.Random(7)
+    vocabulary = FILLER_WORDS + ["fever", "vomiting", "fainting", "severe pain"]
+    for _ in range(2000):
+        cases.append([rng.choice(vocabulary) for _ in range(rng.randint(0, 6))])
+    for case in cases:
+        expected = legacy_classify_risk(case)
+        actual = classify_risk(case)
+        assert actual == expected, f"{case!r}: {actual} != {expected}"
+
+
+def bench(func, symptoms):
+    number = max(1, 20000 // len(symptoms))
+    best = min(timeit.repeat(lambda: func(symptoms), number=number, repeat=5))
+    return best / number
+
+
+def main():
+    check_equivalence()
+    print("✅ Compiled matcher agrees with the original implementation")
+    print()
+    print(f"{'symptoms':>10} {'original (us)':>15} {'compiled (us)':>15} {'speedup':>9}")
+    for size in SIZES:
+        symptoms = make_symptoms(size)
+        legacy = bench(legacy_classify_risk, symptoms) * 1e6
+        compiled = bench(classify_risk, symptoms) * 1e6
+        print(f"{size:>10} {legacy:>15.2f} {compiled:>15.2f} {legacy / compiled:>8.1f}x")
+
+    rng = random.Random(3)
+    patients = [rng.sample(SYMPTOM_NAMES, rng.randint(0, 4)) for _ in range(BATCH_PATIENTS)]
+    assert classify_risk_batch(patients) == [classify_risk(p) for p in patients]
+    scalar = min(timeit.repeat(lambda: [classify_risk(p) for p in patients], number=1, repeat=3))
+    batch = min(timeit.repeat(lambda: classify_risk_batch(patients), number=1, repeat=3))
+    print()
+    print(f"{BATCH_PATIENTS:,} patients: scalar loop {scalar * 1000:.1f} ms, "
+          f"classify_risk_batch {batch * 1000:.1f} ms ({scalar / batch:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
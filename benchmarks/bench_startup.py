@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Startup-time budget for app.py
+
+Imports the app in fresh interpreters under `python -X importtime` and
+checks two things, exiting with status 1 if either fails:
+
+  * the app's own import cost - everything `import app` takes beyond
+    importing Flask itself - stays under a budget (default 100 ms), so
+    the check doesn't depend on how fast the machine imports Flask;
+  * modules that should only load on first use (the PDF engine, numpy,
+    SQLite) are not imported at startup.
+
+Usage:
+    python3 benchmarks/bench_startup.py [--budget-ms MS] [--runs N]
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Top-level packages that must not be imported by `import app`
+LAZY_MODULES = ("fpdf", "numpy", "sqlite3")
+
+
+def import_profile():
+    """Returns {module: (self_us, cumulative_us)} for one cold `import app`."""
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ, REMINDER_DB=os.path.join(tmp, "reminders.db"))
+        result = subprocess.run([sys.executable, "-X", "importtime", "-c", "import app"], cwd=ROOT, env=env,
+                                capture_output=True, text=True, check=True)
+    profile = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        profile[name.strip()] = (int(self_us), int(cumulative_us))
+    return profile
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fail if app startup regresses past a budget")
+    parser.add_argument("--budget-ms", type=float, default=100.0,
+                        help="allowed import time of app beyond Flask's own (default 100)")
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    # The fastest run is the least disturbed by the rest of the machine
+    best = None
+    for _ in range(args.runs):
+        profile = import_profile()
+        overhead = profile["app"][1] - profile["flask"][1]
+        if best is None or overhead < best[0]:
+            best = (overhead, profile)
+    overhead, profile = best
+
+    print(f"import app:   {profile['app'][1] / 1000:7.1f} ms")
+    print(f"import flask: {profile['flask'][1] / 1000:7.1f} ms")
+    print(f"app overhead: {overhead / 1000:7.1f} ms (budget {args.budget_ms:.0f} ms)")
+
+    failed = False
+    if overhead / 1000 > args.budget_ms:
+        failed = True
+        print("FAIL: startup is over budget. Slowest imports:")
+        slowest = sorted(profile.items(), key=lambda item: item[1][0], reverse=True)[:10]
+        for name, (self_us, _) in slowest:
+            print(f"    {self_us / 1000:7.1f} ms  {name}")
+
+    eager = sorted({name.split(".")[0] for name in profile} & set(LAZY_MODULES))
+    if eager:
+        failed = True
+        print(f"FAIL: imported at startup instead of on first use: {', '.join(eager)}")
+
+    if failed:
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Benchmark for logic.vitals
+
+Feeds N vital-sign readings (default 1,000,000) from 10,000 patients
+through the rolling-window monitor and reports readings/sec for:
+  - VitalsMonitor.add on parsed readings (the O(1) engine),
+  - a whole NDJSON line as POST /vitals/stream handles it (JSON decoding,
+    "120/80" parsing and the monitor),
+  - a baseline that recomputes mean and standard deviation over each
+    patient's window for every reading (timed on the last 100,000).
+Then checks the rolling statistics against numpy over the last window.
+
+Usage:
+    python3 benchmarks/bench_vitals.py [N] [--patients P] [--window W]
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import sys
+import time
+from collections import deque
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from app import ingest_vitals, parse_ndjson_line
+from logic.vitals import VITALS, VitalsMonitor, parse_reading
+
+# Readings given to the recomputing baseline, which is far slower
+BASELINE_READINGS = 100_000
+
+
+def make_lines(count, patients, seed=42):
+    """NDJSON readings; about 1% are out of range, some omit sugar."""
+    rng = random.Random(seed)
+    lines = []
+    for i in range(count):
+        systolic = rng.gauss(120, 8) if rng.random() > 0.01 else rng.uniform(150, 200)
+        record = {"patient": f"p{i % patients}", "blood_pressure": f"{systolic:.0f}/{rng.gauss(80, 5):.0f}",
+                  "heart_rate": round(rng.gauss(72, 6))}
+        if i % 3 == 0:
+            record["sugar_level"] = round(rng.gauss(100, 12))
+        lines.append(json.dumps(record).encode() + b"\n")
+    return lines
+
+
+class RecomputingMonitor:
+    """Baseline: keeps each patient's window and recomputes its statistics per reading."""
+
+    def __init__(self, window):
+        self.window = window
+        self.patients = {}
+
+    def history(self, patient):
+        history = self.patients.get(patient)
+        if history is None:
+            history = self.patients[patient] = [deque(maxlen=self.window) for _ in VITALS]
+        return history
+
+    def fill(self, patient, reading):
+        for values, value in zip(self.history(patient), reading):
+            values.append(value)
+
+    def add(self, patient, reading):
+        for values, value in zip(self.history(patient), reading):
+            measured = [v for v in values if v == v]
+            if measured:
+                mean = sum(measured) / len(measured)
+                math.sqrt(sum((v - mean) ** 2 for v in measured) / len(measured))
+            values.append(value)
+
+
+def readings_per_second(func, items):
+    started = time.perf_counter()
+    for item in items:
+        func(*item)
+    return len(items) / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Readings/sec through the vitals monitor")
+    parser.add_argument("readings", nargs="?", type=int, default=1_000_000)
+    parser.add_argument("--patients", type=int, default=10_000)
+    parser.add_argument("--window", type=int, default=60)
+    args = parser.parse_args()
+
+    lines = make_lines(args.readings, args.patients)
+    records = [parse_ndjson_line(line)[0] for line in lines]
+    parsed = [(record["patient"], parse_reading(record)) for record in records]
+
+    monitor = VitalsMonitor(window=args.window)
+    engine = readings_per_second(monitor.add, parsed)
+
+    ingest_monitor = VitalsMonitor(window=args.window)
+    alerts = 0
+
+    def ingest(line_number, line):
+        nonlocal alerts
+        result = ingest_vitals(ingest_monitor, line_number, *parse_ndjson_line(line))
+        if result is not None:
+            alerts += len(result.get("alerts", ()))
+
+    ingest_rate = readings_per_second(ingest, list(enumerate(lines, start=1)))
+
+    # Time the baseline on the last readings, once the windows are full as they are for the monitor
+    recomputing = RecomputingMonitor(args.window)
+    for patient, reading in parsed[:-BASELINE_READINGS]:
+        recomputing.fill(patient, reading)
+    baseline = readings_per_second(recomputing.add, parsed[-BASELINE_READINGS:])
+
+    print(f"{args.readings:,} readings from {args.patients:,} patients, window {args.window}:")
+    print(f"  VitalsMonitor.add                   {engine:>12,.0f} readings/s")
+    print(f"  NDJSON line -> monitor (as stream)  {ingest_rate:>12,.0f} readings/s ({alerts:,} alerts)")
+    print(f"  recompute over the window           {baseline:>12,.0f} readings/s "
+          f"(last {min(BASELINE_READINGS, args.readings):,})")
+
+    for patient in ("p0", f"p{args.patients - 1}"):
+        history = np.array([reading for p, reading in parsed if p == patient][-args.window:])
+        stats = monitor.stats(patient)
+        for i, vital in enumerate(VITALS):
+            column = history[:, i]
+            column = column[~np.isnan(column)]
+            if len(column):
+                assert abs(stats[vital]["mean"] - column.mean()) < 0.01, (patient, vital)
+                assert abs(stats[vital]["std"] - column.std()) < 0.01, (patient, vital)
+    print("✅ Rolling mean/std match numpy over the last window")
+
+
+if __name__ == "__main__":
+    main()
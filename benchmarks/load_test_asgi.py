@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Load test: Flask app (app.py) vs. its ASGI variant (asgi.py)
+
+Starts each app in its own server process - Flask on Werkzeug's threaded
+server, as `python app.py` runs it, and the ASGI app on uvicorn - then
+opens N keep-alive connections (default 1,000) and has every connection
+send requests back to back for a fixed time. Reports requests/sec and
+p50/p99 latency per endpoint.
+
+The load generator is a plain asyncio HTTP/1.1 client, so it needs no
+extra packages, but it shares the machine's CPUs with the server under
+test: compare the two servers with each other, not with other machines.
+
+Usage:
+    python3 benchmarks/load_test_asgi.py [--connections N] [--duration SECONDS]
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import resource
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SERVERS = {
+    "flask": "import logging; logging.getLogger('werkzeug').setLevel(logging.ERROR)\n"
+             "from app import app; app.run(host='127.0.0.1', port={port}, threaded=True)",
+    "asgi": "import uvicorn; from asgi import app\n"
+            "uvicorn.run(app, host='127.0.0.1', port={port}, log_level='warning', access_log=False, backlog=4096)",
+}
+
+REPORT = {"name": "Load Test", "age": "40", "symptoms": ["Fever", "Cough"],
+          "vital_signs": {"blood_pressure": "120", "sugar_level": "90", "heart_rate": "72"}}
+
+ENDPOINTS = [
+    ("/chat", {"message": "I have a fever and a cough"}),
+    ("/find-hospitals", {"location": "New York"}),
+    # Served from the report cache after the first request
+    ("/generate-report", REPORT),
+]
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(kind, port, env):
+    process = subprocess.Popen([sys.executable, "-c", SERVERS[kind].format(port=port)], cwd=ROOT, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            return process
+        except OSError:
+            time.sleep(0.2)
+    process.kill()
+    raise RuntimeError(f"{kind} server did not start")
+
+
+def build_request(port, path, payload):
+    body = json.dumps(payload).encode()
+    head = (f"POST {path} HTTP/1.1\r\nHost: 127.0.0.1:{port}\r\nContent-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n\r\n")
+    return head.encode() + body
+
+
+async def read_response(reader):
+    """Reads one response; returns (status, connection_closing)."""
+    head = await reader.readuntil(b"\r\n\r\n")
+    lines = head.decode("latin-1").split("\r\n")
+    status = int(lines[0].split()[1])
+    headers = {}
+    for line in lines[1:]:
+        if ":" in line:
+            name, value = line.split(":", 1)
+            headers[name.strip().lower()] = value.strip()
+    if "content-length" in headers:
+        await reader.readexactly(int(headers["content-length"]))
+    elif headers.get("transfer-encoding") == "chunked":
+        while True:
+            size = int((await reader.readline()).strip(), 16)
+            await reader.readexactly(size + 2)
+            if size == 0:
+                break
+    closing = headers.get("connection", "").lower() == "close" or lines[0].startswith("HTTP/1.0")
+    return status, closing
+
+
+async def run_load(port, request, connections, duration):
+    """
+    Runs `connections` keep-alive clients for `duration` seconds. `request`
+    is the raw request bytes, or a callable returning the bytes for the
+    i-th request. Returns (req/s, sorted latencies, failures).
+    """
+    make_request = request if callable(request) else lambda i: request
+    counter = itertools.count()
+    latencies, failures = [], [0]
+    start = asyncio.Event()
+    connected = []
+
+    async def client():
+        try:
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        except OSError:
+            failures[0] += 1
+            return
+        connected.append(1)
+        await start.wait()
+        deadline = time.perf_counter() + duration
+        while time.perf_counter() < deadline:
+            sent = time.perf_counter()
+            try:
+                writer.write(make_request(next(counter)))
+                status, closing = await read_response(reader)
+            except (OSError, asyncio.IncompleteReadError, ValueError):
+                failures[0] += 1
+                closing, status = True, None
+            if status == 200:
+                latencies.append(time.perf_counter() - sent)
+            elif status is not None:
+                failures[0] += 1
+            if closing:
+                writer.close()
+                try:
+                    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+                except OSError:
+                    failures[0] += 1
+                    return
+        writer.close()
+
+    tasks = [asyncio.create_task(client()) for _ in range(connections)]
+    # Open every connection before the clock starts
+    while len(connected) + failures[0] < connections:
+        await asyncio.sleep(0.1)
+    started = time.perf_counter()
+    start.set()
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - started
+    return len(latencies) / elapsed, sorted(latencies), failures[0]
+
+
+def percentile(values, fraction):
+    return values[min(len(values) - 1, int(len(values) * fraction))] if values else float("nan")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--connections", type=int, default=1000)
+    parser.add_argument("--duration", type=float, default=10.0)
+    args = parser.parse_args()
+
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (min(hard, max(soft, args.connections * 2 + 256)), hard))
+
+    print(f"{args.connections:,} connections, {args.duration:.0f}s per endpoint")
+    print(f"{'server':>7} {'endpoint':>18} {'req/s':>9} {'p50 (ms)':>9} {'p99 (ms)':>9} {'errors':>7}")
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ, REMINDER_DB=os.path.join(tmp, "reminders.db"))
+        for kind in SERVERS:
+            port = free_port()
+            process = start_server(kind, port, env)
+            try:
+                for path, payload in ENDPOINTS:
+                    request = build_request(port, path, payload)
+                    rps, latencies, failures = asyncio.run(run_load(port, request, args.connections, args.duration))
+                    print(f"{kind:>7} {path:>18} {rps:>9.0f} {percentile(latencies, 0.5) * 1000:>9.1f} "
+                          f"{percentile(latencies, 0.99) * 1000:>9.1f} {failures:>7}")
+            finally:
+                process.terminate()
+                process.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,13 @@
+def require_numpy():
+    """
+    Returns the numpy module. The vectorized batch paths are its only
+    users, so they import it on first use rather than with their modules,
+    keeping it out of the app's startup.
+    Raises:
+        ImportError: with install instructions, if numpy isn't installed
+    """
+    try:
+        import numpy
+    except ImportError:
+        raise ImportError("numpy library is required. Install with: pip install numpy")
+    return numpy
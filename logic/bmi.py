@@ -0,0 +1,74 @@
+from bisect import bisect_right
+
+from logic._numpy import require_numpy
+
+# Lower bounds of every category after the first: a BMI of exactly 25.0 is
+# overweight and anything below it (24.99) is normal, with no gaps between
+CATEGORY_BOUNDS = (18.5, 25.0, 30.0)
+CATEGORIES = ("Underweight", "Normal weight", "Overweight", "Obese")
+
+# Category of a record whose height or weight is missing or not positive
+INVALID_CATEGORY = "Invalid"
+
+
+def categorize(bmi):
+    """Returns the category for a BMI value."""
+    return CATEGORIES[bisect_right(CATEGORY_BOUNDS, bmi)]
+
+
+def calculate_bmi(height_cm, weight_kg):
+    """
+    Calculates BMI for one person.
+    Args:
+        height_cm: Height in centimetres
+        weight_kg: Weight in kilograms
+    Returns:
+        (BMI rounded to 2 decimals, category), or (None, error message)
+        if the inputs are not positive numbers
+    """
+    try:
+        if height_cm <= 0 or weight_kg <= 0:
+            return None, "Error: height and weight must be positive"
+        height_m = height_cm / 100
+        # Rounded as numpy rounds (half to even on bmi * 100), so the batch
+        # version gives identical values. The category is taken from the
+        # rounded value, so the two never disagree.
+        bmi = round(weight_kg / (height_m ** 2) * 100) / 100
+        return bmi, categorize(bmi)
+    except Exception as e:
+        return None, f"Error: {e}"
+
+
+def calculate_bmi_batch(heights_cm, weights_kg):
+    """
+    Calculates BMI for many people at once; identical to calling
+    calculate_bmi on each pair.
+    Args:
+        heights_cm: Sequence or array of heights in centimetres
+        weights_kg: Sequence or array of weights in kilograms, same length
+    Returns:
+        (values, categories): a float array of BMIs rounded to 2 decimals
+        (NaN for invalid records) and a string array of categories
+        (INVALID_CATEGORY for records with a missing or non-positive
+        height or weight)
+    Raises:
+        ValueError: if the inputs differ in length or are not numeric
+    """
+    np = require_numpy()
+
+    heights = np.asarray(heights_cm, dtype=np.float64)
+    weights = np.asarray(weights_kg, dtype=np.float64)
+    if heights.shape != weights.shape or heights.ndim != 1:
+        raise ValueError("heights and weights must be lists of the same length.")
+
+    valid = (heights > 0) & (weights > 0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        values = np.round(weights / (heights / 100) ** 2, 2)
+    values[~valid] = np.nan
+
+    # digitize puts x in bucket i when CATEGORY_BOUNDS[i-1] <= x < CATEGORY_BOUNDS[i],
+    # as bisect_right does in categorize; invalid records get the last label
+    codes = np.digitize(values, CATEGORY_BOUNDS)
+    codes[~valid] = len(CATEGORIES)
+    labels = np.array(CATEGORIES + (INVALID_CATEGORY,))
+    return values, labels[codes]
@@ -0,0 +1,129 @@
+import string
+from collections import namedtuple
+
+from logic import knowledge_base
+from logic.risk_classifier import HIGH_RISK_SYMPTOMS, MEDIUM_RISK_SYMPTOMS
+
+# An intent matches when any of its keyword phrases appears in a message.
+# Each distinct phrase found adds the intent's weight to its score.
+Intent = namedtuple("Intent", ["name", "keywords", "weight"])
+
+# The winning intent's name (None if nothing matched) and the distinct
+# phrases it matched, in the order they appear
+Route = namedtuple("Route", ["intent", "phrases"])
+
+SYMPTOM_INTENT = "symptoms"
+
+# Symptom words beyond the names and aliases in the symptom table
+EXTRA_SYMPTOM_PHRASES = ("pain", "pains", "ache", "aches", "fevers", "coughs", "headaches")
+
+# The chat assistant's intents. On equal scores the one listed first wins.
+CHAT_INTENTS = (
+    Intent("report", ("report", "reports"), 3),
+    Intent("hospital", ("hospital", "hospitals", "nearby"), 2),
+    Intent("water", ("water",), 1),
+    Intent("medicine", ("medicine", "medicines"), 1),
+)
+SYMPTOM_WEIGHT = 4
+
+# ASCII punctuation -> space. Applied to UTF-8 bytes, which is safe because
+# ASCII bytes never occur inside a multi-byte character, and far faster
+# than splitting with a regex.
+_PUNCTUATION_TO_SPACE = bytes.maketrans(string.punctuation.encode(), b" " * len(string.punctuation))
+
+
+def tokenize(text):
+    """Lowercases text and splits it into words, dropping punctuation."""
+    return text.lower().encode("utf-8").translate(_PUNCTUATION_TO_SPACE).decode("utf-8").split()
+
+
+class IntentRouter:
+    """
+    Routes messages to weighted intents by keyword phrases.
+
+    Every phrase of every intent is compiled into one trie keyed by word,
+    so a message is tokenized once and each word is a dict lookup (most
+    words stop there), walking at most the longest phrase's length down
+    the trie however many intents there are. Phrases match whole words,
+    longest first: "chest pain" is one match, not "chest" and "pain".
+    """
+
+    def __init__(self, intents):
+        self.intents = tuple(intents)
+        self._trie = {}
+        for rank, intent in enumerate(self.intents):
+            for phrase in intent.keywords:
+                tokens = tokenize(phrase)
+                if not tokens:
+                    continue
+                node = self._trie
+                for token in tokens:
+                    node = node.setdefault(token, {})
+                # None marks the end of a phrase and lists the intents it belongs to
+                ranks = node.setdefault(None, [])
+                if rank not in ranks:
+                    ranks.append(rank)
+
+    def matches(self, tokens):
+        """Yields (phrase, intent ranks) for each leftmost-longest phrase in a list of words."""
+        start, count = 0, len(tokens)
+        while start < count:
+            node = self._trie.get(tokens[start])
+            end = ranks = None
+            position = start
+            while node is not None:
+                position += 1
+                if None in node:
+                    end, ranks = position, node[None]
+                if position == count:
+                    break
+                node = node.get(tokens[position])
+            if end is None:
+                start += 1
+                continue
+            yield " ".join(tokens[start:end]), ranks
+            start = end
+
+    def route(self, message):
+        """Returns the Route for a message."""
+        found = {}
+        for phrase, ranks in self.matches(tokenize(message)):
+            for rank in ranks:
+                # A dict keeps the phrases distinct and in message order
+                found.setdefault(rank, {})[phrase] = None
+        if not found:
+            return Route(None, [])
+        best = min(found, key=lambda rank: (-self.intents[rank].weight * len(found[rank]), rank))
+        return Route(self.intents[best].name, list(found[best]))
+
+
+def build_router(intents=CHAT_INTENTS):
+    """
+    Builds the chat router: a symptom intent from every symptom name and
+    alias in the symptom table and every phrase the risk classifier knows,
+    ahead of the given intents.
+    """
+    symptoms = set(knowledge_base.names())
+    symptoms.update(HIGH_RISK_SYMPTOMS, MEDIUM_RISK_SYMPTOMS, EXTRA_SYMPTOM_PHRASES)
+    return IntentRouter((Intent(SYMPTOM_INTENT, sorted(symptoms), SYMPTOM_WEIGHT),) + tuple(intents))
+
+
+# Built on first use; reset() drops it after the symptom table is reloaded
+_router = None
+
+
+def get_router():
+    global _router
+    if _router is None:
+        _router = build_router()
+    return _router
+
+
+def reset():
+    global _router
+    _router = None
+
+
+def route(message):
+    """Routes a chat message with the shared router."""
+    return get_router().route(message)
@@ -0,0 +1,307 @@
+import csv
+import json
+import math
+import os
+
+import numpy as np
+
+# A small sample of hospitals (approximate coordinates) used when no
+# dataset is configured
+DEFAULT_DATA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "hospitals.csv")
+
+EARTH_RADIUS_KM = 6371.0088
+
+DEFAULT_K = 5
+MAX_K = 100
+
+# The grid's cell size is chosen for about this many hospitals per cell
+HOSPITALS_PER_CELL = 4
+MIN_CELL_DEGREES = 0.001
+
+# A query that hasn't found its hospitals this many rings of cells out
+# (a sparse region, or a point far outside the data) checks every hospital
+MAX_RINGS = 32
+
+LATITUDE_COLUMNS = ("lat", "latitude")
+LONGITUDE_COLUMNS = ("lon", "lng", "long", "longitude")
+
+
+def haversine_km(lat, lon, lats, lons):
+    """Great-circle distances in km from one point to arrays of points (degrees)."""
+    lat1 = math.radians(lat)
+    lat2 = np.radians(lats.astype(np.float64))
+    dlon = np.radians(lons.astype(np.float64) - lon)
+    a = np.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * np.cos(lat2) * np.sin(dlon / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+def _pack(strings):
+    """Packs strings into one UTF-8 blob and the offsets of each string in it."""
+    encoded = [s.encode("utf-8") for s in strings]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(s) for s in encoded], out=offsets[1:])
+    return np.frombuffer(b"".join(encoded), dtype=np.uint8), offsets
+
+
+def _expand_ranges(starts, ends):
+    """Returns every integer in the half-open ranges [starts[i], ends[i])."""
+    lengths = ends - starts
+    total = int(lengths.sum())
+    if not total:
+        return np.empty(0, dtype=np.int64)
+    # Each run counts up from its start: offset each run by its start
+    # minus the number of items before it
+    before = np.cumsum(lengths) - lengths
+    return np.repeat(starts - before, lengths) + np.arange(total)
+
+
+class HospitalIndex:
+    """
+    Hospitals in a lat/lon grid for nearest-neighbour queries.
+
+    The hospitals are kept in a few flat numpy arrays sorted by grid cell:
+    float32 coordinates, names and addresses as UTF-8 blobs with offsets,
+    and the first hospital of every cell. There is no Python object per
+    hospital, so a million take a few tens of MB. A query reads cells in
+    growing square rings around the query point until the k nearest found
+    are closer than anything outside the rings could be; distances are
+    great-circle distances.
+    """
+
+    def __init__(self, names, lats, lons, addresses=None):
+        lats = np.asarray(lats, dtype=np.float64)
+        lons = np.asarray(lons, dtype=np.float64)
+        if lats.ndim != 1 or lats.shape != lons.shape or len(names) != len(lats):
+            raise ValueError("names, latitudes and longitudes must have the same length.")
+        if addresses is None:
+            addresses = [""] * len(names)
+        if len(lats) and not ((np.abs(lats) <= 90).all() and (np.abs(lons) <= 180).all()):
+            raise ValueError("Latitudes must be within [-90, 90] and longitudes within [-180, 180].")
+
+        count = len(lats)
+        self.lat_min = float(lats.min()) if count else 0.0
+        self.lon_min = float(lons.min()) if count else 0.0
+        lat_span = float(lats.max()) - self.lat_min if count else 0.0
+        lon_span = float(lons.max()) - self.lon_min if count else 0.0
+        # Square cells sized so the data's bounding box holds about
+        # HOSPITALS_PER_CELL hospitals per cell on average
+        self.cell_degrees = max(math.sqrt(max(lat_span * lon_span, MIN_CELL_DEGREES ** 2)
+                                          * HOSPITALS_PER_CELL / max(count, 1)), MIN_CELL_DEGREES)
+        self.rows = int(lat_span // self.cell_degrees) + 1
+        self.cols = int(lon_span // self.cell_degrees) + 1
+
+        cells = self._row(lats) * self.cols + self._col(lons)
+        order = np.argsort(cells, kind="stable")
+        # _starts[cell] .. _starts[cell + 1] are the hospitals in a cell
+        self._starts = np.zeros(self.rows * self.cols + 1, dtype=np.int64)
+        np.cumsum(np.bincount(cells, minlength=self.rows * self.cols), out=self._starts[1:])
+        self.lats = lats[order].astype(np.float32)
+        self.lons = lons[order].astype(np.float32)
+        self._names, self._name_offsets = _pack([names[i] for i in order.tolist()])
+        self._addresses, self._address_offsets = _pack([addresses[i] or "" for i in order.tolist()])
+
+    def __len__(self):
+        return len(self.lats)
+
+    @property
+    def nbytes(self):
+        """Bytes held by the index's arrays."""
+        return sum(array.nbytes for array in (self.lats, self.lons, self._starts, self._names,
+                                              self._name_offsets, self._addresses, self._address_offsets))
+
+    def hospital(self, i):
+        """Returns {"name", "address", "lat", "lon"} for the hospital at position i."""
+        return {
+            "name": self._names[self._name_offsets[i]:self._name_offsets[i + 1]].tobytes().decode("utf-8"),
+            "address": self._addresses[self._address_offsets[i]:self._address_offsets[i + 1]].tobytes().decode("utf-8"),
+            "lat": round(float(self.lats[i]), 4),
+            "lon": round(float(self.lons[i]), 4),
+        }
+
+    def nearest(self, lat, lon, k=DEFAULT_K):
+        """
+        Finds the hospitals nearest to a point.
+        Args:
+            lat, lon: The point, in degrees
+            k: Number of hospitals to return
+        Returns:
+            List of up to k hospital dicts (as hospital()) with a
+            "distance_km", nearest first
+        """
+        return [dict(self.hospital(i), distance_km=round(distance, 3))
+                for i, distance in self.nearest_positions(lat, lon, k)]
+
+    def nearest_positions(self, lat, lon, k=DEFAULT_K):
+        """Returns [(position, distance in km)] of the k nearest hospitals, nearest first."""
+        k = min(k, len(self))
+        if k <= 0:
+            return []
+        row = min(max(int((lat - self.lat_min) // self.cell_degrees), 0), self.rows - 1)
+        col = min(max(int((lon - self.lon_min) // self.cell_degrees), 0), self.cols - 1)
+
+        found = np.empty(0, dtype=np.int64)
+        distances = np.empty(0)
+        ring = 0
+        while True:
+            cells = self._ring_cells(row, col, ring)
+            positions = _expand_ranges(self._starts[cells], self._starts[cells + 1])
+            if len(positions):
+                found = np.concatenate([found, positions])
+                distances = np.concatenate([distances, haversine_km(lat, lon, self.lats[positions],
+                                                                    self.lons[positions])])
+                if len(found) > k:
+                    keep = np.argpartition(distances, k - 1)[:k]
+                    found, distances = found[keep], distances[keep]
+
+            row_lo, row_hi = max(row - ring, 0), min(row + ring, self.rows - 1)
+            col_lo, col_hi = max(col - ring, 0), min(col + ring, self.cols - 1)
+            if row_lo == 0 and col_lo == 0 and row_hi == self.rows - 1 and col_hi == self.cols - 1:
+                break
+            if len(found) == k and distances.max() <= self._unsearched_km(lat, lon, row_lo, row_hi, col_lo, col_hi):
+                break
+            ring += 1
+            if ring > MAX_RINGS:
+                return self._nearest_by_scan(lat, lon, k)
+
+        order = np.argsort(distances, kind="stable")
+        return list(zip(found[order].tolist(), distances[order].tolist()))
+
+    def _nearest_by_scan(self, lat, lon, k):
+        distances = haversine_km(lat, lon, self.lats, self.lons)
+        nearest = np.argpartition(distances, k - 1)[:k] if k < len(distances) else np.arange(len(distances))
+        nearest = nearest[np.argsort(distances[nearest], kind="stable")]
+        return list(zip(nearest.tolist(), distances[nearest].tolist()))
+
+    def _row(self, lats):
+        return np.minimum(((lats - self.lat_min) // self.cell_degrees).astype(np.int64), self.rows - 1)
+
+    def _col(self, lons):
+        return np.minimum(((lons - self.lon_min) // self.cell_degrees).astype(np.int64), self.cols - 1)
+
+    def _ring_cells(self, row, col, ring):
+        """Cell numbers of the square ring of cells `ring` cells out from (row, col), within the grid."""
+        if ring == 0:
+            rows, cols = np.array([row]), np.array([col])
+        else:
+            side = np.arange(-ring, ring + 1)
+            inner = side[1:-1]
+            rows = np.concatenate([np.full(len(side), row - ring), np.full(len(side), row + ring),
+                                   row + inner, row + inner])
+            cols = np.concatenate([col + side, col + side,
+                                   np.full(len(inner), col - ring), np.full(len(inner), col + ring)])
+        inside = (rows >= 0) & (rows < self.rows) & (cols >= 0) & (cols < self.cols)
+        return rows[inside] * self.cols + cols[inside]
+
+    def _unsearched_km(self, lat, lon, row_lo, row_hi, col_lo, col_hi):
+        """
+        A lower bound on the distance from (lat, lon) to any hospital outside
+        the searched cells rows row_lo..row_hi, columns col_lo..col_hi.
+        """
+        bounds = []
+        # Beyond a row edge a hospital is at least the latitude difference away
+        if row_lo > 0:
+            bounds.append(lat - (self.lat_min + row_lo * self.cell_degrees))
+        if row_hi < self.rows - 1:
+            bounds.append(self.lat_min + (row_hi + 1) * self.cell_degrees - lat)
+        nearest = max(min(bounds), 0.0) if bounds else 180.0
+        bound = math.radians(nearest) * EARTH_RADIUS_KM
+
+        # Beyond a column edge, at least as far as the meridian the longitude
+        # difference away. Longitudes wrap, so the far end of the data may be
+        # closer the other way round.
+        lon_max = self.lon_min + self.cols * self.cell_degrees
+        gaps = []
+        if col_lo > 0:
+            gaps.append(min(lon - (self.lon_min + col_lo * self.cell_degrees), 360 - (lon - self.lon_min)))
+        if col_hi < self.cols - 1:
+            gaps.append(min(self.lon_min + (col_hi + 1) * self.cell_degrees - lon, 360 - (lon_max - lon)))
+        if gaps:
+            gap = math.radians(min(max(min(gaps), 0.0), 90.0))
+            bound = min(bound, EARTH_RADIUS_KM * math.asin(math.cos(math.radians(lat)) * math.sin(gap)))
+        return bound
+
+    def save(self, path):
+        """Saves the index as .npz, which load_hospitals reads without rebuilding it."""
+        np.savez(path, grid=np.array([self.lat_min, self.lon_min, self.cell_degrees, self.rows, self.cols]),
+                 starts=self._starts, lats=self.lats, lons=self.lons,
+                 names=self._names, name_offsets=self._name_offsets,
+                 addresses=self._addresses, address_offsets=self._address_offsets)
+
+    @classmethod
+    def load(cls, path):
+        """Loads an index saved by save()."""
+        index = cls.__new__(cls)
+        with np.load(path) as data:
+            lat_min, lon_min, cell_degrees, rows, cols = data["grid"].tolist()
+            index.lat_min, index.lon_min, index.cell_degrees = lat_min, lon_min, cell_degrees
+            index.rows, index.cols = int(rows), int(cols)
+            index._starts, index.lats, index.lons = data["starts"], data["lats"], data["lons"]
+            index._names, index._name_offsets = data["names"], data["name_offsets"]
+            index._addresses, index._address_offsets = data["addresses"], data["address_offsets"]
+        return index
+
+
+def _column(header, options, path):
+    for option in options:
+        if option in header:
+            return header.index(option)
+    raise ValueError(f"{path}: no {options[0]} column (expected one of {', '.join(options)})")
+
+
+def _read_csv(path):
+    with open(path, "r", encoding="utf-8-sig", newline="") as f:
+        reader = csv.reader(f)
+        header = [column.strip().lower() for column in next(reader, [])]
+        name_column = _column(header, ("name",), path)
+        lat_column = _column(header, LATITUDE_COLUMNS, path)
+        lon_column = _column(header, LONGITUDE_COLUMNS, path)
+        address_column = header.index("address") if "address" in header else None
+        names, lats, lons, addresses = [], [], [], []
+        for line_number, row in enumerate(reader, start=2):
+            if not row:
+                continue
+            try:
+                lats.append(float(row[lat_column]))
+                lons.append(float(row[lon_column]))
+            except (IndexError, ValueError):
+                raise ValueError(f"{path}:{line_number}: latitude and longitude must be numbers")
+            names.append(row[name_column])
+            addresses.append(row[address_column] if address_column is not None else "")
+    return names, lats, lons, addresses
+
+
+def _read_geojson(path):
+    with open(path, "r", encoding="utf-8") as f:
+        collection = json.load(f)
+    names, lats, lons, addresses = [], [], [], []
+    for number, feature in enumerate(collection.get("features", [])):
+        geometry = feature.get("geometry") or {}
+        if geometry.get("type") != "Point":
+            raise ValueError(f"{path}: feature {number} is not a Point")
+        lon, lat = geometry["coordinates"][:2]
+        properties = feature.get("properties") or {}
+        names.append(str(properties.get("name", "")))
+        addresses.append(str(properties.get("address", "")))
+        lats.append(lat)
+        lons.append(lon)
+    return names, lats, lons, addresses
+
+
+def load_hospitals(path=None):
+    """
+    Loads a hospital dataset into a HospitalIndex.
+    Args:
+        path: A .csv file (name, lat/latitude, lon/lng/longitude and an
+            optional address column), a GeoJSON FeatureCollection of
+            Points (.json/.geojson, with name and address properties) or
+            an .npz saved by HospitalIndex.save. Defaults to the sample.
+    Raises:
+        ValueError: if the file is malformed
+    """
+    path = path or DEFAULT_DATA_PATH
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".npz":
+        return HospitalIndex.load(path)
+    if extension in (".json", ".geojson"):
+        return HospitalIndex(*_read_geojson(path))
+    return HospitalIndex(*_read_csv(path))
@@ -0,0 +1,123 @@
+import json
+import os
+import threading
+from collections import namedtuple
+
+DEFAULT_DATA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "symptoms.json")
+
+UNKNOWN_CONDITION = "Unknown"
+DEFAULT_MEDICINE = "Consult Doctor"
+
+Entry = namedtuple("Entry", ["symptom", "condition", "medicine"])
+
+# Case-folded symptom name or alias -> Entry. Loaded on first use and
+# replaced wholesale on reload, so readers never need a lock.
+_index = None
+_data_path = DEFAULT_DATA_PATH
+_reload_lock = threading.Lock()
+
+
+def normalize(symptom):
+    """
+    Returns the lookup key for a symptom: case-folded with runs of
+    whitespace collapsed, so "  SORE   throat" and "Sore Throat" match.
+    """
+    return " ".join(symptom.casefold().split())
+
+
+def _build_index(records):
+    index = {}
+    for record in records:
+        entry = Entry(record["symptom"], record["condition"], record["medicine"])
+        for name in [entry.symptom] + list(record.get("aliases", [])):
+            key = normalize(name)
+            existing = index.get(key)
+            if existing is not None and existing != entry:
+                raise ValueError(f"'{name}' maps to both '{existing.symptom}' and '{entry.symptom}'")
+            index[key] = entry
+    return index
+
+
+def load(path=None):
+    """
+    Loads the symptom table from a JSON data file and swaps it in.
+    Args:
+        path: Data file to load (defaults to the last file loaded)
+    Returns:
+        Number of lookup keys (symptoms plus aliases) in the new index
+    """
+    global _index, _data_path
+    with _reload_lock:
+        path = path or _data_path
+        with open(path, "r", encoding="utf-8") as f:
+            index = _build_index(json.load(f))
+        _index, _data_path = index, path
+    return len(index)
+
+
+# Reloading re-reads the same file in place
+reload = load
+
+
+def _get_index():
+    if _index is None:
+        load()
+    return _index
+
+
+def lookup(symptom):
+    """
+    Returns the Entry for a symptom name or alias, or None if unknown.
+    """
+    if not isinstance(symptom, str):
+        return None
+    return _get_index().get(normalize(symptom))
+
+
+def canonical_name(symptom):
+    """
+    Returns the canonical symptom name for a known symptom or alias,
+    or the symptom unchanged if it is not in the table.
+    """
+    entry = lookup(symptom)
+    return entry.symptom if entry else symptom
+
+
+def names():
+    """
+    Returns every symptom name and alias in the table, normalized.
+    """
+    return list(_get_index())
+
+
+def diagnose(symptoms):
+    """
+    Maps each symptom to its likely condition and medicine.
+    Returns: list of {"symptom", "condition", "medicine"} dicts
+    """
+    diagnoses = []
+    for symptom in symptoms:
+        entry = lookup(symptom)
+        if entry:
+            diagnoses.append({"symptom": symptom, "condition": entry.condition, "medicine": entry.medicine})
+        else:
+            diagnoses.append({"symptom": symptom, "condition": UNKNOWN_CONDITION, "medicine": DEFAULT_MEDICINE})
+    return diagnoses
+
+
+def analyze(symptoms):
+    """
+    Diagnoses symptoms and canonicalizes their names with one lookup per
+    symptom, for callers that need both (e.g. to classify risk as well).
+    Returns: (diagnoses as in diagnose(), canonical symptom names)
+    """
+    diagnoses, canonical = [], []
+    for symptom in symptoms:
+        entry = lookup(symptom)
+        if entry:
+            diagnoses.append({"symptom": symptom, "condition": entry.condition, "medicine": entry.medicine})
+            canonical.append(entry.symptom)
+        else:
+            diagnoses.append({"symptom": symptom, "condition": UNKNOWN_CONDITION, "medicine": DEFAULT_MEDICINE})
+            canonical.append(symptom)
+    return diagnoses, canonical
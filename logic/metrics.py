@@ -0,0 +1,194 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+
+# Upper bounds of the histogram buckets, in seconds and in bytes
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (128, 512, 2048, 8192, 32768, 131072, 524288, 2097152, 8388608)
+
+# Shards of exited threads are folded into one once there are this many
+MAX_SHARDS = 256
+
+
+class Registry:
+    """
+    Counters, gauges and histograms rendered in the Prometheus text format.
+
+    Every thread records into its own shard, so recording takes no lock and
+    threads never contend. A scrape sums the shards; a value read while its
+    thread is mid-update is at most one observation behind. Shards of
+    threads that have exited (e.g. one thread per connection) are folded
+    into a single retired shard, so their counts are kept but the number of
+    shards stays bounded.
+    """
+
+    def __init__(self):
+        self._families = {}
+        self._local = threading.local()
+        self._shards = []
+        self._retired = {}
+        self._lock = threading.Lock()
+
+    def counter(self, name, help_text, labels=()):
+        self._families[name] = ("counter", help_text, labels, None)
+
+    def gauge(self, name, help_text, labels=()):
+        self._families[name] = ("gauge", help_text, labels, None)
+
+    def histogram(self, name, help_text, labels=(), buckets=LATENCY_BUCKETS):
+        self._families[name] = ("histogram", help_text, labels, tuple(buckets))
+
+    def inc(self, name, label_values=(), amount=1):
+        """Adds amount to a counter or gauge (a negative amount lowers a gauge)."""
+        shard = self._shard()
+        key = (name, label_values)
+        value = shard.get(key)
+        if value is None:
+            shard[key] = [amount]
+        else:
+            value[0] += amount
+
+    def observe(self, name, value, label_values=()):
+        """Records one observation in a histogram."""
+        shard = self._shard()
+        key = (name, label_values)
+        buckets = self._families[name][3]
+        counts = shard.get(key)
+        if counts is None:
+            # One count per bucket, then +Inf, then the sum
+            counts = shard[key] = [0] * (len(buckets) + 2)
+        counts[bisect.bisect_left(buckets, value)] += 1
+        counts[-1] += value
+
+    def collect(self):
+        """Returns {(name, label_values): values} summed over every thread."""
+        with self._lock:
+            self._fold_exited()
+            shards = [self._retired] + [shard for _, shard in self._shards]
+            totals = {}
+            for shard in shards:
+                for key, values in list(shard.items()):
+                    total = totals.get(key)
+                    if total is None:
+                        totals[key] = list(values)
+                    else:
+                        for i, value in enumerate(values):
+                            total[i] += value
+        return totals
+
+    def render(self):
+        """Returns every metric in the Prometheus text exposition format."""
+        totals = self.collect()
+        lines = []
+        for name, (kind, help_text, label_names, buckets) in self._families.items():
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for (metric, label_values), values in sorted(totals.items()):
+                if metric != name:
+                    continue
+                labels = [f'{label}="{_escape(value)}"' for label, value in zip(label_names, label_values)]
+                if kind != "histogram":
+                    lines.append(f"{name}{_labels(labels)} {_number(values[0])}")
+                    continue
+                cumulative = 0
+                for bound, count in zip(buckets + ("+Inf",), values):
+                    cumulative += count
+                    le = f'le="{_number(bound)}"'
+                    lines.append(f"{name}_bucket{_labels(labels + [le])} {cumulative}")
+                lines.append(f"{name}_sum{_labels(labels)} {_number(values[-1])}")
+                lines.append(f"{name}_count{_labels(labels)} {cumulative}")
+        return "\n".join(lines) + "\n"
+
+    def _shard(self):
+        try:
+            return self._local.shard
+        except AttributeError:
+            shard = self._local.shard = {}
+            with self._lock:
+                if len(self._shards) >= MAX_SHARDS:
+                    self._fold_exited()
+                self._shards.append((threading.current_thread(), shard))
+            return shard
+
+    def _fold_exited(self):
+        # Called with the lock held. An exited thread no longer writes, so
+        # its shard can be merged without racing it.
+        alive = []
+        for thread, shard in self._shards:
+            if thread.is_alive():
+                alive.append((thread, shard))
+                continue
+            for key, values in shard.items():
+                retired = self._retired.get(key)
+                if retired is None:
+                    self._retired[key] = list(values)
+                else:
+                    for i, value in enumerate(values):
+                        retired[i] += value
+        self._shards = alive
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(labels):
+    return "{" + ",".join(labels) + "}" if labels else ""
+
+
+def _number(value):
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+registry = Registry()
+
+registry.histogram("http_request_duration_seconds",
+                   "Time to produce a response (to the first byte for streamed responses).",
+                   labels=("route", "method"))
+registry.gauge("http_requests_in_flight", "Requests currently being handled.")
+registry.counter("http_requests_total", "Requests handled, by response status.",
+                 labels=("route", "method", "status"))
+registry.counter("http_request_errors_total", "Requests that failed with a 5xx status or an exception.",
+                 labels=("route", "method"))
+registry.histogram("http_response_size_bytes", "Response body size, for responses with a known length.",
+                   labels=("route", "method"), buckets=SIZE_BUCKETS)
+registry.histogram("span_duration_seconds", "Time spent in named sections of request and background work.",
+                   labels=("span",))
+
+
+def record_request(route, method, status, seconds, size=None, error=False):
+    """Records one finished request."""
+    labels = (route, method)
+    registry.observe("http_request_duration_seconds", seconds, labels)
+    registry.inc("http_requests_total", (route, method, str(status)))
+    if size is not None:
+        registry.observe("http_response_size_bytes", size, labels)
+    if error or status >= 500:
+        registry.inc("http_request_errors_total", labels)
+
+
+def request_started():
+    registry.inc("http_requests_in_flight")
+
+
+def request_finished():
+    registry.inc("http_requests_in_flight", amount=-1)
+
+
+def observe_span(name, seconds):
+    registry.observe("span_duration_seconds", seconds, (name,))
+
+
+@contextmanager
+def span(name):
+    """Times the enclosed block as span_duration_seconds{span=name}."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe_span(name, time.perf_counter() - started)
+
+
+def render():
+    return registry.render()
@@ -0,0 +1,297 @@
+import math
+import sqlite3
+import threading
+import time
+import zlib
+from array import array
+from contextlib import contextmanager
+from itertools import accumulate
+
+from logic import vitals
+
+# What is kept from each assessment; any of them may be missing
+FIELDS = ("bmi", "risk", "symptoms", "systolic", "diastolic", "sugar", "heart_rate")
+RISK_LEVELS = ("Low", "Medium", "High")
+
+# Column types in a packed segment, in FIELDS order after the timestamps
+# (int64 seconds, delta encoded). Missing values are NaN, or -1 for the
+# risk level's index and the symptom count.
+TYPECODES = ("f", "b", "i", "f", "f", "f", "f")
+MISSING = tuple(-1 if code in "bi" else math.nan for code in TYPECODES)
+
+# Records a patient's open tail collects before it is packed into a segment
+SEGMENT_RECORDS = 32
+COMPRESSION_LEVEL = 6
+# Window the report's trend section covers
+TREND_DAYS = 90
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS records (
+    id INTEGER PRIMARY KEY,
+    patient TEXT NOT NULL,
+    time INTEGER NOT NULL,
+    bmi REAL,
+    risk INTEGER,
+    symptoms INTEGER,
+    systolic REAL,
+    diastolic REAL,
+    sugar REAL,
+    heart_rate REAL
+);
+CREATE INDEX IF NOT EXISTS records_by_patient ON records (patient, time);
+CREATE TABLE IF NOT EXISTS segments (
+    id INTEGER PRIMARY KEY,
+    patient TEXT NOT NULL,
+    first INTEGER NOT NULL,
+    last INTEGER NOT NULL,
+    count INTEGER NOT NULL,
+    data BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS segments_by_patient ON segments (patient, last);
+"""
+
+COLUMNS = "time, " + ", ".join(FIELDS)
+
+# Longest a write waits for another process's transaction to finish
+BUSY_TIMEOUT_SECONDS = 10
+
+
+def assessment_values(bmi=None, risk=None, symptoms=None, vital_signs=None):
+    """
+    Turns the parts of an assessment the app works with (a BMI value or
+    {"value": ...}, a risk level, a symptom list and the report's
+    vital_signs) into a row of FIELDS values, None for those missing.
+    Vital signs that can't be read are left out.
+    """
+    if isinstance(bmi, dict):
+        bmi = bmi.get("value")
+    if isinstance(bmi, bool) or not isinstance(bmi, (int, float)) or not bmi > 0:
+        bmi = None
+    risk = RISK_LEVELS.index(risk) if risk in RISK_LEVELS else None
+    symptoms = len(symptoms) if isinstance(symptoms, list) else None
+    readings = (None,) * 4
+    if isinstance(vital_signs, dict):
+        try:
+            readings = tuple(None if v != v else v for v in vitals.parse_reading(vital_signs))
+        except ValueError:
+            pass
+    return (bmi, risk, symptoms) + readings
+
+
+def _shuffle(column):
+    # Groups the first bytes of every value, then the second bytes, and so
+    # on: slowly changing values then leave long runs for zlib to compress
+    data = column.tobytes()
+    size = column.itemsize
+    return b"".join(data[i::size] for i in range(size)) if size > 1 else data
+
+
+def _unshuffle(data, typecode, count):
+    column = array(typecode)
+    size = column.itemsize
+    if size > 1:
+        interleaved = bytearray(len(data))
+        for i in range(size):
+            interleaved[i::size] = data[i * count:(i + 1) * count]
+        data = interleaved
+    column.frombytes(data)
+    return column
+
+
+def pack(rows):
+    """
+    Packs (time, *FIELDS values) rows into one compressed columnar segment:
+    each column is a typed array, byte-shuffled, and the columns are
+    compressed together.
+    """
+    columns = list(zip(*rows))
+    times = columns[0]
+    parts = [_shuffle(array("q", [times[0]] + [b - a for a, b in zip(times, times[1:])]))]
+    for code, missing, values in zip(TYPECODES, MISSING, columns[1:]):
+        parts.append(_shuffle(array(code, [missing if v is None else v for v in values])))
+    return zlib.compress(b"".join(parts), COMPRESSION_LEVEL)
+
+
+def unpack(data, count):
+    """Returns the columns of a packed segment: times, then FIELDS in order, missing values None."""
+    data = zlib.decompress(data)
+    offset = 8 * count
+    columns = [list(accumulate(_unshuffle(data[:offset], "q", count)))]
+    for code, missing in zip(TYPECODES, MISSING):
+        end = offset + array(code).itemsize * count
+        values = _unshuffle(data[offset:end], code, count)
+        if code == "f":
+            # float32 carries about 7 significant digits; BMI and vital
+            # signs are recorded to 2 decimals at most
+            columns.append([None if v != v else round(v, 2) for v in values])
+        else:
+            columns.append([None if v == missing else v for v in values])
+        offset = end
+    return columns
+
+
+def downsample(rows, bucket_seconds):
+    """
+    Groups (time, *FIELDS values) rows, sorted by time, into buckets of
+    bucket_seconds. Returns one (bucket start, records, *FIELDS values)
+    row per bucket: the mean of each value, but the highest risk level.
+    """
+    buckets = []
+    current = None
+    for row in rows:
+        start = row[0] - row[0] % bucket_seconds
+        if current is None or start != current[0]:
+            current = [start, []]
+            buckets.append(current)
+        current[1].append(row)
+
+    result = []
+    for start, members in buckets:
+        values = []
+        for i, field in enumerate(FIELDS, start=1):
+            measured = [row[i] for row in members if row[i] is not None]
+            if not measured:
+                values.append(None)
+            elif field == "risk":
+                values.append(max(measured))
+            else:
+                values.append(round(math.fsum(measured) / len(measured), 2))
+        result.append((start, len(members), *values))
+    return result
+
+
+class PatientHistory:
+    """
+    Each patient's assessments over time, in SQLite, stored by column.
+
+    New records go to a patient's open tail (one table row each, so an
+    append is one small insert). Once the tail holds SEGMENT_RECORDS it is
+    packed into a compressed segment: delta-encoded timestamps and one
+    typed array per field, so a record costs a few bytes rather than a row
+    of named values. A time-range query reads the patient's segments that
+    overlap the range (found through an index on their last timestamp)
+    plus their open tail. Several processes can share one database, as
+    with the reminder database.
+    """
+
+    def __init__(self, path, segment_records=SEGMENT_RECORDS):
+        self.path = path
+        self.segment_records = segment_records
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=BUSY_TIMEOUT_SECONDS,
+                                     check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        # History can lose its last few records in a power cut, not be corrupted
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+
+    def append(self, patient, values, at=None):
+        """
+        Records one assessment for a patient.
+        Args:
+            patient: Patient ID
+            values: FIELDS values (see assessment_values), None if missing
+            at: Unix time of the assessment (default: now)
+        """
+        self.extend([(patient, time.time() if at is None else at, values)])
+
+    def extend(self, entries):
+        """Records (patient, at, values) assessments in one transaction."""
+        rows = [(str(patient), int(at), *values) for patient, at, values in entries]
+        if not rows:
+            return
+        with self._lock, self._transaction():
+            self._conn.executemany(f"INSERT INTO records (patient, {COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                                   rows)
+            for patient in {row[0] for row in rows}:
+                self._seal_full_tail(patient)
+
+    def _seal_full_tail(self, patient):
+        count, = self._conn.execute("SELECT COUNT(*) FROM records WHERE patient = ?", (patient,)).fetchone()
+        while count >= self.segment_records:
+            tail = self._conn.execute(f"SELECT id, {COLUMNS} FROM records WHERE patient = ? ORDER BY time, id LIMIT ?",
+                                      (patient, self.segment_records)).fetchall()
+            rows = [row[1:] for row in tail]
+            self._conn.execute("INSERT INTO segments (patient, first, last, count, data) VALUES (?, ?, ?, ?, ?)",
+                               (patient, rows[0][0], rows[-1][0], len(rows), pack(rows)))
+            self._conn.executemany("DELETE FROM records WHERE id = ?", [(row[0],) for row in tail])
+            count -= len(rows)
+
+    def query(self, patient, since=None, until=None):
+        """
+        Returns a patient's (time, *FIELDS values) records with since <=
+        time <= until (Unix times; either bound may be None), by time.
+        """
+        since = -2 ** 63 if since is None else int(since)
+        until = 2 ** 63 - 1 if until is None else int(until)
+        patient = str(patient)
+        with self._lock:
+            segments = self._conn.execute(
+                "SELECT count, data FROM segments WHERE patient = ? AND last >= ? AND first <= ?",
+                (patient, since, until)).fetchall()
+            rows = self._conn.execute(
+                f"SELECT {COLUMNS} FROM records WHERE patient = ? AND time BETWEEN ? AND ? ORDER BY time, id",
+                (patient, since, until)).fetchall()
+        for count, data in segments:
+            rows.extend(row for row in zip(*unpack(data, count)) if since <= row[0] <= until)
+        rows.sort(key=lambda row: row[0])
+        return rows
+
+    def trends(self, patient, days=TREND_DAYS, now=None, current=None):
+        """
+        Summarizes a patient's last `days` of assessments for their report,
+        counting `current` (FIELDS values of an assessment not recorded
+        yet, if given) as the latest. Returns None without any; otherwise
+        {"days", "assessments", "risk": {level: count}, "fields": {field:
+        {"first", "last", "min", "max", "mean", "count"}}} for the fields
+        that were measured.
+        """
+        now = time.time() if now is None else now
+        rows = self.query(patient, since=now - days * 86400, until=now)
+        if current is not None:
+            rows.append((int(now), *current))
+        if not rows:
+            return None
+        risks = [row[2] for row in rows if row[2] is not None]
+        fields = {}
+        for i, field in enumerate(FIELDS, start=1):
+            measured = [row[i] for row in rows if row[i] is not None]
+            if measured and field != "risk":
+                fields[field] = {"first": measured[0], "last": measured[-1], "min": min(measured),
+                                 "max": max(measured), "mean": round(math.fsum(measured) / len(measured), 2),
+                                 "count": len(measured)}
+        return {"days": days, "assessments": len(rows),
+                "risk": {level: risks.count(i) for i, level in enumerate(RISK_LEVELS) if i in risks},
+                "fields": fields}
+
+    def stats(self):
+        """Returns the patients, records and stored bytes per record (counting the open tails' rows)."""
+        with self._lock:
+            patients, = self._conn.execute(
+                "SELECT COUNT(*) FROM (SELECT patient FROM segments UNION SELECT patient FROM records)").fetchone()
+            segments, packed, packed_bytes = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(count), 0), COALESCE(SUM(LENGTH(data)), 0) FROM segments").fetchone()
+            tail, = self._conn.execute("SELECT COUNT(*) FROM records").fetchone()
+            page_size, = self._conn.execute("PRAGMA page_size").fetchone()
+            pages, = self._conn.execute("PRAGMA page_count").fetchone()
+            free_pages, = self._conn.execute("PRAGMA freelist_count").fetchone()
+        records = packed + tail
+        file_bytes = (pages - free_pages) * page_size
+        return {"patients": patients, "records": records, "segments": segments, "open_records": tail,
+                "segment_bytes_per_record": round(packed_bytes / packed, 2) if packed else None,
+                "file_bytes": file_bytes,
+                "file_bytes_per_record": round(file_bytes / records, 2) if records else None}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    @contextmanager
+    def _transaction(self):
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+        self._conn.execute("COMMIT")
@@ -6,10 +6,111 @@ except ImportError:
     FPDF = None
 
 import os
+import time
 from datetime import datetime
 
+from logic import knowledge_base, metrics, vitals
+from logic.pdf_template import Block, heading_ops, new_document, write_line
+
+# Static parts of the report, laid out once per process (see pdf_template)
+HEADER = Block([
+    ("font", "B", 18), ("text", 15, "HEALTH ASSESSMENT REPORT", "C"), ("space", 5),
+] + heading_ops("PATIENT INFORMATION"))
+
+BMI_HEADING = Block(heading_ops("BMI ASSESSMENT"))
+RISK_HEADING = Block(heading_ops("RISK ASSESSMENT"))
+SYMPTOMS_HEADING = Block(heading_ops("SYMPTOMS & TREATMENT PLAN"))
+WELLNESS_HEADING = Block(heading_ops("MENTAL WELLNESS"))
+VITALS_HEADING = Block(heading_ops("VITAL SIGNS"))
+TRENDS_HEADING = Block(heading_ops("HEALTH TRENDS"))
+SUMMARY_HEADING = Block(heading_ops("HEALTH SUMMARY"))
+
+# Trend lines in the report, from the patient history's trends()
+TREND_LINES = [
+    ("bmi", "BMI", ""),
+    ("systolic", "Systolic blood pressure", " mmHg"),
+    ("diastolic", "Diastolic blood pressure", " mmHg"),
+    ("sugar", "Blood sugar", " mg/dL"),
+    ("heart_rate", "Heart rate", " bpm"),
+    ("symptoms", "Symptoms reported", ""),
+]
+
+RISK_RECOMMENDATIONS = {
+    "High": [
+        "- Seek immediate medical attention from a healthcare provider",
+        "- Contact your doctor or visit emergency room if symptoms worsen",
+        "- Monitor symptoms closely and keep a symptom diary",
+        "- Take prescribed medications as directed"
+    ],
+    "Medium": [
+        "- Schedule an appointment with your doctor within 1-2 days",
+        "- Monitor symptoms for any changes or worsening",
+        "- Follow prescribed medication regimen carefully",
+        "- Rest and stay hydrated"
+    ],
+    "Low": [
+        "- Maintain regular health check-ups with your doctor",
+        "- Continue healthy lifestyle habits",
+        "- Stay hydrated and get adequate rest",
+        "- Monitor for any new or worsening symptoms"
+    ],
+}
+
+GENERAL_RECOMMENDATIONS = [
+    "- Take all medications as prescribed by your healthcare provider",
+    "- Follow up with your doctor as recommended",
+    "- Keep track of any symptom changes or new symptoms",
+    "- Maintain a healthy diet and regular exercise routine"
+]
+
+DISCLAIMER = [
+    "This report is generated based on the symptoms and information provided.",
+    "It is for informational purposes only and is NOT a substitute for professional",
+    "medical advice, diagnosis, or treatment. Always seek the advice of your physician",
+    "or other qualified healthcare provider with any questions you may have regarding",
+    "a medical condition. Never disregard professional medical advice or delay seeking",
+    "it because of something you have read in this report.",
+]
+
+# Recommendations based on risk level, followed by the disclaimer
+CLOSING = {
+    risk: Block(
+        heading_ops("MEDICAL RECOMMENDATIONS")
+        + [("font", "", 11)]
+        + [("text", 6, rec) for rec in recommendations + GENERAL_RECOMMENDATIONS]
+        + [("space", 10), ("font", "B", 12), ("text", 8, "IMPORTANT MEDICAL DISCLAIMER"), ("font", "", 10)]
+        + [("text", 5, line) for line in DISCLAIMER]
+    )
+    for risk, recommendations in RISK_RECOMMENDATIONS.items()
+}
+
+def report_kwargs(data):
+    """
+    Builds generate_pdf keyword arguments from a report request payload.
+    """
+    symptoms = data.get("symptoms", [])
+    diagnoses = data.get("diagnoses", [])
+
+    # Ensure symptoms and diagnoses are lists
+    if not isinstance(symptoms, list):
+        symptoms = []
+    if not isinstance(diagnoses, list):
+        diagnoses = []
+
+    return {
+        "name": data.get("name", "N/A"),
+        "age": data.get("age", "N/A"),
+        "risk_level": data.get("risk_level", "Low"),
+        "symptoms": symptoms,
+        "diagnoses": diagnoses,
+        "bmi": data.get("bmi"),
+        "mental_wellness": data.get("mental_wellness"),
+        "vital_signs": data.get("vital_signs"),
+    }
+
 def generate_pdf(name, age, risk_level, symptoms=None, diagnoses=None, bmi=None, 
-                mental_wellness=None, vital_signs=None, output_path=None):
+                mental_wellness=None, vital_signs=None, history=None, output_path=None, as_bytes=False,
+                precompiled=True):
     """
     Generates a comprehensive PDF health report.
     Args:
@@ -18,81 +119,76 @@ def generate_pdf(name, age, risk_level, symptoms=None, diagnoses=None, bmi=None,
         risk_level: Risk level (Low/Medium/High)
         symptoms: List of selected symptoms
         diagnoses: List of diagnosis results with conditions and medicines
+            (looked up from the knowledge base when not provided)
         bmi: BMI information (value and category)
         mental_wellness: Mental wellness data (mood, sleep)
         vital_signs: Vital signs data (BP, sugar, heart rate)
-        output_path: Optional custom output path
+        history: The patient's trends (see PatientHistory.trends); shown
+            once there are at least two assessments
+        output_path: Optional custom output path, or a writable binary
+            buffer (anything with a write() method) to render into
+        as_bytes: Return the PDF as bytes instead of writing a file
+        precompiled: Reuse the precompiled static blocks (False lays every
+            block out again, as a baseline for benchmarks)
     Returns:
-        Path to the generated PDF file
+        The PDF bytes if as_bytes is set, otherwise output_path (the path
+        to the generated PDF file, or the buffer that was written to)
     """
     if FPDF is None:
         raise ImportError("fpdf2 library is required. Install with: pip install fpdf2")
     
-    if output_path is None:
+    if output_path is None and not as_bytes:
         output_path = f"health_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
     
-    pdf = FPDF()
+    layout_started = time.perf_counter()
+    if symptoms and not diagnoses:
+        diagnoses = knowledge_base.diagnose(symptoms)
+
+    pdf = new_document()
     pdf.add_page()
     
-    # Title
-    pdf.set_font("Helvetica", "B", size=18)
-    pdf.cell(200, 15, txt="HEALTH ASSESSMENT REPORT", ln=True, align='C')
-    pdf.ln(5)
-    
-    # Patient information
-    pdf.set_font("Helvetica", "B", size=14)
-    pdf.cell(200, 10, txt="PATIENT INFORMATION", ln=True)
-    pdf.line(10, pdf.get_y(), 200, pdf.get_y())
-    pdf.ln(5)
+    # Title and patient information
+    HEADER.render(pdf, precompiled)
     
     pdf.set_font("Helvetica", size=12)
-    pdf.cell(200, 8, txt=f"Name: {name}", ln=True)
-    pdf.cell(200, 8, txt=f"Age: {age}", ln=True)
-    pdf.cell(200, 8, txt=f"Report Date: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}", ln=True)
+    write_line(pdf, 8, f"Name: {name}")
+    write_line(pdf, 8, f"Age: {age}")
+    write_line(pdf, 8, f"Report Date: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
     pdf.ln(5)
     
     # BMI Information
     if bmi:
-        pdf.set_font("Helvetica", "B", size=14)
-        pdf.cell(200, 10, txt="BMI ASSESSMENT", ln=True)
-        pdf.line(10, pdf.get_y(), 200, pdf.get_y())
-        pdf.ln(5)
+        BMI_HEADING.render(pdf, precompiled)
         
         pdf.set_font("Helvetica", size=12)
-        pdf.cell(200, 8, txt=f"BMI Value: {bmi.get('value', 'N/A')}", ln=True)
-        pdf.cell(200, 8, txt=f"Category: {bmi.get('category', 'N/A')}", ln=True)
+        write_line(pdf, 8, f"BMI Value: {bmi.get('value', 'N/A')}")
+        write_line(pdf, 8, f"Category: {bmi.get('category', 'N/A')}")
         pdf.ln(5)
     
     # Risk Level
-    pdf.set_font("Helvetica", "B", size=14)
-    pdf.cell(200, 10, txt="RISK ASSESSMENT", ln=True)
-    pdf.line(10, pdf.get_y(), 200, pdf.get_y())
-    pdf.ln(5)
+    RISK_HEADING.render(pdf, precompiled)
     
     pdf.set_font("Helvetica", "B", size=12)
-    pdf.cell(200, 8, txt=f"Risk Level: {risk_level}", ln=True)
+    write_line(pdf, 8, f"Risk Level: {risk_level}")
     pdf.ln(5)
     
     # Symptoms and Diagnosis - This is the main section you wanted!
     if symptoms or diagnoses:
-        pdf.set_font("Helvetica", "B", size=14)
-        pdf.cell(200, 10, txt="SYMPTOMS & TREATMENT PLAN", ln=True)
-        pdf.line(10, pdf.get_y(), 200, pdf.get_y())
-        pdf.ln(5)
+        SYMPTOMS_HEADING.render(pdf, precompiled)
         
         if symptoms:
             pdf.set_font("Helvetica", "B", size=12)
-            pdf.cell(200, 8, txt="Selected Symptoms:", ln=True)
+            write_line(pdf, 8, "Selected Symptoms:")
             pdf.set_font("Helvetica", size=11)
             
             # Display symptoms clearly numbered
             for i, symptom in enumerate(symptoms, 1):
-                pdf.cell(200, 6, txt=f"  {i}. {symptom}", ln=True)
+                write_line(pdf, 6, f"  {i}. {symptom}")
             pdf.ln(3)
         
         if diagnoses:
             pdf.set_font("Helvetica", "B", size=12)
-            pdf.cell(200, 8, txt="Recommended Medicines & Treatment:", ln=True)
+            write_line(pdf, 8, "Recommended Medicines & Treatment:")
             pdf.set_font("Helvetica", size=11)
             
             # Group diagnoses by condition and show all medicines
@@ -105,55 +201,49 @@ def generate_pdf(name, age, risk_level, symptoms=None, diagnoses=None, bmi=None,
                 condition_medicines[condition].add(medicine)
             
             for i, (condition, medicines) in enumerate(condition_medicines.items(), 1):
-                pdf.cell(200, 6, txt=f"  {i}. Condition: {condition}", ln=True)
+                write_line(pdf, 6, f"  {i}. Condition: {condition}")
                 for medicine in medicines:
-                    pdf.cell(200, 5, txt=f"     - Medicine: {medicine}", ln=True)
+                    write_line(pdf, 5, f"     - Medicine: {medicine}")
                 pdf.ln(2)
         
         # Add detailed symptom-medicine mapping
         if diagnoses:
             pdf.set_font("Helvetica", "B", size=12)
-            pdf.cell(200, 8, txt="Detailed Symptom-Medicine Mapping:", ln=True)
+            write_line(pdf, 8, "Detailed Symptom-Medicine Mapping:")
             pdf.set_font("Helvetica", size=10)
             
             for i, diagnosis in enumerate(diagnoses, 1):
                 symptom = diagnosis.get('symptom', 'Unknown')
                 condition = diagnosis.get('condition', 'Unknown')
                 medicine = diagnosis.get('medicine', 'Consult Doctor')
-                pdf.cell(200, 5, txt=f"  {i}. {symptom} -> {condition} -> {medicine}", ln=True)
+                write_line(pdf, 5, f"  {i}. {symptom} -> {condition} -> {medicine}")
             pdf.ln(5)
     
     # Mental Wellness
     if mental_wellness:
-        pdf.set_font("Helvetica", "B", size=14)
-        pdf.cell(200, 10, txt="MENTAL WELLNESS", ln=True)
-        pdf.line(10, pdf.get_y(), 200, pdf.get_y())
-        pdf.ln(5)
+        WELLNESS_HEADING.render(pdf, precompiled)
         
         pdf.set_font("Helvetica", size=12)
         mood = mental_wellness.get('mood', 'N/A')
         sleep = mental_wellness.get('sleep', 'N/A')
-        pdf.cell(200, 8, txt=f"Current Mood: {mood}", ln=True)
-        pdf.cell(200, 8, txt=f"Sleep Duration: {sleep} hours per night", ln=True)
+        write_line(pdf, 8, f"Current Mood: {mood}")
+        write_line(pdf, 8, f"Sleep Duration: {sleep} hours per night")
         
         # Add mental health recommendations
         pdf.set_font("Helvetica", "B", size=11)
-        pdf.cell(200, 6, txt="Mental Health Recommendations:", ln=True)
+        write_line(pdf, 6, "Mental Health Recommendations:")
         pdf.set_font("Helvetica", size=10)
         if mood == "Stressed":
-            pdf.cell(200, 5, txt="  - Practice relaxation techniques", ln=True)
-            pdf.cell(200, 5, txt="  - Consider stress management counseling", ln=True)
+            write_line(pdf, 5, "  - Practice relaxation techniques")
+            write_line(pdf, 5, "  - Consider stress management counseling")
         if isinstance(sleep, (int, float)) and sleep < 7:
-            pdf.cell(200, 5, txt="  - Aim for 7-9 hours of sleep per night", ln=True)
-            pdf.cell(200, 5, txt="  - Establish a regular sleep schedule", ln=True)
+            write_line(pdf, 5, "  - Aim for 7-9 hours of sleep per night")
+            write_line(pdf, 5, "  - Establish a regular sleep schedule")
         pdf.ln(5)
     
     # Vital Signs
     if vital_signs:
-        pdf.set_font("Helvetica", "B", size=14)
-        pdf.cell(200, 10, txt="VITAL SIGNS", ln=True)
-        pdf.line(10, pdf.get_y(), 200, pdf.get_y())
-        pdf.ln(5)
+        VITALS_HEADING.render(pdf, precompiled)
         
         pdf.set_font("Helvetica", size=12)
         bp = vital_signs.get('blood_pressure', 'N/A')
@@ -161,113 +251,82 @@ def generate_pdf(name, age, risk_level, symptoms=None, diagnoses=None, bmi=None,
         hr = vital_signs.get('heart_rate', 'N/A')
         vision = vital_signs.get('vision', 'N/A')
         
-        pdf.cell(200, 8, txt=f"Blood Pressure: {bp} mmHg", ln=True)
-        pdf.cell(200, 8, txt=f"Blood Sugar Level: {sugar} mg/dL", ln=True)
-        pdf.cell(200, 8, txt=f"Heart Rate: {hr} bpm", ln=True)
-        pdf.cell(200, 8, txt=f"Vision Issues: {vision}", ln=True)
+        write_line(pdf, 8, f"Blood Pressure: {bp} mmHg")
+        write_line(pdf, 8, f"Blood Sugar Level: {sugar} mg/dL")
+        write_line(pdf, 8, f"Heart Rate: {hr} bpm")
+        write_line(pdf, 8, f"Vision Issues: {vision}")
         
         # Add vital signs analysis
         pdf.set_font("Helvetica", "B", size=11)
-        pdf.cell(200, 6, txt="Vital Signs Analysis:", ln=True)
+        write_line(pdf, 6, "Vital Signs Analysis:")
         pdf.set_font("Helvetica", size=10)
         
+        # Readings like "120/80" and "95.5" count; unreadable ones are skipped
+        bp_level = vitals.blood_pressure_level(bp)
+        if bp_level == "high":
+            write_line(pdf, 5, "  - Blood pressure is HIGH - consult doctor immediately")
+        elif bp_level == "low":
+            write_line(pdf, 5, "  - Blood pressure is LOW - monitor closely")
+        elif bp_level == "normal":
+            write_line(pdf, 5, "  - Blood pressure is within normal range")
+
         try:
-            if bp != 'N/A' and bp.isdigit():
-                bp_val = int(bp)
-                if bp_val > 140:
-                    pdf.cell(200, 5, txt="  - Blood pressure is HIGH - consult doctor immediately", ln=True)
-                elif bp_val < 90:
-                    pdf.cell(200, 5, txt="  - Blood pressure is LOW - monitor closely", ln=True)
-                else:
-                    pdf.cell(200, 5, txt="  - Blood pressure is within normal range", ln=True)
-            
-            if sugar != 'N/A' and sugar.isdigit():
-                sugar_val = int(sugar)
-                if sugar_val > 180:
-                    pdf.cell(200, 5, txt="  - Blood sugar is HIGH - consult doctor", ln=True)
-                elif sugar_val < 70:
-                    pdf.cell(200, 5, txt="  - Blood sugar is LOW - monitor closely", ln=True)
-                else:
-                    pdf.cell(200, 5, txt="  - Blood sugar is within normal range", ln=True)
-        except:
-            pass
+            sugar_level = vitals.level("sugar", vitals.parse_number(sugar))
+        except ValueError:
+            sugar_level = None
+        if sugar_level == "high":
+            write_line(pdf, 5, "  - Blood sugar is HIGH - consult doctor")
+        elif sugar_level == "low":
+            write_line(pdf, 5, "  - Blood sugar is LOW - monitor closely")
+        elif sugar_level == "normal":
+            write_line(pdf, 5, "  - Blood sugar is within normal range")
         
         pdf.ln(5)
     
+    # Trends from the patient's earlier assessments
+    if history and history.get("assessments", 0) > 1:
+        TRENDS_HEADING.render(pdf, precompiled)
+
+        pdf.set_font("Helvetica", size=12)
+        write_line(pdf, 8, f"Assessments in the last {history['days']} days: {history['assessments']}")
+        pdf.set_font("Helvetica", size=10)
+        for field, label, unit in TREND_LINES:
+            trend = history["fields"].get(field)
+            if trend:
+                write_line(pdf, 5, f"  - {label}: {trend['first']:g} -> {trend['last']:g}{unit} "
+                                   f"(range {trend['min']:g}-{trend['max']:g}, {trend['count']} readings)")
+        if history["risk"]:
+            counts = ", ".join(f"{level} {count}" for level, count in history["risk"].items())
+            write_line(pdf, 5, f"  - Risk levels: {counts}")
+        pdf.ln(5)
+
     # Comprehensive Health Summary
-    pdf.set_font("Helvetica", "B", size=14)
-    pdf.cell(200, 10, txt="HEALTH SUMMARY", ln=True)
-    pdf.line(10, pdf.get_y(), 200, pdf.get_y())
-    pdf.ln(5)
+    SUMMARY_HEADING.render(pdf, precompiled)
     
     pdf.set_font("Helvetica", size=11)
     if symptoms:
-        pdf.cell(200, 6, txt=f"Total Symptoms Reported: {len(symptoms)}", ln=True)
+        write_line(pdf, 6, f"Total Symptoms Reported: {len(symptoms)}")
     if diagnoses:
         conditions = set(d.get('condition', 'Unknown') for d in diagnoses)
         medicines = set(d.get('medicine', 'Unknown') for d in diagnoses)
-        pdf.cell(200, 6, txt=f"Medical Conditions Identified: {len(conditions)}", ln=True)
-        pdf.cell(200, 6, txt=f"Medicines Recommended: {len(medicines)}", ln=True)
+        write_line(pdf, 6, f"Medical Conditions Identified: {len(conditions)}")
+        write_line(pdf, 6, f"Medicines Recommended: {len(medicines)}")
     
     pdf.ln(5)
     
-    # Recommendations based on risk level
-    pdf.set_font("Helvetica", "B", size=14)
-    pdf.cell(200, 10, txt="MEDICAL RECOMMENDATIONS", ln=True)
-    pdf.line(10, pdf.get_y(), 200, pdf.get_y())
-    pdf.ln(5)
-    
-    pdf.set_font("Helvetica", size=11)
-    recommendations = []
-    
-    if risk_level == "High":
-        recommendations.extend([
-            "- Seek immediate medical attention from a healthcare provider",
-            "- Contact your doctor or visit emergency room if symptoms worsen",
-            "- Monitor symptoms closely and keep a symptom diary",
-            "- Take prescribed medications as directed"
-        ])
-    elif risk_level == "Medium":
-        recommendations.extend([
-            "- Schedule an appointment with your doctor within 1-2 days",
-            "- Monitor symptoms for any changes or worsening",
-            "- Follow prescribed medication regimen carefully",
-            "- Rest and stay hydrated"
-        ])
-    else:
-        recommendations.extend([
-            "- Maintain regular health check-ups with your doctor",
-            "- Continue healthy lifestyle habits",
-            "- Stay hydrated and get adequate rest",
-            "- Monitor for any new or worsening symptoms"
-        ])
-    
-    recommendations.extend([
-        "- Take all medications as prescribed by your healthcare provider",
-        "- Follow up with your doctor as recommended",
-        "- Keep track of any symptom changes or new symptoms",
-        "- Maintain a healthy diet and regular exercise routine"
-    ])
-    
-    for rec in recommendations:
-        pdf.cell(200, 6, txt=rec, ln=True)
-    
-    pdf.ln(10)
-    
-    # Disclaimer
-    pdf.set_font("Helvetica", "B", size=12)
-    pdf.cell(200, 8, txt="IMPORTANT MEDICAL DISCLAIMER", ln=True)
-    pdf.set_font("Helvetica", size=10)
-    pdf.cell(200, 5, txt="This report is generated based on the symptoms and information provided.", ln=True)
-    pdf.cell(200, 5, txt="It is for informational purposes only and is NOT a substitute for professional", ln=True)
-    pdf.cell(200, 5, txt="medical advice, diagnosis, or treatment. Always seek the advice of your physician", ln=True)
-    pdf.cell(200, 5, txt="or other qualified healthcare provider with any questions you may have regarding", ln=True)
-    pdf.cell(200, 5, txt="a medical condition. Never disregard professional medical advice or delay seeking", ln=True)
-    pdf.cell(200, 5, txt="it because of something you have read in this report.", ln=True)
+    # Recommendations based on risk level, and the disclaimer
+    CLOSING.get(risk_level, CLOSING["Low"]).render(pdf, precompiled)
+    metrics.observe_span("pdf_layout", time.perf_counter() - layout_started)
     
     # Save the PDF
     try:
-        pdf.output(output_path)
-        return output_path
+        with metrics.span("pdf_output"):
+            if as_bytes:
+                return bytes(pdf.output())
+            if hasattr(output_path, "write"):
+                output_path.write(pdf.output())
+                return output_path
+            pdf.output(output_path)
+            return output_path
     except Exception as e:
         raise Exception(f"Failed to save PDF: {str(e)}")
\ No newline at end of file
@@ -0,0 +1,111 @@
+try:
+    from fpdf import FPDF
+    from fpdf.enums import XPos, YPos
+except ImportError:
+    FPDF = None
+
+import threading
+
+FONT_FAMILY = "Helvetica"
+PAGE_TEXT_WIDTH = 200
+
+
+def new_document():
+    """
+    Creates a report document with its fonts registered in a fixed order,
+    so font references inside precompiled blocks (/F1, /F2) are valid in
+    every document.
+    """
+    pdf = FPDF()
+    pdf.set_font(FONT_FAMILY, "B")
+    pdf.set_font(FONT_FAMILY, "")
+    return pdf
+
+
+def write_line(pdf, h, text, align=""):
+    """Writes one full-width line of text and moves to the next line."""
+    pdf.cell(PAGE_TEXT_WIDTH, h, txt=text, align=align, new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+
+
+def section_rule(pdf):
+    """Draws the horizontal rule under a section heading."""
+    pdf.line(10, pdf.get_y(), 200, pdf.get_y())
+
+
+class Block:
+    """
+    A run of report content that is the same for every patient.
+
+    The first time a block is placed, its operations are drawn once on a
+    scratch document and the resulting PDF content stream is kept. Every
+    later placement copies those bytes into the page, shifted to the
+    current position, instead of laying the text out again.
+
+    ops is a sequence of:
+        ("font", style, size)       select Helvetica in the given style/size
+        ("text", h, text[, align])  a full-width line of text
+        ("rule",)                   the horizontal rule under headings
+        ("space", h)                vertical space (pdf.ln)
+    """
+
+    def __init__(self, ops):
+        self.ops = tuple(ops)
+        self._compiled = None
+        self._lock = threading.Lock()
+
+    def draw(self, pdf):
+        """Lays the block out operation by operation."""
+        for op in self.ops:
+            kind = op[0]
+            if kind == "font":
+                pdf.set_font(FONT_FAMILY, op[1], size=op[2])
+            elif kind == "text":
+                write_line(pdf, *op[1:])
+            elif kind == "rule":
+                section_rule(pdf)
+            elif kind == "space":
+                pdf.ln(op[1])
+
+    def _compile(self):
+        with self._lock:
+            if self._compiled is None:
+                pdf = new_document()
+                pdf.add_page()
+                # Forget the selected font so the block's first font
+                # operation is always written into the recorded stream
+                pdf.font_family = ""
+                start_y = pdf.y
+                offset = len(pdf.pages[pdf.page].contents)
+                self.draw(pdf)
+                content = bytes(pdf.pages[pdf.page].contents[offset:])
+                last_font = next(op for op in reversed(self.ops) if op[0] == "font")
+                self._compiled = (content, start_y, pdf.y - start_y, last_font[1], last_font[2])
+        return self._compiled
+
+    def place(self, pdf):
+        """Writes the precompiled block at the current position."""
+        content, start_y, height, style, size = self._compiled or self._compile()
+        if pdf.auto_page_break and pdf.y + height > pdf.page_break_trigger:
+            # The block runs onto the next page: lay it out normally so it
+            # breaks at exactly the same line as before
+            self.draw(pdf)
+            return
+
+        # Select the block's final font first: the graphics state restored
+        # by "Q" below then matches what fpdf believes is selected
+        pdf.set_font(FONT_FAMILY, style, size=size)
+        offset = (start_y - pdf.y) * pdf.k
+        pdf._out(f"q 1 0 0 1 0 {offset:.2f} cm")
+        pdf._out(content.rstrip(b"\n"))
+        pdf._out("Q")
+        pdf.set_xy(pdf.l_margin, pdf.y + height)
+
+    def render(self, pdf, precompiled=True):
+        if precompiled:
+            self.place(pdf)
+        else:
+            self.draw(pdf)
+
+
+def heading_ops(title):
+    return [("font", "B", 14), ("text", 10, title), ("rule",), ("space", 5)]
@@ -0,0 +1,134 @@
+import itertools
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+DEFAULT_INTERVAL_SECONDS = 0.01
+MAX_PROFILE_SECONDS = 60
+
+# Frames in these directories are named relative to them
+_PATH_ROOTS = sorted({os.path.dirname(os.path.dirname(os.path.abspath(__file__)))}
+                     | {p for p in sys.path if p and os.path.isdir(p)}, key=len, reverse=True)
+
+
+def frame_name(code):
+    """Returns "function (file:line)" for a code object, with a short file path."""
+    path = code.co_filename
+    for root in _PATH_ROOTS:
+        if path.startswith(root + os.sep):
+            path = path[len(root) + 1:]
+            break
+    return f"{code.co_name} ({path}:{code.co_firstlineno})".replace(";", ":")
+
+
+def collapse(frame):
+    """Returns a frame's stack in collapsed form: outermost first, joined by ";"."""
+    names = []
+    while frame is not None:
+        names.append(frame_name(frame.f_code))
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+class Sampler:
+    """
+    Samples the Python stacks of running threads from a background thread.
+
+    Every interval the sampler reads each thread's current frame, so the
+    profiled code runs untouched and the cost is paid by the sampler
+    thread alone. thread_ids limits sampling to a set of threads that
+    may change while sampling (None samples every thread but the
+    sampler and those in ignored).
+    """
+
+    def __init__(self, interval=DEFAULT_INTERVAL_SECONDS, thread_ids=None, ignored=()):
+        self.interval = interval
+        self.thread_ids = thread_ids
+        self.ignored = set(ignored)
+        self.stacks = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="profiler-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def collapsed(self):
+        """Returns the samples as collapsed stacks ("frame;frame;frame count" lines)."""
+        with self._lock:
+            return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            watched = self.thread_ids
+            if watched is not None and not watched:
+                continue
+            frames = sys._current_frames()
+            with self._lock:
+                for ident, frame in frames.items():
+                    if ident == own or ident in self.ignored:
+                        continue
+                    if watched is not None and ident not in watched:
+                        continue
+                    self.stacks[collapse(frame)] += 1
+                self.samples += 1
+
+
+def profile(seconds, interval=DEFAULT_INTERVAL_SECONDS, ignored=()):
+    """Samples every thread for a number of seconds; returns the Sampler."""
+    sampler = Sampler(interval, ignored=ignored)
+    sampler.start()
+    try:
+        time.sleep(seconds)
+    finally:
+        sampler.stop()
+    return sampler
+
+
+class RouteProfile:
+    """
+    Samples the threads handling every Nth request to one route, until
+    max_requests requests have been profiled. Call enter() as a request
+    starts and exit() when it has been handled.
+    """
+
+    def __init__(self, route, every=1, max_requests=100, interval=DEFAULT_INTERVAL_SECONDS):
+        self.route = route
+        self.every = every
+        self.max_requests = max_requests
+        self.profiled = 0
+        self.sampler = Sampler(interval, thread_ids=set())
+        self._seen = itertools.count()
+        self._lock = threading.Lock()
+
+    @property
+    def done(self):
+        return self.profiled >= self.max_requests
+
+    def enter(self, route):
+        """Starts sampling the current thread if this request is picked; returns whether it was."""
+        if route != self.route or next(self._seen) % self.every:
+            return False
+        with self._lock:
+            if self.done:
+                return False
+            self.profiled += 1
+        self.sampler.thread_ids.add(threading.get_ident())
+        return True
+
+    def exit(self):
+        self.sampler.thread_ids.discard(threading.get_ident())
+
+    def status(self):
+        return {"route": self.route, "every": self.every, "max_requests": self.max_requests,
+                "profiled_requests": self.profiled, "samples": self.sampler.samples, "done": self.done}
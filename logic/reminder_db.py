@@ -0,0 +1,140 @@
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+# AUTOINCREMENT keeps IDs increasing even after the newest reminder is
+# deleted, so other processes can pick up new rows by ID alone
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS reminders (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user TEXT NOT NULL,
+    name TEXT NOT NULL,
+    minute_of_day INTEGER NOT NULL,
+    recurrence TEXT NOT NULL,
+    weekday INTEGER,
+    next_fire REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS deliveries (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user TEXT NOT NULL,
+    fired_at REAL NOT NULL,
+    message TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS deliveries_by_user ON deliveries (user);
+"""
+
+COLUMNS = "user, name, minute_of_day, recurrence, weekday, next_fire"
+
+# Longest a write waits for another process's transaction to finish
+BUSY_TIMEOUT_SECONDS = 10
+
+
+class ReminderDatabase:
+    """
+    Durable reminder storage in SQLite, in write-ahead-log mode.
+
+    Each call below is one transaction, so a whole /set_reminder medicine
+    list or a whole batch of fired reminders costs a single commit (and a
+    single fsync of the WAL). Several processes can share one database:
+    web workers add reminders and read deliveries while a scheduler service
+    fires them (see logic.reminder_service).
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=BUSY_TIMEOUT_SECONDS,
+                                     check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=FULL")
+        self._conn.executescript(SCHEMA)
+
+    def insert_many(self, rows):
+        """
+        Inserts (user, name, minute_of_day, recurrence, weekday, next_fire) rows.
+        Returns:
+            The IDs assigned to the rows, in order
+        """
+        with self._lock, self._transaction():
+            sql = f"INSERT INTO reminders ({COLUMNS}) VALUES (?, ?, ?, ?, ?, ?)"
+            return [self._conn.execute(sql, row).lastrowid for row in rows]
+
+    def record_fired(self, rearmed, finished):
+        """
+        Saves the outcome of a batch of fired reminders.
+        Args:
+            rearmed: (next_fire, id) pairs for recurring reminders
+            finished: IDs of one-off reminders that are done
+        """
+        if not rearmed and not finished:
+            return
+        with self._lock, self._transaction():
+            self._conn.executemany("UPDATE reminders SET next_fire = ? WHERE id = ?", rearmed)
+            self._conn.executemany("DELETE FROM reminders WHERE id = ?", [(i,) for i in finished])
+
+    def delete(self, reminder_id):
+        with self._lock, self._transaction():
+            self._conn.execute("DELETE FROM reminders WHERE id = ?", (reminder_id,))
+
+    def load_since(self, last_id=0):
+        """Returns the stored reminders with IDs above last_id as row tuples, in ID order."""
+        with self._lock:
+            return self._conn.execute(f"SELECT id, {COLUMNS} FROM reminders WHERE id > ? ORDER BY id",
+                                      (last_id,)).fetchall()
+
+    def add_deliveries(self, deliveries, expire_before):
+        """
+        Queues (user, fired_at, message) deliveries for web workers to pick
+        up, and drops those that fired before expire_before.
+        """
+        with self._lock, self._transaction():
+            self._conn.execute("DELETE FROM deliveries WHERE fired_at < ?", (expire_before,))
+            self._conn.executemany("INSERT INTO deliveries (user, fired_at, message) VALUES (?, ?, ?)",
+                                   deliveries)
+
+    def deliveries_since(self, last_id):
+        """Returns (id, user, fired_at, message) rows queued after last_id."""
+        with self._lock:
+            return self._conn.execute("SELECT id, user, fired_at, message FROM deliveries WHERE id > ? ORDER BY id",
+                                      (last_id,)).fetchall()
+
+    def take_deliveries(self, user):
+        """Removes and returns a user's queued (fired_at, message) deliveries."""
+        with self._lock, self._transaction():
+            return self._conn.execute("DELETE FROM deliveries WHERE user = ? RETURNING fired_at, message",
+                                      (user,)).fetchall()
+
+    def claim_deliveries(self, ids):
+        """
+        Removes the given deliveries. Returns the (user, fired_at, message)
+        rows actually removed, i.e. those no other process claimed first.
+        """
+        if not ids:
+            return []
+        claimed = []
+        with self._lock, self._transaction():
+            for delivery_id in ids:
+                claimed.extend(self._conn.execute(
+                    "DELETE FROM deliveries WHERE id = ? RETURNING user, fired_at, message", (delivery_id,)))
+        return claimed
+
+    def compact(self):
+        """Folds the write-ahead log back into the database file and truncates it."""
+        with self._lock:
+            self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    @contextmanager
+    def _transaction(self):
+        # IMMEDIATE takes the write lock up front, so transactions from
+        # several processes queue up instead of failing to upgrade
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+        self._conn.execute("COMMIT")
@@ -0,0 +1,139 @@
+import threading
+import time
+
+from logic.reminders import (DELIVERY_WINDOW_SECONDS, Mailbox, Reminder, ReminderStore,
+                             reminder_specs)
+
+# How often the scheduler service looks for reminders added by web workers
+SYNC_INTERVAL_SECONDS = 1
+
+# How often a web worker looks for fired reminders to push to its streams
+DELIVERY_POLL_SECONDS = 0.5
+
+
+class DatabaseMailbox:
+    """Scheduler-side mailbox: queues fired reminders in the shared database."""
+
+    def __init__(self, db, delivery_window=DELIVERY_WINDOW_SECONDS):
+        self.db = db
+        self.delivery_window = delivery_window
+
+    def deliver(self, deliveries):
+        if deliveries:
+            self.db.add_deliveries(deliveries, expire_before=time.time() - self.delivery_window)
+
+    def subscriber_count(self):
+        return 0
+
+
+class ReminderClient:
+    """
+    A web worker's handle on reminders owned by the scheduler service.
+
+    With several web workers (gunicorn, or Flask's debug reloader) a
+    ReminderStore per worker would fire every reminder once per worker and
+    hide reminders set on one worker from the others. Instead one scheduler
+    service (run_scheduler, started by `python run.py --scheduler`) fires
+    reminders, and the workers only share its SQLite database.
+
+    Offers the parts of the ReminderStore interface the routes use. New
+    reminders are written straight to the database. Fired reminders are
+    read back from the deliveries table: collect_due takes a user's queued
+    deliveries, and one polling thread per worker claims new deliveries
+    for the users with a stream open on this worker and pushes them into
+    their subscriptions.
+    """
+
+    def __init__(self, db, delivery_window=DELIVERY_WINDOW_SECONDS, poll_interval=DELIVERY_POLL_SECONDS):
+        self.db = db
+        self.mailbox = Mailbox(delivery_window)
+        self.poll_interval = poll_interval
+        self._last_delivery_id = 0
+        self._thread = None
+        self._stopped = threading.Event()
+
+    def add_many(self, user, items, now=None):
+        """Adds (name, time_str, recurrence) reminders; see ReminderStore.add_many."""
+        specs = reminder_specs(items, now)
+        ids = self.db.insert_many([(user, *spec) for spec in specs])
+        return [Reminder(reminder_id, user, *spec) for reminder_id, spec in zip(ids, specs)]
+
+    def add(self, user, name, time_str, recurrence="daily", now=None):
+        return self.add_many(user, [(name, time_str, recurrence)], now)[0]
+
+    def collect_due(self, user, now=None):
+        now = time.time() if now is None else now
+        return self.mailbox.undelivered(self.db.take_deliveries(user), now)
+
+    def subscribe(self, user, now=None, subscription=None):
+        """See Mailbox.subscribe; the backlog also holds the user's queued deliveries."""
+        now = time.time() if now is None else now
+        # Subscribe first: anything queued after the backlog is taken is
+        # then picked up by the polling thread
+        subscription, backlog = self.mailbox.subscribe(user, now, subscription)
+        return subscription, backlog + self.mailbox.undelivered(self.db.take_deliveries(user), now)
+
+    def unsubscribe(self, user, subscription):
+        self.mailbox.unsubscribe(user, subscription)
+
+    def subscriber_count(self):
+        return self.mailbox.subscriber_count()
+
+    def start(self):
+        if self._thread is not None:
+            return
+        # Only deliveries queued from now on are pushed; older ones are
+        # handed out by collect_due and subscribe
+        rows = self.db.deliveries_since(0)
+        self._last_delivery_id = rows[-1][0] if rows else 0
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, name="reminder-deliveries", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        thread, self._thread = self._thread, None
+        if thread is not None:
+            thread.join()
+
+    def poll(self):
+        """Pushes newly queued deliveries for subscribed users; returns how many."""
+        rows = self.db.deliveries_since(self._last_delivery_id)
+        if not rows:
+            return 0
+        self._last_delivery_id = rows[-1][0]
+        subscribed = self.mailbox.subscribed_users()
+        # Claiming deletes the row, so a delivery reaches only one worker
+        claimed = self.db.claim_deliveries([row[0] for row in rows if row[1] in subscribed])
+        self.mailbox.deliver(claimed)
+        return len(claimed)
+
+    def _run(self):
+        while not self._stopped.wait(self.poll_interval):
+            try:
+                self.poll()
+            except Exception as e:
+                print(f"Reminder delivery poll failed: {e}")
+
+
+def run_scheduler(db, on_fire=None, sync_interval=SYNC_INTERVAL_SECONDS, stop=None):
+    """
+    Runs the scheduler service until stop (a threading.Event) is set or the
+    process is interrupted: fires every reminder in the database, queueing
+    deliveries for the web workers, and picks up new reminders as they are
+    added.
+    """
+    store = ReminderStore(on_fire=on_fire, db=db, mailbox=DatabaseMailbox(db))
+    store.start()
+    stop = stop or threading.Event()
+    try:
+        while not stop.wait(sync_interval):
+            try:
+                store.sync()
+            except Exception as e:
+                print(f"Reminder sync failed: {e}")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        store.stop()
+    return store
@@ -0,0 +1,451 @@
+import gc
+import heapq
+import itertools
+import queue
+import threading
+import time
+from collections import deque
+from datetime import datetime, timedelta
+
+from logic import metrics
+
+# Longest the scheduler sleeps without re-checking the wall clock, so a
+# system clock change can't delay reminders indefinitely
+MAX_SLEEP_SECONDS = 60
+
+
+RECURRENCES = ("once", "daily", "weekly")
+
+# How long a fired reminder waits in a user's inbox to be collected
+DELIVERY_WINDOW_SECONDS = 60
+
+# How often the reminder database's write-ahead log is compacted
+COMPACT_INTERVAL_SECONDS = 3600
+
+
+def parse_minute_of_day(time_str):
+    """Converts "%H:%M" to minutes after midnight."""
+    hour, minute = map(int, time_str.split(":"))
+    return hour * 60 + minute
+
+
+def next_fire_time(minute_of_day, now=None, weekday=None):
+    """
+    Returns the timestamp of the next occurrence of minute_of_day (on the
+    given weekday, if any). A reminder set during its own minute fires
+    right away, as it did with the old minute scan.
+    """
+    now = time.time() if now is None else now
+    current = datetime.fromtimestamp(now)
+    candidate = current.replace(hour=minute_of_day // 60, minute=minute_of_day % 60, second=0, microsecond=0)
+    if weekday is not None:
+        candidate += timedelta(days=(weekday - candidate.weekday()) % 7)
+    if candidate.timestamp() + 60 <= now:
+        candidate += timedelta(days=1 if weekday is None else 7)
+    return candidate.timestamp()
+
+
+class Reminder:
+    """One medicine reminder. Slotted to keep millions of them small."""
+
+    __slots__ = ("id", "user", "name", "minute_of_day", "recurrence", "weekday", "next_fire")
+
+    def __init__(self, id, user, name, minute_of_day, recurrence, weekday, next_fire):
+        self.id = id
+        self.user = user
+        self.name = name
+        self.minute_of_day = minute_of_day
+        self.recurrence = recurrence
+        self.weekday = weekday
+        self.next_fire = next_fire
+
+    @property
+    def time(self):
+        return f"{self.minute_of_day // 60:02d}:{self.minute_of_day % 60:02d}"
+
+    @property
+    def message(self):
+        return f"It's time to take your medicine: {self.name}"
+
+    def rearm(self, fired_at):
+        """Moves next_fire past fired_at; returns False for one-off reminders."""
+        if self.recurrence == "once":
+            return False
+        self.next_fire = next_fire_time(self.minute_of_day, fired_at + 60, self.weekday)
+        return True
+
+
+class ReminderScheduler:
+    """
+    Fires reminders at their due time from a min-heap keyed by fire time.
+
+    A single background thread sleeps until the earliest reminder is due
+    (or until an earlier one is added), pops every due entry in O(log n)
+    each and passes them to on_fire as one batch, outside the lock. Adding
+    a reminder only holds the lock for one heap push.
+    """
+
+    def __init__(self, on_fire):
+        self.on_fire = on_fire
+        self._heap = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._thread = None
+        self._stopped = False
+
+    def __len__(self):
+        with self._cond:
+            return len(self._heap)
+
+    def schedule(self, fire_at, item):
+        """Queues item to be passed to on_fire at timestamp fire_at."""
+        with self._cond:
+            heapq.heappush(self._heap, (fire_at, next(self._seq), item))
+            # Wake the thread only if this is now the earliest reminder
+            if self._heap[0][2] is item:
+                self._cond.notify()
+
+    def schedule_many(self, entries):
+        """Queues (fire_at, item) pairs in one O(n) heapify."""
+        with self._cond:
+            self._heap.extend((fire_at, next(self._seq), item) for fire_at, item in entries)
+            heapq.heapify(self._heap)
+            self._cond.notify()
+
+    def pop_due(self, now=None):
+        """Removes and returns the (fire_at, item) pairs due at or before now."""
+        now = time.time() if now is None else now
+        due = []
+        with self._cond:
+            while self._heap and self._heap[0][0] <= now:
+                fire_at, _, item = heapq.heappop(self._heap)
+                due.append((fire_at, item))
+        return due
+
+    def fire_due(self, now=None):
+        """Fires every due item; returns how many fired."""
+        with metrics.span("reminder_scan"):
+            due = self.pop_due(now)
+        if due:
+            try:
+                self.on_fire(due)
+            except Exception as e:
+                print(f"Reminder callback failed: {e}")
+        return len(due)
+
+    def start(self):
+        with self._cond:
+            if self._thread is not None:
+                return
+            self._stopped = False
+            self._thread = threading.Thread(target=self._run, name="reminder-scheduler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        with self._cond:
+            self._stopped = True
+            self._cond.notify()
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            thread.join()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                if self._stopped:
+                    return
+                if not self._heap:
+                    self._cond.wait(MAX_SLEEP_SECONDS)
+                    continue
+                delay = self._heap[0][0] - time.time()
+                if delay > 0:
+                    self._cond.wait(min(delay, MAX_SLEEP_SECONDS))
+                    continue
+            self.fire_due()
+
+
+def reminder_specs(items, now=None):
+    """
+    Validates (name, time_str, recurrence) items and works out when each
+    first fires. Raises ValueError for an unknown recurrence.
+    Returns:
+        (name, minute_of_day, recurrence, weekday, next_fire) tuples
+    """
+    now = time.time() if now is None else now
+    specs = []
+    for name, time_str, recurrence in items:
+        if recurrence not in RECURRENCES:
+            raise ValueError(f"Recurrence must be one of: {', '.join(RECURRENCES)}")
+        minute_of_day = parse_minute_of_day(time_str)
+        weekday = None
+        if recurrence == "weekly":
+            weekday = datetime.fromtimestamp(next_fire_time(minute_of_day, now)).weekday()
+        specs.append((name, minute_of_day, recurrence, weekday, next_fire_time(minute_of_day, now, weekday)))
+    return specs
+
+
+class Mailbox:
+    """
+    Hands fired reminders to their owners.
+
+    A reminder's message is pushed to every subscription its owner holds
+    open or, when there is none, kept in the owner's inbox until collected
+    or until the delivery window passes.
+    """
+
+    def __init__(self, delivery_window=DELIVERY_WINDOW_SECONDS):
+        self.delivery_window = delivery_window
+        self._lock = threading.Lock()
+        self._inbox = {}
+        self._subscribers = {}
+
+    def deliver(self, deliveries):
+        """Delivers (user, fire_at, message) tuples."""
+        with self._lock:
+            for user, fire_at, message in deliveries:
+                subscriptions = self._subscribers.get(user)
+                if subscriptions:
+                    for subscription in subscriptions:
+                        subscription.put(message)
+                    continue
+                inbox = self._inbox.setdefault(user, deque())
+                # Drop reminders nobody collected within the delivery window
+                while inbox and fire_at - inbox[0][0] > self.delivery_window:
+                    inbox.popleft()
+                inbox.append((fire_at, message))
+
+    def collect(self, user, now=None):
+        """Returns and clears the messages in the user's inbox."""
+        now = time.time() if now is None else now
+        with self._lock:
+            inbox = self._inbox.pop(user, None)
+        return self.undelivered(inbox or (), now)
+
+    def subscribe(self, user, now=None, subscription=None):
+        """
+        Opens a push subscription for a user's reminders.
+        Args:
+            subscription: object whose put(message) is called from the
+                scheduler thread; a new queue.SimpleQueue by default
+        Returns:
+            (subscription, backlog): the subscription, which receives the
+            message of each of the user's reminders as it fires, and the
+            messages that were already waiting in the user's inbox
+        """
+        now = time.time() if now is None else now
+        if subscription is None:
+            subscription = queue.SimpleQueue()
+        with self._lock:
+            self._subscribers.setdefault(user, []).append(subscription)
+            inbox = self._inbox.pop(user, None)
+        return subscription, self.undelivered(inbox or (), now)
+
+    def unsubscribe(self, user, subscription):
+        """Closes a subscription; later reminders go to the inbox again."""
+        with self._lock:
+            subscriptions = self._subscribers.get(user, [])
+            if subscription in subscriptions:
+                subscriptions.remove(subscription)
+            if not subscriptions:
+                self._subscribers.pop(user, None)
+
+    def subscribed_users(self):
+        with self._lock:
+            return set(self._subscribers)
+
+    def subscriber_count(self):
+        with self._lock:
+            return sum(len(subscriptions) for subscriptions in self._subscribers.values())
+
+    def undelivered(self, fired, now):
+        """Messages of (fire_at, message) pairs still within the delivery window."""
+        return [message for fire_at, message in fired if now - fire_at <= self.delivery_window]
+
+
+class ReminderStore:
+    """
+    Reminders indexed by user and by minute of day, fired by a
+    ReminderScheduler and optionally persisted in a ReminderDatabase.
+
+    Fired reminders are handed to a Mailbox (an in-process one unless
+    another is given), and recurring reminders are re-armed for their next
+    occurrence. Collecting a user's due reminders only touches that user's
+    inbox.
+    """
+
+    def __init__(self, on_fire=None, db=None, mailbox=None, delivery_window=DELIVERY_WINDOW_SECONDS,
+                 compact_interval=COMPACT_INTERVAL_SECONDS):
+        self.on_fire = on_fire
+        self.db = db
+        self.mailbox = mailbox if mailbox is not None else Mailbox(delivery_window)
+        self.compact_interval = compact_interval
+        self.scheduler = ReminderScheduler(on_fire=self._fire)
+        self._lock = threading.Lock()
+        self._next_id = 1
+        self._loaded_up_to = 0
+        self._reminders = {}
+        self._by_user = {}
+        self._by_minute = {}
+        self._last_compaction = time.time()
+        if db is not None:
+            self.sync()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._reminders)
+
+    def add(self, user, name, time_str, recurrence="daily", now=None):
+        """
+        Adds a reminder and schedules its first occurrence.
+        Raises ValueError for an unknown recurrence.
+        """
+        return self.add_many(user, [(name, time_str, recurrence)], now)[0]
+
+    def add_many(self, user, items, now=None):
+        """
+        Adds (name, time_str, recurrence) reminders for a user, persisting
+        them in a single transaction. Raises ValueError for an unknown
+        recurrence, in which case nothing is added.
+        """
+        specs = reminder_specs(items, now)
+        if self.db is not None:
+            ids = self.db.insert_many([(user, *spec) for spec in specs])
+        else:
+            with self._lock:
+                ids = range(self._next_id, self._next_id + len(specs))
+                self._next_id += len(specs)
+        reminders = [Reminder(reminder_id, user, *spec) for reminder_id, spec in zip(ids, specs)]
+
+        with self._lock:
+            for reminder in reminders:
+                self._index(reminder)
+        for reminder in reminders:
+            self.scheduler.schedule(reminder.next_fire, reminder.id)
+        return reminders
+
+    def remove(self, reminder_id):
+        """Deletes a reminder; its pending heap entry is skipped when popped."""
+        with self._lock:
+            reminder = self._reminders.get(reminder_id)
+            if reminder is not None:
+                self._unindex(reminder)
+        if reminder is not None and self.db is not None:
+            self.db.delete(reminder_id)
+        return reminder is not None
+
+    def for_user(self, user):
+        with self._lock:
+            return list(self._by_user.get(user, {}).values())
+
+    def at_minute(self, minute_of_day):
+        with self._lock:
+            return [self._reminders[i] for i in self._by_minute.get(minute_of_day, ())]
+
+    def collect_due(self, user, now=None):
+        """Returns and clears the messages of the user's fired reminders."""
+        return self.mailbox.collect(user, now)
+
+    def subscribe(self, user, now=None, subscription=None):
+        """See Mailbox.subscribe."""
+        return self.mailbox.subscribe(user, now, subscription)
+
+    def unsubscribe(self, user, subscription):
+        self.mailbox.unsubscribe(user, subscription)
+
+    def subscriber_count(self):
+        return self.mailbox.subscriber_count()
+
+    def start(self):
+        self.scheduler.start()
+
+    def stop(self):
+        self.scheduler.stop()
+
+    def sync(self):
+        """
+        Loads and schedules the reminders added to the database since the
+        last sync (all of them, the first time), including those added by
+        other processes. Returns how many were loaded.
+        """
+        # Rebuild the indexes in one pass and heapify once, rather than
+        # pushing reminders one at a time. The cyclic garbage collector is
+        # paused meanwhile: it would otherwise rescan the millions of new
+        # objects over and over while they are being created.
+        gc_was_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            rows = self.db.load_since(self._loaded_up_to)
+            entries = []
+            with self._lock:
+                # _index inlined, with the indexes bound to locals
+                reminders, by_user, by_minute = self._reminders, self._by_user, self._by_minute
+                for row in rows:
+                    reminder_id = row[0]
+                    # Added through this store already
+                    if reminder_id in reminders:
+                        continue
+                    reminder = Reminder(*row)
+                    reminders[reminder_id] = reminder
+                    user_reminders = by_user.get(row[1])
+                    if user_reminders is None:
+                        user_reminders = by_user[row[1]] = {}
+                    user_reminders[reminder_id] = reminder
+                    minute_ids = by_minute.get(row[3])
+                    if minute_ids is None:
+                        minute_ids = by_minute[row[3]] = set()
+                    minute_ids.add(reminder_id)
+                    entries.append((row[6], reminder_id))
+                if rows:
+                    self._loaded_up_to = rows[-1][0]
+            if entries:
+                self.scheduler.schedule_many(entries)
+            return len(entries)
+        finally:
+            if gc_was_enabled:
+                gc.enable()
+
+    def _index(self, reminder):
+        self._reminders[reminder.id] = reminder
+        self._by_user.setdefault(reminder.user, {})[reminder.id] = reminder
+        self._by_minute.setdefault(reminder.minute_of_day, set()).add(reminder.id)
+
+    def _unindex(self, reminder):
+        del self._reminders[reminder.id]
+        user_reminders = self._by_user[reminder.user]
+        del user_reminders[reminder.id]
+        if not user_reminders:
+            del self._by_user[reminder.user]
+        minute_ids = self._by_minute[reminder.minute_of_day]
+        minute_ids.discard(reminder.id)
+        if not minute_ids:
+            del self._by_minute[reminder.minute_of_day]
+
+    def _fire(self, due):
+        fired, rearmed, finished = [], [], []
+        now = time.time()
+        with self._lock:
+            for fire_at, reminder_id in due:
+                reminder = self._reminders.get(reminder_id)
+                # Removed, or re-armed since this heap entry was pushed
+                if reminder is None or reminder.next_fire != fire_at:
+                    continue
+                fired.append((reminder, fire_at))
+                if reminder.rearm(max(fire_at, now)):
+                    rearmed.append(reminder)
+                else:
+                    self._unindex(reminder)
+                    finished.append(reminder.id)
+
+        if self.db is not None:
+            with metrics.span("reminder_persist"):
+                self.db.record_fired([(r.next_fire, r.id) for r in rearmed], finished)
+                if now - self._last_compaction >= self.compact_interval:
+                    self._last_compaction = now
+                    self.db.compact()
+        for reminder in rearmed:
+            self.scheduler.schedule(reminder.next_fire, reminder.id)
+        with metrics.span("reminder_deliver"):
+            self.mailbox.deliver([(reminder.user, fire_at, reminder.message) for reminder, fire_at in fired])
+        if self.on_fire is not None:
+            for reminder, fire_at in fired:
+                self.on_fire(reminder, fire_at)
@@ -0,0 +1,155 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+
+class ReportCache:
+    """
+    Content-addressed cache for rendered PDF reports.
+
+    Reports are keyed by a SHA-256 hash of the canonical report payload, so
+    the key doubles as the response ETag. A bounded in-memory LRU tier sits
+    in front of an optional on-disk tier whose files expire after a TTL.
+
+    The "Report Date" printed on a report is the only field that isn't
+    derived from the payload. The key therefore includes the current time
+    floored to date_resolution_seconds: within that window a repeated
+    request gets the first rendering (and its date) back, and a request in
+    the next window renders a fresh report.
+    """
+
+    def __init__(self, max_bytes=32 * 1024 * 1024, disk_dir=None, disk_ttl_seconds=3600,
+                 date_resolution_seconds=300):
+        self.max_bytes = max_bytes
+        self.disk_dir = disk_dir
+        self.disk_ttl_seconds = disk_ttl_seconds
+        self.date_resolution_seconds = date_resolution_seconds
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._puts_since_sweep = 0
+        self._counters = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "memory_evictions": 0,
+            "disk_evictions": 0,
+        }
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+
+    def key(self, kwargs, now=None):
+        """
+        Returns the cache key for a set of generate_pdf keyword arguments.
+        """
+        now = time.time() if now is None else now
+        date_bucket = int(now // self.date_resolution_seconds)
+        canonical = json.dumps(kwargs, sort_keys=True, separators=(",", ":"), default=str)
+        return hashlib.sha256(f"{date_bucket}:{canonical}".encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        """Returns the cached PDF bytes for key, or None on a miss."""
+        with self._lock:
+            pdf_bytes = self._entries.get(key)
+            if pdf_bytes is not None:
+                self._entries.move_to_end(key)
+                self._counters["memory_hits"] += 1
+                return pdf_bytes
+
+        pdf_bytes = self._read_disk(key)
+        with self._lock:
+            if pdf_bytes is None:
+                self._counters["misses"] += 1
+                return None
+            self._counters["disk_hits"] += 1
+            self._store_memory(key, pdf_bytes)
+        return pdf_bytes
+
+    def put(self, key, pdf_bytes):
+        """Stores rendered PDF bytes under key in every enabled tier."""
+        with self._lock:
+            self._store_memory(key, pdf_bytes)
+            self._puts_since_sweep += 1
+            sweep = self._puts_since_sweep >= 100
+            if sweep:
+                self._puts_since_sweep = 0
+        if self.disk_dir:
+            self._write_disk(key, pdf_bytes)
+            if sweep:
+                self.sweep_disk()
+
+    def stats(self):
+        """Returns hit/miss/eviction counters and the current memory usage."""
+        with self._lock:
+            stats = dict(self._counters)
+            stats["memory_entries"] = len(self._entries)
+            stats["memory_bytes"] = self._bytes
+        stats["max_bytes"] = self.max_bytes
+        return stats
+
+    def clear(self):
+        """Drops every cached report (counters are kept)."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+        if self.disk_dir:
+            for name in os.listdir(self.disk_dir):
+                if name.endswith(".pdf"):
+                    os.remove(os.path.join(self.disk_dir, name))
+
+    def sweep_disk(self):
+        """Deletes on-disk reports older than disk_ttl_seconds."""
+        if not self.disk_dir:
+            return
+        cutoff = time.time() - self.disk_ttl_seconds
+        for entry in os.scandir(self.disk_dir):
+            if entry.name.endswith(".pdf") and entry.stat().st_mtime < cutoff:
+                try:
+                    os.remove(entry.path)
+                except FileNotFoundError:
+                    continue
+                with self._lock:
+                    self._counters["disk_evictions"] += 1
+
+    def _store_memory(self, key, pdf_bytes):
+        # Caller holds self._lock
+        if len(pdf_bytes) > self.max_bytes:
+            return
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self._bytes -= len(previous)
+        self._entries[key] = pdf_bytes
+        self._bytes += len(pdf_bytes)
+        while self._bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= len(evicted)
+            self._counters["memory_evictions"] += 1
+
+    def _disk_path(self, key):
+        return os.path.join(self.disk_dir, f"{key}.pdf")
+
+    def _read_disk(self, key):
+        if not self.disk_dir:
+            return None
+        path = self._disk_path(key)
+        try:
+            if time.time() - os.path.getmtime(path) > self.disk_ttl_seconds:
+                os.remove(path)
+                with self._lock:
+                    self._counters["disk_evictions"] += 1
+                return None
+            with open(path, "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def _write_disk(self, key, pdf_bytes):
+        # Write to a temporary file first so readers never see a partial PDF
+        fd, tmp_path = tempfile.mkstemp(dir=self.disk_dir, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(pdf_bytes)
+        os.replace(tmp_path, self._disk_path(key))
@@ -0,0 +1,208 @@
+import threading
+import time
+import uuid
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+# Worker processes rendering PDFs at the same time
+MAX_WORKERS = 2
+# Reports (jobs and render_stream renders) allowed to be queued or running
+# before new jobs are rejected, and render_stream waits for a slot
+MAX_QUEUE_DEPTH = 16
+# How often render_stream checks for a free slot while the queue is full
+QUEUE_POLL_SECONDS = 0.05
+# How long finished jobs (and their PDFs) are kept for download
+JOB_TTL_SECONDS = 600
+
+
+class QueueFullError(Exception):
+    """Raised when the report queue is at MAX_QUEUE_DEPTH."""
+
+
+class WorkersUnavailableError(Exception):
+    """Raised when the worker pool can't take reports (a worker died, or the pool was shut down)."""
+
+
+_executor = None
+_jobs = {}
+# render_stream's reports that are queued or rendering
+_streamed = set()
+_lock = threading.Lock()
+
+
+def configure(max_workers=None, max_queue_depth=None, job_ttl_seconds=None):
+    """
+    Overrides the pool size, queue depth or job TTL. Takes effect for the
+    worker pool the next time it is created.
+    """
+    global MAX_WORKERS, MAX_QUEUE_DEPTH, JOB_TTL_SECONDS
+    if max_workers is not None:
+        MAX_WORKERS = max_workers
+    if max_queue_depth is not None:
+        MAX_QUEUE_DEPTH = max_queue_depth
+    if job_ttl_seconds is not None:
+        JOB_TTL_SECONDS = job_ttl_seconds
+
+
+def _render_report(kwargs):
+    # Runs in a worker process; the PDF bytes are sent back to the parent.
+    # The PDF engine is only imported there, not by the web app.
+    from logic.pdf_generator import generate_pdf
+    return generate_pdf(as_bytes=True, **kwargs)
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(max_workers=MAX_WORKERS)
+    return _executor
+
+
+def _prune_expired(now):
+    expired = [job_id for job_id, job in _jobs.items()
+               if job["finished_at"] is not None and now - job["finished_at"] > JOB_TTL_SECONDS]
+    for job_id in expired:
+        del _jobs[job_id]
+
+
+def _pending_count():
+    # Caller holds _lock
+    return sum(1 for job in _jobs.values() if not job["future"].done()) + len(_streamed)
+
+
+def _on_done(job_id, future):
+    with _lock:
+        job = _jobs.get(job_id)
+        if job is not None:
+            job["finished_at"] = time.time()
+
+
+def submit(kwargs):
+    """
+    Queues a report for rendering in the worker pool.
+    Args:
+        kwargs: generate_pdf keyword arguments (see report_kwargs)
+    Returns:
+        The new job ID
+    Raises:
+        QueueFullError: if MAX_QUEUE_DEPTH jobs are already pending
+        WorkersUnavailableError: if the worker pool is broken or shut down
+    """
+    global _executor
+    with _lock:
+        _prune_expired(time.time())
+        pending = _pending_count()
+        if pending >= MAX_QUEUE_DEPTH:
+            raise QueueFullError(f"Report queue is full ({pending} reports pending)")
+
+        executor = _get_executor()
+        job_id = uuid.uuid4().hex
+        try:
+            future = executor.submit(_render_report, kwargs)
+        except BrokenProcessPool as e:
+            # A pool whose worker died takes no more work; the next
+            # report starts a new one
+            executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
+            raise WorkersUnavailableError(f"Report workers are unavailable: {e}") from e
+        except RuntimeError as e:
+            # Shut down (e.g. the interpreter is exiting)
+            raise WorkersUnavailableError(f"Report workers are unavailable: {e}") from e
+        _jobs[job_id] = {"future": future, "finished_at": None}
+    future.add_done_callback(lambda f: _on_done(job_id, f))
+    return job_id
+
+
+def _on_streamed(future):
+    with _lock:
+        _streamed.discard(future)
+
+
+def _outcome(key, future):
+    error = future.exception()
+    if error is not None:
+        return key, None, str(error) or type(error).__name__
+    return key, future.result(), None
+
+
+def render_stream(items, max_pending=None):
+    """
+    Renders a stream of reports in the worker pool as they arrive, without
+    queueing jobs. Items are read lazily: at most max_pending (default two
+    per worker) reports are rendering or waiting at once, so a long stream
+    is never held in memory. They count towards MAX_QUEUE_DEPTH like jobs;
+    while the queue is full the stream waits for a slot.
+    Args:
+        items: (key, kwargs, error) triples; one with an error is passed
+            through instead of being rendered
+    Yields:
+        (key, pdf_bytes, error) as each report finishes (in completion
+        order), with error the message of a report that failed to render
+    """
+    max_pending = max_pending or 2 * MAX_WORKERS
+    with _lock:
+        executor = _get_executor()
+    pending = {}
+    try:
+        for key, kwargs, error in items:
+            if error is not None:
+                yield key, None, error
+                continue
+            while True:
+                with _lock:
+                    if _pending_count() < MAX_QUEUE_DEPTH:
+                        future = executor.submit(_render_report, kwargs)
+                        _streamed.add(future)
+                        break
+                # Wait for a slot, handing back our reports that finish meanwhile
+                if pending:
+                    done, _ = wait(pending, timeout=QUEUE_POLL_SECONDS, return_when=FIRST_COMPLETED)
+                    for finished in done:
+                        yield _outcome(pending.pop(finished), finished)
+                else:
+                    time.sleep(QUEUE_POLL_SECONDS)
+            future.add_done_callback(_on_streamed)
+            pending[future] = key
+            if len(pending) >= max_pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield _outcome(pending.pop(future), future)
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield _outcome(pending.pop(future), future)
+    finally:
+        # The consumer went away (e.g. the client disconnected)
+        for future in pending:
+            future.cancel()
+
+
+def status(job_id):
+    """
+    Returns a dict describing the job, or None if the ID is unknown or expired.
+    Keys: "status" ('queued', 'running', 'done' or 'failed'), plus "pdf"
+    (the rendered bytes) when done or "error" when failed.
+    """
+    with _lock:
+        job = _jobs.get(job_id)
+    if job is None:
+        return None
+
+    future = job["future"]
+    if not future.done():
+        return {"status": "running" if future.running() else "queued"}
+    error = future.exception()
+    if error is not None:
+        return {"status": "failed", "error": str(error)}
+    return {"status": "done", "pdf": future.result()}
+
+
+def shutdown():
+    """Stops the worker pool and forgets all jobs."""
+    global _executor
+    with _lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+        _jobs.clear()
+        _streamed.clear()
@@ -1,3 +1,60 @@
+import re
+from itertools import chain
+
+from logic._numpy import require_numpy
+
+# High-risk symptoms
+HIGH_RISK_SYMPTOMS = (
+    'chest pain', 'shortness of breath', 'fainting', 'palpitations',
+    'blurred vision', 'severe headache', 'high fever'
+)
+
+# Medium-risk symptoms
+MEDIUM_RISK_SYMPTOMS = (
+    'fever', 'persistent cough', 'severe fatigue', 'vomiting',
+    'diarrhea', 'severe pain'
+)
+
+
+def _build_trie(phrases):
+    trie = {}
+    for phrase in phrases:
+        node = trie
+        for char in phrase:
+            node = node.setdefault(char, {})
+        node[''] = {}
+    return trie
+
+
+def _trie_to_regex(node):
+    """
+    Turns a character trie into a regex where alternatives never share a
+    prefix, so the regex engine follows at most one branch per character.
+    """
+    optional = '' in node
+    branches = [re.escape(char) + _trie_to_regex(child)
+                for char, child in sorted(node.items()) if char]
+    if not branches:
+        return ''
+    body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+    if optional:
+        return '(?:' + body + ')?'
+    return body
+
+
+def compile_phrases(phrases):
+    """
+    Compiles a list of lowercase phrases into one regex that finds any of
+    them as a substring in a single scan of the text.
+    """
+    return re.compile(_trie_to_regex(_build_trie(phrases)))
+
+
+# Built once at import time and shared by every call
+_HIGH_RISK_PATTERN = compile_phrases(HIGH_RISK_SYMPTOMS)
+_MEDIUM_RISK_PATTERN = compile_phrases(MEDIUM_RISK_SYMPTOMS)
+
+
 def classify_risk(symptoms):
     """
     Classifies health risk based on symptoms.
@@ -5,36 +62,72 @@ def classify_risk(symptoms):
     """
     if not symptoms:
         return "Low"
-    
-    # Convert to lowercase for case-insensitive matching
-    symptoms = [symptom.lower() for symptom in symptoms]
-    
-    # High-risk symptoms
-    high_risk_symptoms = [
-        'chest pain', 'shortness of breath', 'fainting', 'palpitations', 
-        'blurred vision', 'severe headache', 'high fever'
-    ]
-    
-    # Medium-risk symptoms
-    medium_risk_symptoms = [
-        'fever', 'persistent cough', 'severe fatigue', 'vomiting', 
-        'diarrhea', 'severe pain'
-    ]
-    
+
+    # Convert to lowercase for case-insensitive matching. The patterns never
+    # contain a newline, so a match cannot span two joined symptoms.
+    text = "\n".join(symptoms).lower()
+
     # Check for high-risk symptoms
-    for symptom in symptoms:
-        if any(high_risk in symptom for high_risk in high_risk_symptoms):
-            return "High"
-    
+    if _HIGH_RISK_PATTERN.search(text):
+        return "High"
+
+    # Four or more symptoms are high risk whatever they are, so the
+    # medium-risk count only matters for the remaining short lists
+    if len(symptoms) >= 4:
+        return "High"
+
     # Check for medium-risk symptoms or multiple symptoms
     medium_risk_count = 0
     for symptom in symptoms:
-        if any(medium_risk in symptom for medium_risk in medium_risk_symptoms):
+        if _MEDIUM_RISK_PATTERN.search(symptom.lower()):
             medium_risk_count += 1
-    
-    if medium_risk_count >= 2 or len(symptoms) >= 4:
+
+    if medium_risk_count >= 2:
         return "High"
     elif medium_risk_count >= 1 or len(symptoms) >= 2:
         return "Medium"
     else:
-        return "Low"
\ No newline at end of file
+        return "Low"
+
+
+RISK_LEVELS = ("Low", "Medium", "High")
+
+
+def classify_risk_batch(symptom_lists):
+    """
+    Classifies many symptom lists at once.
+    Args:
+        symptom_lists: List of symptom lists, one per patient
+    Returns:
+        List of 'Low', 'Medium' or 'High', in the same order, identical to
+        calling classify_risk on each list
+    """
+    np = require_numpy()
+
+    symptom_lists = [symptoms or () for symptoms in symptom_lists]
+    patient_count = len(symptom_lists)
+    lengths = np.fromiter(map(len, symptom_lists), dtype=np.int64, count=patient_count)
+
+    # Encode every symptom as an integer ID so each distinct string is
+    # matched against the risk patterns only once
+    vocabulary = {}
+    encode = vocabulary.setdefault
+    flat = chain.from_iterable(symptom_lists)
+    ids = np.fromiter((encode(symptom, len(vocabulary)) for symptom in flat),
+                      dtype=np.int64, count=int(lengths.sum()))
+
+    lowered = [symptom.lower() for symptom in vocabulary]
+    is_high = np.fromiter((_HIGH_RISK_PATTERN.search(s) is not None for s in lowered),
+                          dtype=bool, count=len(lowered))
+    is_medium = np.fromiter((_MEDIUM_RISK_PATTERN.search(s) is not None for s in lowered),
+                            dtype=bool, count=len(lowered))
+
+    # Count high/medium symptoms per patient
+    patient_ids = np.repeat(np.arange(patient_count), lengths)
+    high_counts = np.bincount(patient_ids[is_high[ids]], minlength=patient_count)
+    medium_counts = np.bincount(patient_ids[is_medium[ids]], minlength=patient_count)
+
+    high = (high_counts > 0) | (medium_counts >= 2) | (lengths >= 4)
+    medium = (medium_counts >= 1) | (lengths >= 2)
+    levels = np.where(high, 2, np.where(medium, 1, 0))
+    return [RISK_LEVELS[level] for level in levels.tolist()]
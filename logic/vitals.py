@@ -0,0 +1,225 @@
+import math
+import threading
+from array import array
+from collections import OrderedDict
+
+VITALS = ("systolic", "diastolic", "sugar", "heart_rate")
+
+# Normal range of each vital, in VITALS order: mmHg, mmHg, mg/dL, bpm
+NORMAL_RANGES = ((90.0, 140.0), (60.0, 90.0), (70.0, 180.0), (60.0, 100.0))
+
+# Readings per patient the rolling statistics cover
+DEFAULT_WINDOW = 60
+# A value this many standard deviations from the patient's rolling mean
+# is an anomaly...
+DEFAULT_Z_THRESHOLD = 3.0
+# ...once the window holds at least this many earlier values of that vital
+MIN_BASELINE = 10
+# Patients whose windows are kept; the least recently seen is dropped beyond this
+DEFAULT_MAX_PATIENTS = 100_000
+
+NAN = float("nan")
+_INDEXES = range(len(VITALS))
+MISSING = (None, "", "N/A")
+
+
+def parse_number(value):
+    """
+    Returns a vital-sign value as a float, or NaN if it wasn't measured
+    (None, "" or "N/A"). Raises ValueError for anything else that isn't a
+    positive number.
+    """
+    if value in MISSING:
+        return NAN
+    if isinstance(value, bool):
+        raise ValueError(f"Invalid reading: {value!r}")
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"Invalid reading: {value!r}")
+    if not (0 < number < math.inf):
+        raise ValueError(f"Invalid reading: {value!r}")
+    return number
+
+
+def parse_blood_pressure(value):
+    """
+    Parses a blood pressure reading: "120/80" (systolic/diastolic) or a
+    systolic value alone. Returns (systolic, diastolic), NaN for a part
+    that wasn't measured; raises ValueError for anything else.
+    """
+    if isinstance(value, str) and "/" in value:
+        systolic, _, diastolic = value.partition("/")
+        return parse_number(systolic.strip()), parse_number(diastolic.strip())
+    return parse_number(value), NAN
+
+
+def parse_reading(record):
+    """
+    Turns vital signs as the app sends them ({"blood_pressure": "120/80",
+    "sugar_level": 95, "heart_rate": 72}, any of them optional) into a
+    tuple of floats in VITALS order, NaN for those not measured.
+    Raises ValueError for a value that can't be read.
+    """
+    try:
+        systolic, diastolic = parse_blood_pressure(record.get("blood_pressure"))
+        return systolic, diastolic, parse_number(record.get("sugar_level")), parse_number(record.get("heart_rate"))
+    except ValueError as e:
+        raise ValueError(f"{e} (blood_pressure, sugar_level and heart_rate must be numbers; "
+                         f"blood_pressure may be \"systolic/diastolic\")")
+
+
+def level(vital, value):
+    """Returns "high", "low" or "normal" for a vital's value, or None if it wasn't measured."""
+    if value != value:
+        return None
+    low, high = NORMAL_RANGES[VITALS.index(vital)]
+    if value > high:
+        return "high"
+    if value < low:
+        return "low"
+    return "normal"
+
+
+def blood_pressure_level(value):
+    """
+    Returns "high", "low" or "normal" for a blood pressure reading (either
+    number out of range counts, high first), or None if it can't be read.
+    """
+    try:
+        systolic, diastolic = parse_blood_pressure(value)
+    except ValueError:
+        return None
+    levels = (level("systolic", systolic), level("diastolic", diastolic))
+    for result in ("high", "low", "normal"):
+        if result in levels:
+            return result
+    return None
+
+
+class _Window:
+    """One patient's last readings: a ring buffer and running sums per vital."""
+
+    __slots__ = ("size", "values", "sums", "squares", "counts", "position", "readings")
+
+    def __init__(self, size):
+        self.size = size
+        self.values = [array("d", [NAN]) * size for _ in VITALS]
+        self.sums = [0.0] * len(VITALS)
+        self.squares = [0.0] * len(VITALS)
+        self.counts = [0] * len(VITALS)
+        self.position = 0
+        self.readings = 0
+
+    def add(self, reading, z_threshold):
+        alerts = []
+        position = self.position
+        sums, squares, counts = self.sums, self.squares, self.counts
+        for i, value, buffer, (low, high) in zip(_INDEXES, reading, self.values, NORMAL_RANGES):
+            count = counts[i]
+            old = buffer[position]
+            buffer[position] = value
+            if value == value:
+                if value > high:
+                    alerts.append({"vital": VITALS[i], "value": value, "alert": "high"})
+                elif value < low:
+                    alerts.append({"vital": VITALS[i], "value": value, "alert": "low"})
+                # Judged against the earlier readings, before this one joins them
+                if count >= MIN_BASELINE:
+                    mean = sums[i] / count
+                    variance = squares[i] / count - mean * mean
+                    if variance > 0 and (value - mean) ** 2 > z_threshold * z_threshold * variance:
+                        z = (value - mean) / math.sqrt(variance)
+                        alerts.append({"vital": VITALS[i], "value": value, "alert": "anomaly", "z": round(z, 2)})
+                # The new value replaces the oldest in the ring
+                if old == old:
+                    sums[i] += value - old
+                    squares[i] += value * value - old * old
+                else:
+                    sums[i] += value
+                    squares[i] += value * value
+                    counts[i] = count + 1
+            elif old == old:
+                sums[i] -= old
+                squares[i] -= old * old
+                counts[i] = count - 1
+
+        self.readings += 1
+        position += 1
+        if position == self.size:
+            position = 0
+            self._resum()
+        self.position = position
+        return alerts
+
+    def _resum(self):
+        # Adding and subtracting leaves rounding error in the running sums;
+        # recomputing them once per lap of the ring keeps it from building
+        # up, at O(1) amortized cost per reading
+        for i, buffer in enumerate(self.values):
+            measured = [value for value in buffer if value == value]
+            self.sums[i] = math.fsum(measured)
+            self.squares[i] = math.fsum(value * value for value in measured)
+
+    def stats(self):
+        result = {"readings": self.readings}
+        for i, vital in enumerate(VITALS):
+            count = self.counts[i]
+            if count:
+                mean = self.sums[i] / count
+                std = math.sqrt(max(self.squares[i] / count - mean * mean, 0.0))
+                result[vital] = {"mean": round(mean, 2), "std": round(std, 2), "count": count}
+            else:
+                result[vital] = None
+        return result
+
+
+class VitalsMonitor:
+    """
+    Rolling per-patient vital-sign statistics and alerts.
+
+    Each patient has a ring buffer of their last `window` readings per
+    vital (typed double arrays, NaN for a vital not measured) and running
+    sums and sums of squares, so a reading updates the rolling mean and
+    standard deviation in O(1) rather than recomputing them over the
+    window. The least recently seen patients are dropped beyond
+    max_patients.
+    """
+
+    def __init__(self, window=DEFAULT_WINDOW, z_threshold=DEFAULT_Z_THRESHOLD, max_patients=DEFAULT_MAX_PATIENTS):
+        self.window = window
+        self.z_threshold = z_threshold
+        self.max_patients = max_patients
+        self._patients = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._patients)
+
+    def add(self, patient, reading):
+        """
+        Adds one reading (a value per vital in VITALS order, NaN if not
+        measured) for a patient. Returns its alerts: {"vital", "value",
+        "alert"} with "high" or "low" for a value outside the normal
+        range, and "anomaly" (with its "z" score) for one far from the
+        patient's rolling mean.
+        """
+        with self._lock:
+            window = self._patients.get(patient)
+            if window is None:
+                window = self._patients[patient] = _Window(self.window)
+                if len(self._patients) > self.max_patients:
+                    self._patients.popitem(last=False)
+            else:
+                self._patients.move_to_end(patient)
+            return window.add(reading, self.z_threshold)
+
+    def stats(self, patient):
+        """
+        Returns a patient's rolling statistics: the number of readings
+        seen and {"mean", "std", "count"} per vital over the window (None
+        for a vital never measured), or None for an unknown patient.
+        """
+        with self._lock:
+            window = self._patients.get(patient)
+            return window.stats() if window is not None else None
@@ -1,11 +1,58 @@
 #!/usr/bin/env python3
 """
 Startup script for Health Check App
+
+Usage:
+    python run.py               # web app (fires reminders itself)
+    python run.py --scheduler   # reminder scheduler service only
+
+To run several web workers, start one scheduler service and run the web
+workers with REMINDER_SCHEDULER=service, e.g.
+    python run.py --scheduler &
+    REMINDER_SCHEDULER=service gunicorn -w 4 -k gthread --threads 50 app:app
+Every page with reminders holds a /reminders/stream connection, and with it
+a worker thread: use threaded or gevent workers (or asgi.py), not the
+default sync workers.
 """
 
+import argparse
+import os
+
+# Same file as app.py's <instance folder>/reminders.db
+DEFAULT_REMINDER_DB = os.path.join(os.path.dirname(os.path.abspath(__file__)), "instance", "reminders.db")
+
+
+def print_reminder(reminder, fire_at):
+    print(f"\U0001F514 Reminder for {reminder.user}: {reminder.message} (Time: {reminder.time})")
+
+
+def run_scheduler_service():
+    from logic.reminder_db import ReminderDatabase
+    from logic.reminder_service import run_scheduler
+
+    path = os.environ.get("REMINDER_DB") or DEFAULT_REMINDER_DB
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    print("⏰ Starting reminder scheduler service...")
+    print(f"🗄️  Reminder database: {path}")
+    print("⏹️  Press Ctrl+C to stop the service")
+    run_scheduler(ReminderDatabase(path), on_fire=print_reminder)
+
+
 if __name__ == "__main__":
-    from app import app
-    print("🏥 Starting Health Check App...")
-    print("📱 Open http://localhost:5000 in your browser")
-    print("⏹️  Press Ctrl+C to stop the server")
-    app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Health Check App")
+    parser.add_argument("--scheduler", action="store_true",
+                        help="run the reminder scheduler service instead of the web app")
+    args = parser.parse_args()
+
+    if args.scheduler:
+        run_scheduler_service()
+    else:
+        # start_reminders starts the scheduler in the debug reloader's
+        # serving process; its file-watching process must not fire reminders
+        os.environ["REMINDER_AUTOSTART"] = "0"
+        from app import app, start_reminders
+        start_reminders(app, reloader=True)
+        print("🏥 Starting Health Check App...")
+        print("📱 Open http://localhost:5000 in your browser")
+        print("⏹️  Press Ctrl+C to stop the server")
+        app.run(debug=True, host='0.0.0.0', port=5000)
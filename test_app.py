@@ -1,11 +1,17 @@
 #!/usr/bin/env python3
 """
 Simple test script to verify the Health Check App functionality
+
+It sets reminders, so run it against a server with a throwaway reminder
+database: REMINDER_DB=$(mktemp -u) python3 app.py
 """
 
 import requests
+import io
 import json
+import os
 import time
+import zipfile
 
 def test_app():
     base_url = "http://localhost:5000"
@@ -113,6 +119,212 @@ def test_app():
     except Exception as e:
         print(f"❌ PDF Report Test error: {e}")
 
+    # Test 8: Batch BMI (JSON arrays and a CSV upload)
+    try:
+        response = requests.post(f"{base_url}/bmi/batch", json={"heights": [170, 100, 0], "weights": [70, 25, 60]})
+        csv_response = requests.post(f"{base_url}/bmi/batch", files={"file": ("people.csv", "height,weight\n170,70\n100,30\n,60\n")})
+        if response.status_code == 200 and csv_response.status_code == 200 and csv_response.text.endswith(",Invalid\n"):
+            print(f"✅ Batch BMI Test: {response.json()['categories']}, CSV {csv_response.text.splitlines()[1:]}")
+        else:
+            print(f"❌ Batch BMI Test failed: {response.status_code} {csv_response.status_code}")
+    except Exception as e:
+        print(f"❌ Batch BMI Test error: {e}")
+
+    # Test 9: Offline nearest hospitals (the bundled sample dataset)
+    try:
+        response = requests.post(f"{base_url}/find-hospitals", json={"lat": 28.61, "lon": 77.21, "k": 3})
+        if response.status_code == 200 and len(response.json()["hospitals"]) == 3:
+            nearest = response.json()["hospitals"][0]
+            print(f"✅ Nearest Hospitals Test: {nearest['name']} at {nearest['distance_km']} km")
+        else:
+            print(f"❌ Nearest Hospitals Test failed: {response.status_code} {response.text}")
+    except Exception as e:
+        print(f"❌ Nearest Hospitals Test error: {e}")
+
+    # Test 10: Chat assistant (symptom phrases are picked out of the message)
+    try:
+        response = requests.post(f"{base_url}/chat", json={"message": "I have chest pain and a fever!"})
+        if response.status_code == 200 and "HIGH" in response.json()["response"]:
+            print(f"✅ Chat Test: {response.json()['response']}")
+        else:
+            print(f"❌ Chat Test failed: {response.status_code} {response.text}")
+    except Exception as e:
+        print(f"❌ Chat Test error: {e}")
+
+    # Test 11: One-shot assessment with the PDF attached
+    try:
+        assess_data = {"name": "John Doe", "age": "30", "height": 170, "weight": 70,
+                       "symptoms": ["Fever", "Cough"], "report": "pdf"}
+        response = requests.post(f"{base_url}/assess", json=assess_data)
+        if response.status_code == 200:
+            result = response.json()
+            print(f"✅ Assessment Test: BMI = {result['bmi']['value']}, Risk = {result['risk']}, "
+                  f"{len(result['diagnoses'])} diagnoses, {len(result['report']['pdf']):,} chars of PDF")
+        else:
+            print(f"❌ Assessment Test failed: {response.status_code} {response.text}")
+    except Exception as e:
+        print(f"❌ Assessment Test error: {e}")
+
+    # Test 12: Batch risk classification (NDJSON)
+    try:
+        lines = [
+            json.dumps(["Fever", "Vomiting"]),
+            json.dumps({"id": "p2", "symptoms": ["Cough"]}),
+        ]
+        response = requests.post(f"{base_url}/classify-risk/batch",
+                                 data="\n".join(lines) + "\n",
+                                 headers={"Content-Type": "application/x-ndjson"})
+        if response.status_code == 200:
+            results = [json.loads(line) for line in response.text.splitlines() if line]
+            print(f"✅ Batch Risk Classification Test: {[r.get('risk') for r in results]}")
+        else:
+            print("❌ Batch Risk Classification Test failed")
+    except Exception as e:
+        print(f"❌ Batch Risk Classification Test error: {e}")
+
+    # Test 13: Bulk diagnosis (NDJSON in, NDJSON out)
+    try:
+        lines = [json.dumps(["Fever"]), json.dumps({"id": "p2", "symptoms": ["Cough", "Headache"]})]
+        response = requests.post(f"{base_url}/diagnose/stream", data="\n".join(lines) + "\n",
+                                 headers={"Content-Type": "application/x-ndjson"})
+        results = [json.loads(line) for line in response.text.splitlines() if line]
+        if response.status_code == 200 and [r["id"] for r in results] == [1, "p2"]:
+            print(f"✅ Bulk Diagnosis Test: {sum(len(r['results']) for r in results)} diagnoses for 2 patients")
+        else:
+            print(f"❌ Bulk Diagnosis Test failed: {response.status_code} {response.text}")
+    except Exception as e:
+        print(f"❌ Bulk Diagnosis Test error: {e}")
+
+    # Test 14: Vital-signs stream (alerts streamed back, rolling stats per patient)
+    try:
+        patient = f"vitals-{int(time.time())}"
+        lines = [json.dumps({"patient": patient, "blood_pressure": "120/80", "heart_rate": 72}),
+                 json.dumps({"patient": patient, "blood_pressure": "165/95", "sugar_level": 110})]
+        response = requests.post(f"{base_url}/vitals/stream", data="\n".join(lines) + "\n",
+                                 headers={"Content-Type": "application/x-ndjson"})
+        results = [json.loads(line) for line in response.text.splitlines() if line]
+        stats = requests.get(f"{base_url}/vitals/{patient}").json()
+        if (response.status_code == 200 and results[0]["line"] == 2
+                and results[-1]["summary"]["alerts"] == 2 and stats.get("readings") == 2):
+            print(f"✅ Vitals Stream Test: {[a['alert'] + ' ' + a['vital'] for a in results[0]['alerts']]}, "
+                  f"mean systolic {stats['systolic']['mean']}")
+        else:
+            print(f"❌ Vitals Stream Test failed: {response.status_code} {response.text}")
+    except Exception as e:
+        print(f"❌ Vitals Stream Test error: {e}")
+
+    # Test 15: Patient history (assessments recorded per patient, queried by time range)
+    try:
+        patient = f"history-{int(time.time())}"
+        requests.post(f"{base_url}/bmi", json={"height": 170, "weight": 70, "patient": patient})
+        requests.post(f"{base_url}/assess", json={"patient": patient, "height": 170, "weight": 72,
+                                                   "symptoms": ["Fever"], "vital_signs": {"blood_pressure": "130/85"}})
+        response = requests.get(f"{base_url}/history/{patient}", params={"days": 90})
+        history = response.json()
+        # A repeated report is answered from its ETag and isn't recorded again
+        report = {"patient": patient, "name": "Jane Doe", "symptoms": ["Fever"]}
+        etag = requests.post(f"{base_url}/generate-report", json=report).headers.get("ETag")
+        repeated = requests.post(f"{base_url}/generate-report", json=report, headers={"If-None-Match": etag})
+        recorded = requests.get(f"{base_url}/history/{patient}").json()
+        if (response.status_code == 200 and history["bmi"] == [24.22, 24.91] and history["systolic"][-1] == 130
+                and repeated.status_code == 304 and len(recorded["time"]) == 3):
+            print(f"✅ Patient History Test: BMI {history['bmi']}, risk {history['risk']}, repeated report 304")
+        else:
+            print(f"❌ Patient History Test failed: {response.status_code} {response.text}")
+    except Exception as e:
+        print(f"❌ Patient History Test error: {e}")
+
+    # Test 16: Background PDF report job
+    try:
+        response = requests.post(f"{base_url}/reports", json={"name": "Jane Doe", "age": "41", "symptoms": ["Fever"]})
+        if response.status_code == 202:
+            job_id = response.json()["job_id"]
+            for _ in range(20):
+                response = requests.get(f"{base_url}/reports/{job_id}")
+                if response.headers.get("content-type") == "application/pdf":
+                    break
+                time.sleep(0.5)
+            if response.headers.get("content-type") == "application/pdf":
+                print(f"✅ Report Job Test: {len(response.content):,} byte PDF from job {job_id}")
+            else:
+                print(f"❌ Report Job Test: job not finished ({response.text})")
+        else:
+            print(f"❌ Report Job Test failed: {response.status_code}")
+    except Exception as e:
+        print(f"❌ Report Job Test error: {e}")
+
+    # Test 17: Bulk reports (NDJSON in, a ZIP of PDFs streamed back)
+    try:
+        lines = [json.dumps({"name": "Jane Doe", "symptoms": ["Fever"]}), "not json",
+                 json.dumps({"name": "John Roe", "risk_level": "High"})]
+        response = requests.post(f"{base_url}/generate-report/bulk", data="\n".join(lines) + "\n",
+                                  headers={"Content-Type": "application/x-ndjson"})
+        archive = zipfile.ZipFile(io.BytesIO(response.content))
+        manifest = [json.loads(line) for line in archive.read("manifest.ndjson").splitlines()]
+        if response.status_code == 200 and ["file" in entry for entry in manifest] == [True, False, True]:
+            print(f"✅ Bulk Report Test: {sorted(n for n in archive.namelist() if n.endswith('.pdf'))}, "
+                  f"line 2: {manifest[1]['error']}")
+        else:
+            print(f"❌ Bulk Report Test failed: {response.status_code} {manifest}")
+    except Exception as e:
+        print(f"❌ Bulk Report Test error: {e}")
+
+    # Test 18: Reminder long-poll (pushed as soon as the reminder fires)
+    try:
+        now = time.strftime("%H:%M")
+        requests.post(f"{base_url}/set_reminder",
+                      json={"user": "test-user", "medicines": [{"name": "Aspirin", "time": now, "recurrence": "once"}]})
+        response = requests.get(f"{base_url}/reminders/stream", params={"user": "test-user", "timeout": 5})
+        if response.status_code == 200 and response.json()["reminders"]:
+            print(f"✅ Reminder Stream Test: {response.json()['reminders'][0]}")
+        else:
+            print(f"❌ Reminder Stream Test failed: {response.status_code} {response.text}")
+    except Exception as e:
+        print(f"❌ Reminder Stream Test error: {e}")
+
+    # Test 19: Prometheus metrics (the requests above are counted per route)
+    try:
+        response = requests.get(f"{base_url}/metrics")
+        if response.status_code == 200 and 'http_requests_total{route="/bmi"' in response.text:
+            print("✅ Metrics Test: per-route counters exported")
+        else:
+            print(f"❌ Metrics Test failed: {response.status_code}")
+    except Exception as e:
+        print(f"❌ Metrics Test error: {e}")
+
+    # Test 20: Sampling profiler (only when the server has an ADMIN_TOKEN)
+    admin_token = os.environ.get("ADMIN_TOKEN")
+    if admin_token:
+        try:
+            response = requests.post(f"{base_url}/admin/profile", json={"seconds": 1},
+                                     headers={"Authorization": f"Bearer {admin_token}"})
+            if response.status_code == 200:
+                print(f"✅ Profiler Test: {response.headers['X-Profile-Samples']} samples, "
+                      f"{len(response.text.splitlines())} distinct stacks")
+            else:
+                print(f"❌ Profiler Test failed: {response.status_code}")
+        except Exception as e:
+            print(f"❌ Profiler Test error: {e}")
+
+    # Test 21: Bad request bodies get the same JSON errors from app.py and asgi.py
+    try:
+        bad_inputs = [("/chat", "application/json", "{not json", 400),
+                      ("/chat", "text/plain", '{"message": "hi"}', 415),
+                      ("/generate-report", "application/json", "{not json", 400),
+                      ("/assess", "application/json", "{not json", 400),
+                      ("/classify-risk/batch", "application/vnd.api+json", "{not json", 400)]
+        failures = []
+        for path, content_type, body, expected in bad_inputs:
+            response = requests.post(f"{base_url}{path}", data=body, headers={"Content-Type": content_type})
+            if response.status_code != expected or "error" not in response.json():
+                failures.append(f"{path} ({content_type}): {response.status_code} {response.text[:80]}")
+        if not failures:
+            print(f"✅ Bad Request Test: {len(bad_inputs)} malformed bodies answered with JSON errors")
+        else:
+            print(f"❌ Bad Request Test failed: {'; '.join(failures)}")
+    except Exception as e:
+        print(f"❌ Bad Request Test error: {e}")
+
     print("\n🎉 All tests completed!")
     print(f"📱 Visit {base_url} in your browser to use the app")
     print("📄 The PDF report now includes:")